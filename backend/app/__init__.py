@@ -12,15 +12,52 @@ def create_app(config_class):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # orjson-backed jsonify (same output as the default provider, faster)
+    from app.utils.json_provider import OrjsonProvider
+    app.json = OrjsonProvider(app)
+    
     # Initialize extensions
     db.init_app(app)
+    
+    # SQLite pragmas (WAL, busy_timeout...) on every new connection, when the profile sets them
+    from app.utils.sqlite_pragmas import init_sqlite_pragmas
+    init_sqlite_pragmas(app)
+    
     migrate.init_app(app, db)
     jwt.init_app(app)
     
+    # Per-process cache of authenticated principals
+    from app.utils.auth import identity_cache
+    identity_cache.configure(
+        maxsize=app.config.get('IDENTITY_CACHE_SIZE', 1024),
+        ttl=app.config.get('IDENTITY_CACHE_TTL', 60)
+    )
+    
+    # Per-process cache of dashboard analytics results
+    from app.services.analytics_service import analytics_cache
+    analytics_cache.configure(
+        maxsize=app.config.get('ANALYTICS_CACHE_SIZE', 256),
+        ttl=app.config.get('ANALYTICS_CACHE_TTL', 30)
+    )
+    
     # Initialize Marshmallow
     from app.schemas import ma
     ma.init_app(app)
     
+    # Audit sink: 'sync' commits each entry, 'async' batches them in a background thread
+    if app.config.get('AUDIT_SINK') == 'async':
+        from app.services.audit_writer import AuditWriter
+        AuditWriter(app)
+    
+    # Prometheus metrics at /metrics (registered first so its after_request hook runs last)
+    if app.config.get('METRICS_ENABLED', True):
+        from app.utils.metrics import init_metrics
+        init_metrics(app)
+    
+    # gzip/brotli for JSON and export responses, negotiated via Accept-Encoding
+    from app.utils.compression import init_compression
+    init_compression(app)
+    
     # Enable CORS
     CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
     
@@ -1,18 +1,87 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from datetime import datetime
+from datetime import date, datetime
 from marshmallow import ValidationError
+from app import db
 from app.models.appointment import Appointment
+from app.models.user import User
 from app.services.appointment_service import AppointmentService
+from app.services.availability import free_intervals, get_availability_index
 from app.utils.auth import get_current_user
 from app.utils.pagination import paginate_query
-from app.schemas.appointment_schema import AppointmentSchema, AppointmentCreateSchema
+from app.utils.eager_loading import eager_load_options
+from app.utils.fieldsets import Fieldsets
+from app.utils.conditional import conditional
+from app.utils.export import stream_export, EXPORT_FORMATS
+from app.schemas.appointment_schema import AppointmentSchema, AppointmentCreateSchema, AppointmentBatchSchema
 
 appointments_bp = Blueprint('appointments', __name__)
 
 # Initialize schemas
 appointment_schema = AppointmentSchema()
 appointment_create_schema = AppointmentCreateSchema()
+appointment_batch_schema = AppointmentBatchSchema()
+
+# Relationships serialized by appointment_schema, loaded up front
+appointment_load_options = eager_load_options(Appointment, appointment_schema)
+
+# ?fields= / ?expand= selections on the list and detail routes
+appointment_fieldsets = Fieldsets(Appointment, appointment_schema, appointment_load_options,
+                                  always=(Appointment.data_hora, Appointment.id))
+
+# Tables read by appointment_schema, embedded patient, user and procedures included (ETag validators)
+APPOINTMENT_TABLES = ('appointments', 'appointment_procedures', 'procedures', 'patients', 'responsibles', 'users')
+
+# Longest range of days one availability request may cover
+MAX_AVAILABILITY_DAYS = 31
+
+# Flat columns for CSV exports (header, path into the dumped appointment)
+APPOINTMENT_CSV_COLUMNS = [
+    ('id', 'id'),
+    ('data_hora', 'data_hora'),
+    ('duracao_minutos', 'duracao_minutos'),
+    ('patient_id', 'patient_id'),
+    ('patient_nome', 'patient.nome'),
+    ('patient_cpf', 'patient.cpf'),
+    ('user_id', 'user_id'),
+    ('user_nome', 'user_nome'),
+    ('tipo', 'tipo'),
+    ('numero_carteira', 'numero_carteira'),
+    ('valor_total', 'valor_total'),
+    ('procedures', 'procedures.nome'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at')
+]
+
+def filter_appointments(query, current_user):
+    """Apply the list filters (patient scope and date range) from the request args
+    
+    Raises:
+        ValueError: if a date filter is malformed
+    """
+    # If user is a Patient (has cpf), only show their appointments
+    if hasattr(current_user, 'cpf'):
+        query = query.filter(Appointment.patient_id == current_user.id)
+    
+    # Date filters
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    
+    if start_date:
+        try:
+            start_dt = datetime.fromisoformat(start_date)
+        except ValueError:
+            raise ValueError('Formato de start_date inválido')
+        query = query.filter(Appointment.data_hora >= start_dt)
+    
+    if end_date:
+        try:
+            end_dt = datetime.fromisoformat(end_date)
+        except ValueError:
+            raise ValueError('Formato de end_date inválido')
+        query = query.filter(Appointment.data_hora <= end_dt)
+    
+    return query
 
 @appointments_bp.route('', methods=['POST'])
 @jwt_required()
@@ -31,55 +100,131 @@ def create_appointment():
     
     return jsonify(appointment_schema.dump(appointment)), 201
 
+@appointments_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def create_appointments():
+    """Create several appointments at once: a list (items) or a weekly/daily series (recurrence)
+
+    All or nothing: either every appointment is created (ids in item order)
+    or none is and the errors say which items failed.
+    """
+    try:
+        data = appointment_batch_schema.load(request.get_json())
+    except ValidationError as err:
+        return jsonify({'error': err.messages}), 400
+    
+    current_user = get_current_user()
+    ids, errors = AppointmentService.create_appointments(data, current_user.id)
+    
+    if errors:
+        return jsonify({'error': 'Nenhum atendimento foi criado', 'errors': errors}), 400
+    
+    return jsonify({'created': len(ids), 'ids': ids}), 201
+
 @appointments_bp.route('', methods=['GET'])
 @jwt_required()
+@conditional(*APPOINTMENT_TABLES)
 def list_appointments():
-    """List appointments with pagination and date filters"""
-    query = Appointment.query.order_by(Appointment.data_hora.desc())
+    """List appointments with pagination, date filters and ?fields= / ?expand="""
+    try:
+        schema, options = appointment_fieldsets.resolve()
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    query = Appointment.query.options(*options).order_by(Appointment.data_hora.desc())
     
     current_user = get_current_user()
     print(f"DEBUG: Current User: {current_user.nome}, ID: {current_user.id}, Type: {type(current_user)}")
     
-    # If user is a Patient (has cpf), only show their appointments
     if hasattr(current_user, 'cpf'):
         print(f"DEBUG: User is Patient. Filtering by patient_id: {current_user.id}")
-        query = query.filter(Appointment.patient_id == current_user.id)
     else:
         print("DEBUG: User is Admin/Staff. Showing all appointments.")
-        
-    count = query.count()
-    print(f"DEBUG: Found {count} appointments")
     
-    # Date filters
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    try:
+        query = filter_appointments(query, current_user)
+        result = paginate_query(query, schema=schema,
+                                cursor_columns=(Appointment.data_hora, Appointment.id))
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    return jsonify(result), 200
+
+@appointments_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_appointments():
+    """Stream appointments as NDJSON or CSV (same filters as the list)"""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': "Formato inválido (use 'ndjson' ou 'csv')"}), 400
     
-    if start_date:
-        try:
-            start_dt = datetime.fromisoformat(start_date)
-            query = query.filter(Appointment.data_hora >= start_dt)
-        except ValueError:
-            return jsonify({'error': 'Formato de start_date inválido'}), 400
+    query = Appointment.query.options(*appointment_load_options).order_by(Appointment.data_hora.desc())
     
-    if end_date:
-        try:
-            end_dt = datetime.fromisoformat(end_date)
-            query = query.filter(Appointment.data_hora <= end_dt)
-        except ValueError:
-            return jsonify({'error': 'Formato de end_date inválido'}), 400
+    try:
+        query = filter_appointments(query, get_current_user())
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
     
-    result = paginate_query(query, schema=appointment_schema)
-    return jsonify(result), 200
+    return stream_export(query, appointment_schema, fmt, 'atendimentos', csv_columns=APPOINTMENT_CSV_COLUMNS)
+
+@appointments_bp.route('/availability', methods=['GET'])
+@jwt_required()
+@conditional('appointments', 'users')
+def get_availability():
+    """Free intervals within working hours of one professional (?user_id=) or all of them
+
+    Covers ?date= and the following days (?days=, default 1); ?duracao= leaves
+    out gaps shorter than that many minutes.
+    """
+    try:
+        first_day = date.fromisoformat(request.args.get('date', ''))
+    except ValueError:
+        return jsonify({'error': 'Parâmetro date obrigatório (formato AAAA-MM-DD)'}), 400
+    
+    days = request.args.get('days', 1, type=int)
+    if not 1 <= days <= MAX_AVAILABILITY_DAYS:
+        return jsonify({'error': f'days deve estar entre 1 e {MAX_AVAILABILITY_DAYS}'}), 400
+    duracao = request.args.get('duracao', 0, type=int)
+    
+    user_id = request.args.get('user_id')
+    if user_id:
+        if db.session.get(User, user_id) is None:
+            return jsonify({'error': 'Profissional não encontrado'}), 404
+        user_ids = [user_id]
+    else:
+        user_ids = [row.id for row in db.session.query(User.id).order_by(User.created_at, User.id)]
+    
+    index = get_availability_index()
+    availability = free_intervals(user_ids, first_day, days, min_minutes=max(duracao, 0))
+    return jsonify({
+        'date': first_day.isoformat(),
+        'days': days,
+        'working_hours': {'start': index.opening.isoformat('minutes'), 'end': index.closing.isoformat('minutes')},
+        'items': [
+            {
+                'user_id': user_id,
+                'days': [
+                    {'date': day.isoformat(),
+                     'free': [{'start': start.isoformat(), 'end': end.isoformat()} for start, end in free]}
+                    for day, free in availability[user_id]
+                ]
+            }
+            for user_id in user_ids
+        ]
+    }), 200
 
 @appointments_bp.route('/<appointment_id>', methods=['GET'])
 @jwt_required()
+@conditional(*APPOINTMENT_TABLES)
 def get_appointment(appointment_id):
-    """Get appointment by ID"""
-    appointment = Appointment.query.get(appointment_id)
+    """Get appointment by ID (accepts ?fields= / ?expand=)"""
+    try:
+        schema, options = appointment_fieldsets.resolve()
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    appointment = Appointment.query.options(*options).get(appointment_id)
     if not appointment:
         return jsonify({'error': 'Atendimento não encontrado'}), 404
     
-    return jsonify(appointment_schema.dump(appointment)), 200
+    return jsonify(schema.dump(appointment)), 200
 
 @appointments_bp.route('/<appointment_id>', methods=['PUT'])
 @jwt_required()
@@ -3,7 +3,12 @@ from flask_jwt_extended import jwt_required
 from app.models.audit_log import AuditLog
 from app.utils.auth import get_current_user, admin_required
 from app.utils.pagination import paginate_query
+from app.utils.eager_loading import eager_load_options
+from app.utils.fieldsets import Fieldsets
+from app.utils.export import stream_export, EXPORT_FORMATS
 from app.schemas.audit_schema import AuditLogSchema
+from app.services.audit_service import AuditService
+from app.services.audit_archive import get_audit_archive, paginate_archived, iter_archived
 from datetime import datetime
 
 audit_bp = Blueprint('audit', __name__)
@@ -11,42 +16,141 @@ audit_bp = Blueprint('audit', __name__)
 # Initialize schema
 audit_log_schema = AuditLogSchema()
 
+# Relationships serialized by audit_log_schema, loaded up front
+audit_log_load_options = eager_load_options(AuditLog, audit_log_schema)
+
+# ?fields= selections on the list route
+audit_log_fieldsets = Fieldsets(AuditLog, audit_log_schema, audit_log_load_options,
+                                always=(AuditLog.created_at, AuditLog.id))
+
+def log_window():
+    """(start, end) of the date filters in the request args (malformed dates are ignored)"""
+    window = []
+    for arg in ('start_date', 'end_date'):
+        value = request.args.get(arg)
+        try:
+            window.append(datetime.fromisoformat(value) if value else None)
+        except ValueError:
+            window.append(None)
+    return tuple(window)
+
+def log_filters(table):
+    """WHERE conditions of the list filters for audit_logs or an archived segment's copy of it"""
+    conditions = []
+    for arg in ('action', 'table_name', 'user_id'):
+        value = request.args.get(arg)
+        if value:
+            conditions.append(table.c[arg] == value)
+    
+    start_dt, end_dt = log_window()
+    if start_dt:
+        conditions.append(table.c.created_at >= start_dt)
+    if end_dt:
+        conditions.append(table.c.created_at <= end_dt)
+    
+    return conditions
+
+def filter_logs(query):
+    """Apply the list filters from the request args (malformed dates are ignored)"""
+    return query.filter(*log_filters(AuditLog.__table__))
+
+def archived_segments():
+    """Archived months the request's date window reaches (none: only audit_logs is read)"""
+    return get_audit_archive().segments(*log_window())
+
+def unfiltered():
+    return not any(request.args.get(arg) for arg in ('action', 'table_name', 'user_id'))
+
 @audit_bp.route('', methods=['GET'])
 @jwt_required()
 @admin_required
 def list_logs():
-    """List audit logs with filters"""
-    query = AuditLog.query.order_by(AuditLog.created_at.desc())
-    
-    # Filters
-    action = request.args.get('action')
-    table_name = request.args.get('table_name')
-    user_id = request.args.get('user_id')
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    
-    if action:
-        query = query.filter(AuditLog.action == action)
-    
-    if table_name:
-        query = query.filter(AuditLog.table_name == table_name)
-        
-    if user_id:
-        query = query.filter(AuditLog.user_id == user_id)
-        
-    if start_date:
-        try:
-            start_dt = datetime.fromisoformat(start_date)
-            query = query.filter(AuditLog.created_at >= start_dt)
-        except ValueError:
-            pass
-            
-    if end_date:
-        try:
-            end_dt = datetime.fromisoformat(end_date)
-            query = query.filter(AuditLog.created_at <= end_dt)
-        except ValueError:
-            pass
-            
-    result = paginate_query(query, schema=audit_log_schema)
+    """List audit logs with filters (accepts ?fields=)
+
+    When the date window reaches archived months the hot table and their
+    segment files are read together (see app.services.audit_archive).
+    """
+    try:
+        schema, options = audit_log_fieldsets.resolve()
+        segments = archived_segments()
+        if segments:
+            result = paginate_archived(segments, log_filters, schema,
+                                       unfiltered=unfiltered(), window=log_window())
+            return jsonify(result), 200
+        query = AuditLog.query.options(*options).order_by(AuditLog.created_at.desc())
+        query = filter_logs(query)
+        result = paginate_query(query, schema=schema,
+                                cursor_columns=(AuditLog.created_at, AuditLog.id))
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
     return jsonify(result), 200
+
+@audit_bp.route('/export', methods=['GET'])
+@jwt_required()
+@admin_required
+def export_logs():
+    """Stream audit logs as NDJSON or CSV (same filters as the list)"""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': "Formato inválido (use 'ndjson' ou 'csv')"}), 400
+    
+    segments = archived_segments()
+    if segments:
+        rows = iter_archived(segments, log_filters)
+    else:
+        rows = AuditLog.query.options(*audit_log_load_options).order_by(AuditLog.created_at.desc())
+        rows = filter_logs(rows)
+    
+    return stream_export(rows, audit_log_schema, fmt, 'auditoria')
+
+@audit_bp.route('/<table_name>/<record_id>', methods=['GET'])
+@jwt_required()
+@admin_required
+def record_history(table_name, record_id):
+    """One record's audit history, oldest first (accepts ?fields=)
+
+    Paginated like the list (page or cursor); ?format=ndjson|csv streams the
+    whole history instead. Reads the table_name/record_id/created_at index,
+    so the cost depends on the record's history, not on the audit volume;
+    archived months are looked up in audit_archive_records, so neither does
+    the archive's age.
+    """
+    def history_filters(table):
+        return [table.c.table_name == table_name, table.c.record_id == record_id]
+    
+    fmt = request.args.get('format')
+    if fmt is not None and fmt not in EXPORT_FORMATS:
+        return jsonify({'error': "Formato inválido (use 'ndjson' ou 'csv')"}), 400
+    
+    # Only the archived months holding rows of this record, with its own dates and counts
+    segments = get_audit_archive().record_segments(table_name, record_id)
+    
+    if fmt:
+        if segments:
+            rows = iter_archived(segments, history_filters, descending=False)
+        else:
+            rows = AuditLog.query.options(*audit_log_load_options)\
+                .filter(*history_filters(AuditLog.__table__))\
+                .order_by(AuditLog.created_at, AuditLog.id)
+        return stream_export(rows, audit_log_schema, fmt, f'auditoria_{table_name}_{record_id}')
+    
+    try:
+        schema, options = audit_log_fieldsets.resolve()
+        if segments:
+            result = paginate_archived(segments, history_filters, schema, unfiltered=True, descending=False)
+            return jsonify(result), 200
+        query = AuditLog.query.options(*options)\
+            .filter(*history_filters(AuditLog.__table__))\
+            .order_by(AuditLog.created_at, AuditLog.id)
+        result = paginate_query(query, schema=schema,
+                                cursor_columns=(AuditLog.created_at, AuditLog.id), descending=False)
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    return jsonify(result), 200
+
+@audit_bp.route('/queue', methods=['GET'])
+@jwt_required()
+@admin_required
+def queue_stats():
+    """Audit sink mode and pending queue depth"""
+    return jsonify(AuditService.sink_stats()), 200
@@ -1,8 +1,8 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.user import User
 from app.models.patient import Patient
-from app.utils.auth import check_password, hash_password
+from app.utils.auth import check_password, hash_password, create_token, is_deferred_password, check_deferred_password
 from app.schemas.user_schema import UserSchema
 from app.schemas.patient_schema import PatientSchema
 from app import db
@@ -25,7 +25,7 @@ def login():
     user = User.query.filter_by(email=data['email']).first()
     
     if user and check_password(data['senha'], user.senha):
-        access_token = create_access_token(identity=str(user.id))
+        access_token = create_token(user)
         return jsonify({
             'access_token': access_token,
             'user': user_schema.dump(user),
@@ -35,8 +35,17 @@ def login():
     # If not user, try patient
     patient = Patient.query.filter_by(email=data['email']).first()
     
-    if patient and check_password(data['senha'], patient.senha):
-        access_token = create_access_token(identity=str(patient.id))
+    if patient and is_deferred_password(patient.senha):
+        # Deferred initial credential (the CPF): hash it once the patient proves it
+        authenticated = check_deferred_password(data['senha'], patient.cpf)
+        if authenticated:
+            patient.senha = hash_password(patient.cpf)
+            db.session.commit()
+    else:
+        authenticated = patient is not None and check_password(data['senha'], patient.senha)
+    
+    if authenticated:
+        access_token = create_token(patient)
         return jsonify({
             'access_token': access_token,
             'user': patient_schema.dump(patient),
@@ -1,48 +1,114 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from datetime import date, datetime
-from sqlalchemy import extract, func
+from datetime import date, timedelta
+from sqlalchemy import case, func
 from app import db
-from app.models.patient import Patient
-from app.models.appointment import Appointment
-from app.models.procedure import Procedure
+from app.models.daily_stats import DailyStats
+from app.services.procedure_catalog import get_procedure_catalog
+from app.services.analytics_service import (
+    AnalyticsService, ANALYTICS_TABLES, GRANULARITIES, GROUPINGS, MAX_RANGE_DAYS
+)
+from app.utils.auth import admin_required
+from app.utils.conditional import conditional
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+def analytics_range(granularity):
+    """(first, last) day from ?start_date= / ?end_date=, defaulting per granularity
+
+    Raises:
+        ValueError: if a date is malformed or the range is empty or too long
+    """
+    default_first, default_last = AnalyticsService.default_range(granularity)
+    try:
+        first = date.fromisoformat(request.args['start_date']) if request.args.get('start_date') else None
+    except ValueError:
+        raise ValueError('Formato de start_date inválido (AAAA-MM-DD)')
+    try:
+        last = date.fromisoformat(request.args['end_date']) if request.args.get('end_date') else default_last
+    except ValueError:
+        raise ValueError('Formato de end_date inválido (AAAA-MM-DD)')
+    if first is None:
+        first = last - (default_last - default_first)
+    if first > last:
+        raise ValueError('start_date deve ser anterior ou igual a end_date')
+    if (last - first).days >= MAX_RANGE_DAYS:
+        raise ValueError(f'O período deve ter no máximo {MAX_RANGE_DAYS} dias')
+    return first, last
+
 @dashboard_bp.route('/stats', methods=['GET'])
 @jwt_required()
 def get_dashboard_stats():
     """Get dashboard statistics"""
     try:
         today = date.today()
-        current_month = today.month
-        current_year = today.year
-
-        # Total Patients
-        total_patients = Patient.query.count()
+        month_start = today.replace(day=1)
+        month_end = (month_start + timedelta(days=32)).replace(day=1)
 
-        # Appointments Today
-        # SQLite specific date comparison might be needed if using SQLite, but func.date usually works
-        appointments_today = Appointment.query.filter(
-            func.date(Appointment.data_hora) == today
-        ).count()
+        # Patients, today's appointments and monthly revenue in one pass over the daily rollup
+        total_patients, appointments_today, monthly_revenue = db.session.query(
+            func.sum(DailyStats.patient_count),
+            func.sum(case((DailyStats.day == today, DailyStats.appointment_count), else_=0)),
+            func.sum(case(
+                ((DailyStats.day >= month_start) & (DailyStats.day < month_end), DailyStats.revenue),
+                else_=0
+            ))
+        ).one()
 
-        # Total Procedures
-        total_procedures = Procedure.query.count()
-
-        # Monthly Revenue
-        monthly_revenue = db.session.query(func.sum(Appointment.valor_total)).filter(
-            extract('month', Appointment.data_hora) == current_month,
-            extract('year', Appointment.data_hora) == current_year
-        ).scalar() or 0
+        # Total Procedures (from the in-memory catalog)
+        total_procedures = len(get_procedure_catalog())
 
         return jsonify({
-            'total_patients': total_patients,
-            'appointments_today': appointments_today,
+            'total_patients': int(total_patients or 0),
+            'appointments_today': int(appointments_today or 0),
             'total_procedures': total_procedures,
-            'monthly_revenue': float(monthly_revenue)
+            'monthly_revenue': float(monthly_revenue or 0)
         }), 200
 
     except Exception as e:
         print(f"Error getting dashboard stats: {e}")
         return jsonify({'error': 'Erro ao carregar estatísticas'}), 500
+
+@dashboard_bp.route('/revenue', methods=['GET'])
+@jwt_required()
+@admin_required
+@conditional(*ANALYTICS_TABLES)
+def get_revenue():
+    """Revenue per day, week or month (?granularity=), optionally split by tipo, user or procedure (?by=)
+
+    Accepts ?start_date= / ?end_date=; defaults to the last 30 days, 12 weeks
+    or 12 months.
+    """
+    granularity = request.args.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': f"granularity deve ser um de: {', '.join(GRANULARITIES)}"}), 400
+    by = request.args.get('by') or None
+    if by is not None and by not in GROUPINGS:
+        return jsonify({'error': f"by deve ser um de: {', '.join(GROUPINGS)}"}), 400
+    try:
+        first, last = analytics_range(granularity)
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+
+    try:
+        return jsonify(AnalyticsService.revenue(first, last, granularity, by)), 200
+    except Exception as e:
+        print(f"Error getting revenue: {e}")
+        return jsonify({'error': 'Erro ao carregar faturamento'}), 500
+
+@dashboard_bp.route('/procedures/usage', methods=['GET'])
+@jwt_required()
+@admin_required
+@conditional(*ANALYTICS_TABLES)
+def get_procedure_usage():
+    """Use and revenue of every procedure between ?start_date= and ?end_date= (default: last 30 days)"""
+    try:
+        first, last = analytics_range('day')
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+
+    try:
+        return jsonify(AnalyticsService.procedure_usage(first, last)), 200
+    except Exception as e:
+        print(f"Error getting procedure usage: {e}")
+        return jsonify({'error': 'Erro ao carregar uso dos procedimentos'}), 500
@@ -1,9 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
 from marshmallow import ValidationError
 from app.models.patient import Patient
 from app.services.patient_service import PatientService
+from app.utils.auth import admin_required
+from app.utils.conditional import conditional
 from app.utils.pagination import paginate_query
+from app.utils.importers import open_text_stream, iter_csv_records, iter_ndjson_records
+from app.utils.eager_loading import eager_load_options
+from app.utils.fieldsets import Fieldsets
 from app.schemas.patient_schema import PatientSchema, PatientCreateSchema, PatientUpdateSchema
 
 patients_bp = Blueprint('patients', __name__)
@@ -13,6 +18,16 @@ patient_schema = PatientSchema()
 patient_create_schema = PatientCreateSchema()
 patient_update_schema = PatientUpdateSchema()
 
+# Relationships serialized by patient_schema, loaded up front
+patient_load_options = eager_load_options(Patient, patient_schema)
+
+# ?fields= / ?expand= selections on the list, search and detail routes
+patient_fieldsets = Fieldsets(Patient, patient_schema, patient_load_options,
+                              always=(Patient.created_at, Patient.id))
+
+# Tables read by patient_schema (ETag validators)
+PATIENT_TABLES = ('patients', 'responsibles')
+
 @patients_bp.route('', methods=['POST'])
 @jwt_required()
 def create_patient():
@@ -28,23 +43,84 @@ def create_patient():
     
     return jsonify(patient_schema.dump(patient)), 201
 
+@patients_bp.route('/import', methods=['POST'])
+@admin_required
+def import_patients():
+    """Bulk import patients from a CSV or NDJSON body (admin only)"""
+    fmt = request.args.get('format')
+    if not fmt:
+        fmt = 'csv' if request.mimetype in ('text/csv', 'application/csv') else 'ndjson'
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': "Formato inválido (use 'csv' ou 'ndjson')"}), 400
+    
+    stream = open_text_stream(request.stream)
+    records = iter_csv_records(stream) if fmt == 'csv' else iter_ndjson_records(stream)
+    
+    report = PatientService.import_patients(
+        records,
+        chunk_size=current_app.config.get('PATIENT_IMPORT_CHUNK_SIZE', 500),
+        max_errors=current_app.config.get('PATIENT_IMPORT_MAX_ERRORS', 1000)
+    )
+    return jsonify(report), 200
+
 @patients_bp.route('', methods=['GET'])
 @jwt_required()
+@conditional(*PATIENT_TABLES)
 def list_patients():
-    """List all patients with pagination"""
-    query = Patient.query.order_by(Patient.created_at.desc())
-    result = paginate_query(query, schema=patient_schema)
+    """List all patients with pagination (accepts ?fields= / ?expand=)"""
+    try:
+        schema, options = patient_fieldsets.resolve()
+        query = Patient.query.options(*options).order_by(Patient.created_at.desc())
+        result = paginate_query(query, schema=schema,
+                                cursor_columns=(Patient.created_at, Patient.id))
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
     return jsonify(result), 200
 
+@patients_bp.route('/search', methods=['GET'])
+@jwt_required()
+@conditional(*PATIENT_TABLES)
+def search_patients():
+    """Full-text search by name, CPF, email or phone prefix, best matches first"""
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('limit', 10, type=int), 100)
+    
+    try:
+        schema, options = patient_fieldsets.resolve()
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    
+    result, error = PatientService.search_patients(
+        request.args.get('q', ''), page=page, per_page=per_page, options=options
+    )
+    if error:
+        return jsonify({'error': error}), 400
+    
+    patients, has_next = result
+    return jsonify({
+        'items': schema.dump(patients, many=True),
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'has_next': has_next,
+            'has_prev': page > 1
+        }
+    }), 200
+
 @patients_bp.route('/<patient_id>', methods=['GET'])
 @jwt_required()
+@conditional(*PATIENT_TABLES)
 def get_patient(patient_id):
-    """Get patient by ID"""
-    patient = Patient.query.get(patient_id)
+    """Get patient by ID (accepts ?fields= / ?expand=)"""
+    try:
+        schema, options = patient_fieldsets.resolve()
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    patient = Patient.query.options(*options).get(patient_id)
     if not patient:
         return jsonify({'error': 'Paciente não encontrado'}), 404
     
-    return jsonify(patient_schema.dump(patient)), 200
+    return jsonify(schema.dump(patient)), 200
 
 @patients_bp.route('/<patient_id>', methods=['PUT'])
 @jwt_required()
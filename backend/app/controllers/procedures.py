@@ -3,8 +3,11 @@ from flask_jwt_extended import jwt_required
 from marshmallow import ValidationError
 from app.models.procedure import Procedure
 from app.services.procedure_service import ProcedureService
+from app.services.procedure_catalog import get_procedure_catalog
 from app.utils.auth import admin_required
-from app.utils.pagination import paginate_query
+from app.utils.conditional import conditional
+from app.utils.fieldsets import Fieldsets
+from app.utils.pagination import paginate_catalog
 from app.schemas.procedure_schema import ProcedureSchema, ProcedureCreateSchema, ProcedureUpdateSchema
 
 procedures_bp = Blueprint('procedures', __name__)
@@ -14,6 +17,9 @@ procedure_schema = ProcedureSchema()
 procedure_create_schema = ProcedureCreateSchema()
 procedure_update_schema = ProcedureUpdateSchema()
 
+# ?fields= selections, applied to the catalog's pre-serialized items
+procedure_fieldsets = Fieldsets(Procedure, procedure_schema, [])
+
 @procedures_bp.route('', methods=['POST'])
 @admin_required
 def create_procedure():
@@ -31,21 +37,30 @@ def create_procedure():
 
 @procedures_bp.route('', methods=['GET'])
 @jwt_required()
+@conditional('procedures')
 def list_procedures():
-    """List all procedures with pagination"""
-    query = Procedure.query.order_by(Procedure.nome)
-    result = paginate_query(query, schema=procedure_schema)
+    """List all procedures with pagination (served from the in-memory catalog, accepts ?fields=)"""
+    try:
+        result = paginate_catalog(get_procedure_catalog(), cursor_columns=(Procedure.nome, Procedure.id))
+        result['items'] = procedure_fieldsets.project(result['items'])
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
     return jsonify(result), 200
 
 @procedures_bp.route('/<procedure_id>', methods=['GET'])
 @jwt_required()
+@conditional('procedures')
 def get_procedure(procedure_id):
-    """Get procedure by ID"""
-    procedure = Procedure.query.get(procedure_id)
+    """Get procedure by ID (accepts ?fields=)"""
+    procedure = get_procedure_catalog().dump(procedure_id)
     if not procedure:
         return jsonify({'error': 'Procedimento não encontrado'}), 404
     
-    return jsonify(procedure_schema.dump(procedure)), 200
+    try:
+        [procedure] = procedure_fieldsets.project([procedure])
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    return jsonify(procedure), 200
 
 @procedures_bp.route('/<procedure_id>', methods=['PUT'])
 @admin_required
@@ -5,6 +5,8 @@ from app.models.user import User
 from app.services.user_service import UserService
 from app.utils.auth import admin_required, get_current_user
 from app.utils.pagination import paginate_query
+from app.utils.conditional import conditional
+from app.utils.fieldsets import Fieldsets
 from app.schemas.user_schema import UserSchema, UserCreateSchema, UserUpdateSchema
 
 users_bp = Blueprint('users', __name__)
@@ -15,6 +17,9 @@ users_schema = UserSchema(many=True)
 user_create_schema = UserCreateSchema()
 user_update_schema = UserUpdateSchema()
 
+# ?fields= selections on the list route
+user_fieldsets = Fieldsets(User, user_schema, [], always=(User.created_at, User.id))
+
 @users_bp.route('', methods=['POST'])
 @admin_required
 def create_user():
@@ -32,10 +37,16 @@ def create_user():
 
 @users_bp.route('', methods=['GET'])
 @admin_required
+@conditional('users')
 def list_users():
-    """List all users with pagination (admin only)"""
-    query = User.query.order_by(User.created_at.desc())
-    result = paginate_query(query, schema=user_schema)
+    """List all users with pagination (admin only, accepts ?fields=)"""
+    try:
+        schema, options = user_fieldsets.resolve()
+        query = User.query.options(*options).order_by(User.created_at.desc())
+        result = paginate_query(query, schema=schema,
+                                cursor_columns=(User.created_at, User.id))
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
     return jsonify(result), 200
 
 @users_bp.route('/search', methods=['GET'])
@@ -2,5 +2,8 @@ from app.models.user import User
 from app.models.patient import Patient, Responsible
 from app.models.procedure import Procedure
 from app.models.appointment import Appointment, AppointmentProcedure
+from app.models.daily_stats import DailyStats
+from app.models.cache_version import CacheVersion, ScheduleVersion
+from app.models import patient_search  # registers the FTS5 search index DDL
 
-__all__ = ['User', 'Patient', 'Responsible', 'Procedure', 'Appointment', 'AppointmentProcedure']
\ No newline at end of file
+__all__ = ['User', 'Patient', 'Responsible', 'Procedure', 'Appointment', 'AppointmentProcedure', 'DailyStats', 'CacheVersion', 'ScheduleVersion']
\ No newline at end of file
@@ -1,13 +1,28 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
 from app import db
 
+# Appointment length in minutes: default when not given and allowed range
+DEFAULT_DURATION_MINUTES = 30
+MIN_DURATION_MINUTES = 5
+MAX_DURATION_MINUTES = 480
+
+# Most appointments one batch (POST /appointments/batch) may create
+MAX_BATCH_APPOINTMENTS = 100
+
 class Appointment(db.Model):
     __tablename__ = 'appointments'
+    __table_args__ = (
+        db.Index('ix_appointments_data_hora_id', 'data_hora', 'id'),
+        db.Index('ix_appointments_patient_id_data_hora', 'patient_id', 'data_hora'),
+        db.Index('ix_appointments_user_id_data_hora', 'user_id', 'data_hora'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     data_hora = db.Column(db.DateTime, nullable=False)
+    duracao_minutos = db.Column(db.Integer, nullable=False, default=DEFAULT_DURATION_MINUTES,
+                                server_default=str(DEFAULT_DURATION_MINUTES))
     patient_id = db.Column(db.String(36), db.ForeignKey('patients.id'), nullable=False)
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     tipo = db.Column(db.String(20), nullable=False)
@@ -19,9 +34,31 @@ class Appointment(db.Model):
     
     # Relacionamentos
     procedures = db.relationship('Procedure', secondary='appointment_procedures', backref='appointments')
+    
+    @property
+    def data_hora_fim(self):
+        """End of the appointment (data_hora + duracao_minutos)"""
+        return self.data_hora + timedelta(minutes=self.duracao_minutos)
+    
+    def to_dict(self):
+        """Plain snapshot of the appointment (used by audit logs)"""
+        return {
+            'id': self.id,
+            'data_hora': self.data_hora.isoformat() if self.data_hora else None,
+            'duracao_minutos': self.duracao_minutos,
+            'patient_id': self.patient_id,
+            'user_id': self.user_id,
+            'tipo': self.tipo,
+            'numero_carteira': self.numero_carteira,
+            'valor_total': str(self.valor_total) if self.valor_total is not None else None,
+            'procedures': [procedure.id for procedure in self.procedures]
+        }
 
 class AppointmentProcedure(db.Model):
     __tablename__ = 'appointment_procedures'
+    __table_args__ = (
+        db.Index('ix_appointment_procedures_procedure_id', 'procedure_id'),
+    )
     
     appointment_id = db.Column(db.String(36), db.ForeignKey('appointments.id'), primary_key=True)
     procedure_id = db.Column(db.String(36), db.ForeignKey('procedures.id'), primary_key=True)
\ No newline at end of file
@@ -1,17 +1,28 @@
 import uuid
 from datetime import datetime
 from app import db
+from app.utils.audit_payload import FORMAT_FULL, decode_payload
 
 class AuditLog(db.Model):
     __tablename__ = 'audit_logs'
+    __table_args__ = (
+        db.Index('ix_audit_logs_created_at_id', 'created_at', 'id'),
+        db.Index('ix_audit_logs_action_created_at', 'action', 'created_at'),
+        db.Index('ix_audit_logs_table_name_created_at', 'table_name', 'created_at'),
+        db.Index('ix_audit_logs_user_id_created_at', 'user_id', 'created_at'),
+        # One record's history in order (GET /audit/<table_name>/<record_id>)
+        db.Index('ix_audit_logs_table_name_record_id_created_at', 'table_name', 'record_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True) # Nullable because system actions might not have a user
     action = db.Column(db.String(50), nullable=False) # CREATE, UPDATE, DELETE, LOGIN, etc.
     table_name = db.Column(db.String(50), nullable=True)
     record_id = db.Column(db.String(36), nullable=True)
-    old_values = db.Column(db.Text, nullable=True) # JSON string
-    new_values = db.Column(db.Text, nullable=True) # JSON string
+    old_values = db.Column(db.Text, nullable=True) # JSON string (payload_format 0)
+    new_values = db.Column(db.Text, nullable=True) # JSON string (payload_format 0)
+    payload = db.Column(db.LargeBinary, nullable=True) # Delta of old/new, maybe compressed (app.utils.audit_payload)
+    payload_format = db.Column(db.SmallInteger, nullable=False, default=FORMAT_FULL, server_default='0')
     ip_address = db.Column(db.String(45), nullable=True)
     details = db.Column(db.String(255), nullable=True)
     
@@ -19,3 +30,49 @@ class AuditLog(db.Model):
     
     # Relationship
     user = db.relationship('User', backref='audit_logs')
+    
+    # Columns the snapshot properties read
+    SNAPSHOT_COLUMNS = ('old_values', 'new_values', 'payload', 'payload_format')
+    
+    @property
+    def snapshots(self):
+        """(old_values, new_values) as JSON text, decoded once per instance (audit rows never change)"""
+        snapshots = getattr(self, '_snapshots', None)
+        if snapshots is None:
+            snapshots = self._snapshots = decode_payload(self)
+        return snapshots
+    
+    @property
+    def old_snapshot(self):
+        """Full old values as JSON text, whatever the stored format"""
+        return self.snapshots[0]
+    
+    @property
+    def new_snapshot(self):
+        """Full new values as JSON text, whatever the stored format"""
+        return self.snapshots[1]
+
+class AuditArchiveSegment(db.Model):
+    __tablename__ = 'audit_archive_segments'
+    
+    # One row per archived month; its rows live in their own SQLite file (AUDIT_ARCHIVE_DIR)
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    path = db.Column(db.String(255), nullable=False)  # file name inside AUDIT_ARCHIVE_DIR
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    first_at = db.Column(db.DateTime, nullable=False)
+    last_at = db.Column(db.DateTime, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Its records are listed in audit_archive_records (false for months archived before that table)
+    records_indexed = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
+
+class AuditArchiveRecord(db.Model):
+    __tablename__ = 'audit_archive_records'
+    
+    # One row per record and archived month holding audit rows of it, with their
+    # count and dates: a record's history only opens (and counts) those segments
+    table_name = db.Column(db.String(50), primary_key=True)
+    record_id = db.Column(db.String(36), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    row_count = db.Column(db.Integer, nullable=False)
+    first_at = db.Column(db.DateTime, nullable=False)
+    last_at = db.Column(db.DateTime, nullable=False)
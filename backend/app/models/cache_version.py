@@ -0,0 +1,98 @@
+from sqlalchemy import event, text
+from app import db
+
+class CacheVersion(db.Model):
+    __tablename__ = 'cache_versions'
+    
+    # One row per table, bumped by triggers on every write (see VERSIONED_TABLES)
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    changed_at = db.Column(db.DateTime)
+    
+    @staticmethod
+    def current(name):
+        """Version of a cache (0 if it was never bumped)"""
+        version = db.session.query(CacheVersion.version).filter_by(name=name).scalar()
+        return version or 0
+    
+    @staticmethod
+    def snapshot(names):
+        """{name: (version, changed_at)} for the given names in one query"""
+        rows = db.session.query(CacheVersion.name, CacheVersion.version, CacheVersion.changed_at)\
+            .filter(CacheVersion.name.in_(names)).all()
+        found = {name: (version, changed_at) for name, version, changed_at in rows}
+        return {name: found.get(name, (0, None)) for name in names}
+
+# Tables whose every write bumps the cache_versions row of the same name.
+# Triggers (not ORM events) so Core bulk inserts and raw SQL are counted too.
+VERSIONED_TABLES = ('users', 'patients', 'responsibles', 'procedures', 'appointments', 'appointment_procedures')
+
+def _version_trigger(table, operation):
+    return f"""CREATE TRIGGER IF NOT EXISTS {table}_version_{operation.lower()}
+        AFTER {operation} ON {table} BEGIN
+        INSERT INTO cache_versions (name, version, changed_at)
+        VALUES ('{table}', 1, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+        ON CONFLICT (name) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+    END"""
+
+TABLE_VERSION_DDL = [
+    _version_trigger(table, operation)
+    for table in VERSIONED_TABLES
+    for operation in ('INSERT', 'UPDATE', 'DELETE')
+]
+
+class ScheduleVersion(db.Model):
+    __tablename__ = 'schedule_versions'
+    __table_args__ = (
+        db.Index('ix_schedule_versions_version', 'version'),
+    )
+    
+    # One row per professional and day, bumped by triggers when an appointment
+    # touching that day is created, moved, resized or deleted (see SCHEDULE_VERSION_DDL).
+    # Each bump stamps the row above every other one, so `version > seen` lists the days
+    # changed since a reader last looked.
+    user_id = db.Column(db.String(36), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    
+    @staticmethod
+    def latest():
+        """Highest stamp (0 if no schedule was ever written)"""
+        return db.session.query(db.func.max(ScheduleVersion.version)).scalar() or 0
+    
+    @staticmethod
+    def changed_since(version):
+        """(user_id, day, version) of the days bumped after `version`"""
+        return db.session.query(ScheduleVersion.user_id, ScheduleVersion.day, ScheduleVersion.version)\
+            .filter(ScheduleVersion.version > version).all()
+
+def _schedule_days(row):
+    """SELECTs of the (user_id, day) pairs an appointments row (NEW or OLD) occupies"""
+    end_day = f"date({row}.data_hora, '+' || {row}.duracao_minutos || ' minutes', '-0.001 seconds')"
+    return (f"SELECT {row}.user_id AS user_id, date({row}.data_hora) AS day"
+            f" UNION SELECT {row}.user_id, {end_day}")
+
+def _schedule_trigger(operation, rows):
+    event_name = 'UPDATE OF user_id, data_hora, duracao_minutos' if operation == 'UPDATE' else operation
+    days = ' UNION '.join(_schedule_days(row) for row in rows)
+    stamp = "(SELECT coalesce(max(version), 0) + 1 FROM schedule_versions)"
+    return f"""CREATE TRIGGER IF NOT EXISTS appointments_schedule_{operation.lower()}
+        AFTER {event_name} ON appointments BEGIN
+        INSERT INTO schedule_versions (user_id, day, version)
+        SELECT user_id, day, {stamp} FROM ({days}) WHERE true
+        ON CONFLICT (user_id, day) DO UPDATE SET version = {stamp};
+    END"""
+
+# Appointment writes that change a professional's busy intervals bump their days
+# (an update only when it sets user_id, data_hora or duracao_minutos)
+SCHEDULE_VERSION_DDL = [
+    _schedule_trigger('INSERT', ('NEW',)),
+    _schedule_trigger('UPDATE', ('OLD', 'NEW')),
+    _schedule_trigger('DELETE', ('OLD',)),
+]
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_version_triggers(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        for statement in TABLE_VERSION_DDL + SCHEDULE_VERSION_DDL:
+            connection.execute(text(statement))
@@ -0,0 +1,12 @@
+from decimal import Decimal
+from app import db
+
+class DailyStats(db.Model):
+    __tablename__ = 'daily_stats'
+    
+    # Appointment figures are keyed by data_hora's day, patients by created_at's day
+    day = db.Column(db.Date, primary_key=True)
+    appointment_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=Decimal('0.00'))
+    procedure_count = db.Column(db.Integer, nullable=False, default=0)
+    patient_count = db.Column(db.Integer, nullable=False, default=0)
@@ -4,6 +4,9 @@ from app import db
 
 class Patient(db.Model):
     __tablename__ = 'patients'
+    __table_args__ = (
+        db.Index('ix_patients_created_at_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     cpf = db.Column(db.String(11), unique=True, nullable=False)
@@ -36,6 +39,9 @@ class Patient(db.Model):
 
 class Responsible(db.Model):
     __tablename__ = 'responsibles'
+    __table_args__ = (
+        db.Index('ix_responsibles_patient_id', 'patient_id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     patient_id = db.Column(db.String(36), db.ForeignKey('patients.id'), nullable=False)
@@ -0,0 +1,95 @@
+import re
+from sqlalchemy import event, text
+from app.models.patient import Patient
+
+# FTS5 index over the fields the front desk searches by. It keeps its own copy
+# of the text (phone reduced to digits) keyed by patients.rowid, and the
+# triggers below keep it in sync with every write, including Core bulk inserts.
+# VACUUM may renumber patients.rowid: run rebuild_patient_search.py after it.
+PATIENT_SEARCH_TABLE = 'patients_fts'
+
+def _indexed_values(alias):
+    """Column values stored in the index; the phone is stripped of punctuation"""
+    telefone = f"{alias}.telefone"
+    for char in ('(', ')', '-', ' ', '+', '.'):
+        telefone = f"replace({telefone}, '{char}', '')"
+    return f"{alias}.id, {alias}.nome, {alias}.cpf, {alias}.email, {telefone}"
+
+PATIENT_SEARCH_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {PATIENT_SEARCH_TABLE} USING fts5(
+        patient_id UNINDEXED, nome, cpf, email, telefone,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3 4'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS patients_fts_insert AFTER INSERT ON patients BEGIN
+        INSERT INTO {PATIENT_SEARCH_TABLE} (rowid, patient_id, nome, cpf, email, telefone)
+        VALUES (new.rowid, {_indexed_values('new')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS patients_fts_update
+        AFTER UPDATE OF id, nome, cpf, email, telefone ON patients BEGIN
+        DELETE FROM {PATIENT_SEARCH_TABLE} WHERE rowid = old.rowid;
+        INSERT INTO {PATIENT_SEARCH_TABLE} (rowid, patient_id, nome, cpf, email, telefone)
+        VALUES (new.rowid, {_indexed_values('new')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS patients_fts_delete AFTER DELETE ON patients BEGIN
+        DELETE FROM {PATIENT_SEARCH_TABLE} WHERE rowid = old.rowid;
+    END""",
+]
+
+PATIENT_SEARCH_DROP = [
+    "DROP TRIGGER IF EXISTS patients_fts_delete",
+    "DROP TRIGGER IF EXISTS patients_fts_update",
+    "DROP TRIGGER IF EXISTS patients_fts_insert",
+    f"DROP TABLE IF EXISTS {PATIENT_SEARCH_TABLE}",
+]
+
+PATIENT_SEARCH_REBUILD = [
+    f"DELETE FROM {PATIENT_SEARCH_TABLE}",
+    f"""INSERT INTO {PATIENT_SEARCH_TABLE} (rowid, patient_id, nome, cpf, email, telefone)
+        SELECT p.rowid, {_indexed_values('p')} FROM patients p""",
+    f"INSERT INTO {PATIENT_SEARCH_TABLE} ({PATIENT_SEARCH_TABLE}) VALUES ('optimize')",
+]
+
+# Punctuation people type inside CPFs and phone numbers
+NUMBER_PUNCTUATION = re.compile(r'[\s.\-()/+]')
+SEARCH_TOKEN = re.compile(r'\w+')
+
+def build_match_expression(term):
+    """Turn free text into an FTS5 query: every word must match as a prefix
+
+    A term made only of digits and punctuation ("123.456.789-0", "(11) 9999")
+    is searched as one number so CPF and phone prefixes match as typed.
+    Returns None when the term has nothing searchable.
+    """
+    term = (term or '').strip()
+    compact = NUMBER_PUNCTUATION.sub('', term)
+    if compact.isdigit():
+        tokens = [compact]
+    else:
+        tokens = SEARCH_TOKEN.findall(term)
+    if not tokens:
+        return None
+    # Quoted so FTS5 operators typed by the user (AND, NEAR, *, :) stay literal
+    return ' '.join('"{}"*'.format(token.replace('"', '')) for token in tokens)
+
+def create_patient_search(connection):
+    for statement in PATIENT_SEARCH_DDL:
+        connection.execute(text(statement))
+
+def drop_patient_search(connection):
+    for statement in PATIENT_SEARCH_DROP:
+        connection.execute(text(statement))
+
+def rebuild_patient_search(connection):
+    for statement in PATIENT_SEARCH_REBUILD:
+        connection.execute(text(statement))
+
+@event.listens_for(Patient.__table__, 'after_create')
+def _create_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        create_patient_search(connection)
+
+@event.listens_for(Patient.__table__, 'before_drop')
+def _drop_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        drop_patient_search(connection)
@@ -4,7 +4,7 @@ ma = Marshmallow()
 
 from .user_schema import UserSchema, UserCreateSchema, UserUpdateSchema
 from .patient_schema import PatientSchema, PatientCreateSchema, PatientUpdateSchema, ResponsibleSchema
-from .appointment_schema import AppointmentSchema, AppointmentCreateSchema
+from .appointment_schema import AppointmentSchema, AppointmentCreateSchema, AppointmentBatchSchema
 from .procedure_schema import ProcedureSchema, ProcedureCreateSchema, ProcedureUpdateSchema
 from .audit_schema import AuditLogSchema
 
@@ -19,6 +19,7 @@ __all__ = [
     'ResponsibleSchema',
     'AppointmentSchema',
     'AppointmentCreateSchema',
+    'AppointmentBatchSchema',
     'ProcedureSchema',
     'ProcedureCreateSchema',
     'ProcedureUpdateSchema',
@@ -1,15 +1,19 @@
-from marshmallow import Schema, fields, validate
+from marshmallow import Schema, ValidationError, fields, validate, validates_schema
+from .compiled import CompiledSchema
 from .patient_schema import PatientSchema
 from .procedure_schema import ProcedureSchema
+from app.models.appointment import (DEFAULT_DURATION_MINUTES, MIN_DURATION_MINUTES, MAX_DURATION_MINUTES,
+                                    MAX_BATCH_APPOINTMENTS)
 
-class AppointmentSchema(Schema):
+class AppointmentSchema(CompiledSchema):
     """Schema for Appointment serialization"""
     id = fields.String(dump_only=True)
     data_hora = fields.DateTime(required=True)
+    duracao_minutos = fields.Integer()
     patient_id = fields.String(required=True)
     patient = fields.Nested(PatientSchema, dump_only=True, allow_none=True)
     user_id = fields.String(required=True)
-    user_nome = fields.String(dump_only=True)
+    user_nome = fields.String(attribute='user.nome', dump_only=True)
     tipo = fields.String(required=True, validate=validate.OneOf(['plano', 'particular']))
     numero_carteira = fields.String(allow_none=True)
     valor_total = fields.Decimal(required=True, as_string=False, places=2)
@@ -20,8 +24,49 @@ class AppointmentSchema(Schema):
 class AppointmentCreateSchema(Schema):
     """Schema for creating a new appointment"""
     data_hora = fields.DateTime(required=True)
+    duracao_minutos = fields.Integer(load_default=DEFAULT_DURATION_MINUTES,
+                                     validate=validate.Range(min=MIN_DURATION_MINUTES, max=MAX_DURATION_MINUTES))
     patient_id = fields.String(required=True)
     user_id = fields.String(required=True)
     tipo = fields.String(required=True, validate=validate.OneOf(['plano', 'particular']))
     numero_carteira = fields.String(allow_none=True)
     procedure_ids = fields.List(fields.String(), required=True, validate=validate.Length(min=1))
+
+class AppointmentRecurrenceSchema(Schema):
+    """Repetition of a batch's data_hora: `count` sessions, one every `interval` days or weeks"""
+    frequency = fields.String(load_default='weekly', validate=validate.OneOf(['daily', 'weekly']))
+    interval = fields.Integer(load_default=1, validate=validate.Range(min=1, max=52))
+    count = fields.Integer(required=True, validate=validate.Range(min=1, max=MAX_BATCH_APPOINTMENTS))
+
+class AppointmentBatchItemSchema(Schema):
+    """One appointment of a batch; fields left out are taken from the batch"""
+    data_hora = fields.DateTime(required=True)
+    duracao_minutos = fields.Integer(validate=validate.Range(min=MIN_DURATION_MINUTES, max=MAX_DURATION_MINUTES))
+    patient_id = fields.String()
+    tipo = fields.String(validate=validate.OneOf(['plano', 'particular']))
+    numero_carteira = fields.String(allow_none=True)
+    procedure_ids = fields.List(fields.String(), validate=validate.Length(min=1))
+
+class AppointmentBatchSchema(Schema):
+    """Schema for creating several appointments: a list of items or a recurring series
+
+    No user_id: a batch always belongs to the authenticated user, so the
+    field is rejected as unknown rather than silently ignored.
+    """
+    data_hora = fields.DateTime()
+    duracao_minutos = fields.Integer(load_default=DEFAULT_DURATION_MINUTES,
+                                     validate=validate.Range(min=MIN_DURATION_MINUTES, max=MAX_DURATION_MINUTES))
+    patient_id = fields.String()
+    tipo = fields.String(validate=validate.OneOf(['plano', 'particular']))
+    numero_carteira = fields.String(allow_none=True)
+    procedure_ids = fields.List(fields.String(), validate=validate.Length(min=1))
+    items = fields.List(fields.Nested(AppointmentBatchItemSchema),
+                        validate=validate.Length(min=1, max=MAX_BATCH_APPOINTMENTS))
+    recurrence = fields.Nested(AppointmentRecurrenceSchema)
+
+    @validates_schema
+    def validate_source(self, data, **kwargs):
+        if ('items' in data) == ('recurrence' in data):
+            raise ValidationError("Informe items ou recurrence (apenas um dos dois)")
+        if 'recurrence' in data and 'data_hora' not in data:
+            raise ValidationError("data_hora é obrigatório com recurrence", 'data_hora')
@@ -1,15 +1,20 @@
-from marshmallow import Schema, fields
+from marshmallow import fields
+from .compiled import CompiledSchema
+from app.models.audit_log import AuditLog
 
-class AuditLogSchema(Schema):
+class AuditLogSchema(CompiledSchema):
     """Schema for AuditLog serialization"""
     id = fields.String(dump_only=True)
     user_id = fields.String(allow_none=True)
-    user_nome = fields.String(dump_only=True)
+    user_nome = fields.String(attribute='user.nome', dump_only=True)
     action = fields.String(required=True)
     table_name = fields.String(allow_none=True)
     record_id = fields.String(allow_none=True)
-    old_values = fields.String(allow_none=True)
-    new_values = fields.String(allow_none=True)
+    # Full snapshots rebuilt from whichever format the row was stored in
+    old_values = fields.String(attribute='old_snapshot', allow_none=True,
+                               metadata={'columns': AuditLog.SNAPSHOT_COLUMNS})
+    new_values = fields.String(attribute='new_snapshot', allow_none=True,
+                               metadata={'columns': AuditLog.SNAPSHOT_COLUMNS})
     ip_address = fields.String(allow_none=True)
     details = fields.String(allow_none=True)
     created_at = fields.DateTime(dump_only=True)
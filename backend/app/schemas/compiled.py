@@ -0,0 +1,126 @@
+from marshmallow import Schema, fields, missing
+from marshmallow.decorators import PRE_DUMP, POST_DUMP
+from marshmallow.utils import ensure_text_type, get_value
+
+# Field classes (exact types) whose _serialize the generator inlines; other fields
+# call their own _serialize, or field.serialize if they customize value access
+_TEXT_FIELDS = (fields.String, fields.Email)
+_TEMPORAL_FIELDS = (fields.DateTime, fields.Date)
+
+def compile_serializer(schema):
+    """Generate a function dumping one object exactly like schema.dump(obj, many=False)
+
+    Returns None when the schema cannot be compiled (pre/post dump hooks or
+    a custom get_attribute); callers then use marshmallow as usual. Objects
+    with __getitem__ (dicts, tuples) are handed back to marshmallow, whose
+    accessor tries item access first.
+    """
+    if (schema._has_processors(PRE_DUMP) or schema._has_processors(POST_DUMP)
+            or type(schema).get_attribute is not Schema.get_attribute):
+        return None
+
+    namespace = {
+        'MISSING': missing,
+        'ensure_text_type': ensure_text_type,
+        'get_value': get_value,
+        'fallback': lambda obj: Schema.dump(schema, obj, many=False),
+        'get_attribute': schema.get_attribute,
+    }
+    lines = [
+        'def dump(obj):',
+        "    if hasattr(obj, '__getitem__'):",
+        '        return fallback(obj)',
+        '    out = {}',
+    ]
+    for index, (name, field) in enumerate(schema.dump_fields.items()):
+        key = field.data_key if field.data_key is not None else name
+        lines.extend('    ' + line for line in _field_lines(index, name, key, field, namespace))
+    lines.append('    return out')
+
+    exec('\n'.join(lines), namespace)
+    return namespace['dump']
+
+def _field_lines(index, name, key, field, namespace):
+    """Source lines serializing one field into `out`"""
+    field_ref = f'FIELD_{index}'
+    namespace[field_ref] = field
+
+    if not _is_plain(field):
+        return [
+            f'value = {field_ref}.serialize({name!r}, obj, accessor=get_attribute)',
+            'if value is not MISSING:',
+            f'    out[{key!r}] = value',
+        ]
+
+    attribute = field.attribute if field.attribute is not None else name
+    if '.' in attribute:
+        read = f'value = get_value(obj, {attribute!r}, MISSING)'
+    else:
+        read = f'value = getattr(obj, {attribute!r}, MISSING)'
+
+    return [read, 'if value is not MISSING:', f'    out[{key!r}] = {_value_expr(index, name, field, namespace)}']
+
+def _is_plain(field):
+    """Field whose serialization can be inlined (standard accessor, no dump_default)"""
+    cls = type(field)
+    return (
+        field._CHECK_ATTRIBUTE
+        and field.dump_default is missing
+        and cls.serialize is fields.Field.serialize
+        and cls.get_value is fields.Field.get_value
+    )
+
+def _value_expr(index, name, field, namespace):
+    """Expression turning `value` (not missing) into its dumped form"""
+    cls = type(field)
+
+    if cls in _TEXT_FIELDS:
+        return 'value if value is None or value.__class__ is str else ensure_text_type(value)'
+
+    if cls in _TEMPORAL_FIELDS:
+        format_func = field.SERIALIZATION_FUNCS.get(field.format or field.DEFAULT_FORMAT)
+        if format_func is not None:
+            namespace[f'FORMAT_{index}'] = format_func
+            return f'None if value is None else FORMAT_{index}(value)'
+
+    if cls is fields.Nested:
+        nested = f'NESTED_{index}'
+        namespace[nested] = _nested_dump(field.schema)
+        if field.schema.many or field.many:
+            return f'None if value is None else [{nested}(item) for item in value]'
+        return f'None if value is None else {nested}(value)'
+
+    if cls is fields.List and type(field.inner) is fields.Nested and not (
+            field.inner.schema.many or field.inner.many):
+        nested = f'NESTED_{index}'
+        namespace[nested] = _nested_dump(field.inner.schema)
+        return f'None if value is None else [None if item is None else {nested}(item) for item in value]'
+
+    # Decimal, Integer, Boolean, ...: the field's own formatting, minus the dispatch
+    namespace[f'SERIALIZE_{index}'] = field._serialize
+    return f'SERIALIZE_{index}(value, {name!r}, obj)'
+
+def _nested_dump(schema):
+    """Single-object dump for a nested schema, compiled when possible"""
+    compiled = getattr(schema, '_compiled_dump', None) or compile_serializer(schema)
+    if compiled is not None:
+        return compiled
+    return lambda obj: schema.dump(obj, many=False)
+
+class CompiledSchema(Schema):
+    """Schema whose dump() runs a serializer generated for its fields when instantiated
+
+    Output is identical to marshmallow's; check_serializers.py compares both.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._compiled_dump = compile_serializer(self)
+
+    def dump(self, obj, *, many=None):
+        if self._compiled_dump is None:
+            return super().dump(obj, many=many)
+        many = self.many if many is None else bool(many)
+        if many and obj is not None:
+            return [self._compiled_dump(item) for item in obj]
+        return self._compiled_dump(obj)
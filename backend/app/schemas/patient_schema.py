@@ -1,4 +1,5 @@
 from marshmallow import Schema, fields, validate
+from .compiled import CompiledSchema
 
 class ResponsibleSchema(Schema):
     """Schema for Responsible serialization"""
@@ -20,7 +21,7 @@ class AddressSchema(Schema):
     rua = fields.String(required=True, validate=validate.Length(min=1, max=200))
     numero = fields.String(required=True, validate=validate.Length(min=1, max=10))
 
-class PatientSchema(Schema):
+class PatientSchema(CompiledSchema):
     """Schema for Patient serialization"""
     id = fields.String(dump_only=True)
     cpf = fields.String(required=True, validate=validate.Length(equal=11))
@@ -0,0 +1,226 @@
+from datetime import date, datetime, time, timedelta
+from flask import g, has_request_context
+from sqlalchemy import case, func, select
+from app import db
+from app.models.appointment import Appointment, AppointmentProcedure
+from app.models.cache_version import CacheVersion
+from app.models.procedure import Procedure
+from app.models.user import User
+from app.services.procedure_catalog import get_procedure_catalog
+from app.utils.cache import TTLCache
+
+GRANULARITIES = ('day', 'week', 'month')
+GROUPINGS = ('tipo', 'user', 'procedure')
+
+# Tables the analytics read; their cache_versions rows are part of every cache key
+ANALYTICS_TABLES = ('appointments', 'appointment_procedures', 'procedures', 'users')
+
+# Longest range one request may cover
+MAX_RANGE_DAYS = 5 * 366
+
+# Grouped results per parameters and data version (configured in create_app)
+analytics_cache = TTLCache(maxsize=256, ttl=30)
+
+def period_start(day, granularity):
+    """First day of the day/week (Monday)/month containing `day`"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def next_period(day, granularity):
+    if granularity == 'week':
+        return day + timedelta(days=7)
+    if granularity == 'month':
+        return (day + timedelta(days=32)).replace(day=1)
+    return day + timedelta(days=1)
+
+def periods(first, last, granularity):
+    """Start of every period from the one containing `first` to the one containing `last`"""
+    day = period_start(first, granularity)
+    starts = []
+    while day <= last:
+        starts.append(day)
+        day = next_period(day, granularity)
+    return starts
+
+def _bucket(column, granularity):
+    """SQLite expression giving the start of the period of a datetime column, as 'YYYY-MM-DD'
+
+    Only used in SELECT/GROUP BY: rows are selected with a plain range on
+    the column, so the data_hora index is still used.
+    """
+    if granularity == 'week':
+        # Next Sunday (or the day itself), then back to that week's Monday
+        return func.date(column, 'weekday 0', '-6 days')
+    if granularity == 'month':
+        return func.strftime('%Y-%m-01', column)
+    return func.date(column)
+
+def _in_range(first, end):
+    return (Appointment.data_hora >= datetime.combine(first, time.min),
+            Appointment.data_hora < datetime.combine(end, time.min))
+
+def _procedure_shares(first, end):
+    """One row per (appointment, procedure) in the range with the procedure's share of valor_total
+
+    valor_total is split in proportion to the procedures' current list
+    prices for the appointment's tipo (evenly if they are all zero), so the
+    shares of an appointment add up to what it was charged. The windows
+    partition by (data_hora, id), the order of the range index, so SQLite
+    walks that index instead of every appointment_procedures row.
+    """
+    appointment_key = (Appointment.data_hora, Appointment.id)
+    price = case((Appointment.tipo == 'plano', Procedure.valor_plano), else_=Procedure.valor_particular)
+    links = select(
+        Appointment.id.label('appointment_id'),
+        Appointment.data_hora,
+        Appointment.tipo,
+        Appointment.patient_id,
+        Appointment.valor_total,
+        AppointmentProcedure.procedure_id,
+        price.label('price'),
+        func.sum(price).over(partition_by=appointment_key).label('appointment_price'),
+        func.count().over(partition_by=appointment_key).label('procedure_count'),
+    ).join(AppointmentProcedure, AppointmentProcedure.appointment_id == Appointment.id)\
+        .join(Procedure, Procedure.id == AppointmentProcedure.procedure_id)\
+        .where(*_in_range(first, end))\
+        .subquery()
+    share = case(
+        (links.c.appointment_price > 0, links.c.valor_total * links.c.price / links.c.appointment_price),
+        else_=links.c.valor_total * 1.0 / links.c.procedure_count
+    )
+    return links, share
+
+def _money(value):
+    return round(float(value or 0), 2)
+
+def _cached(key, compute):
+    """compute() once per key and data version, kept for ANALYTICS_CACHE_TTL seconds
+
+    Reuses the versions @conditional already read for this request.
+    """
+    versions = g.get('cache_versions') if has_request_context() else None
+    if versions is None or any(table not in versions for table in ANALYTICS_TABLES):
+        versions = CacheVersion.snapshot(ANALYTICS_TABLES)
+    key = (key, tuple(versions[table][0] for table in ANALYTICS_TABLES))
+    result = analytics_cache.get(key)
+    if result is None:
+        result = compute()
+        analytics_cache.set(key, result)
+    return result
+
+class AnalyticsService:
+    @staticmethod
+    def revenue(first, last, granularity='month', by=None):
+        """Revenue and appointment count per period, optionally split by tipo, user or procedure
+
+        One grouped query over the appointments between `first` and `last`
+        (inclusive, widened to whole periods). Without `by` every period is
+        listed, with zeros where there were no appointments; with it only
+        the groups that had some. By procedure, `appointments` counts the
+        appointments that included it.
+        """
+        first = period_start(first, granularity)
+        end = next_period(period_start(last, granularity), granularity)
+        return _cached(('revenue', first, end, granularity, by),
+                       lambda: AnalyticsService._revenue(first, end, granularity, by))
+
+    @staticmethod
+    def _revenue(first, end, granularity, by):
+        if by == 'procedure':
+            links, share = _procedure_shares(first, end)
+            bucket = _bucket(links.c.data_hora, granularity).label('period')
+            rows = db.session.execute(
+                select(bucket, links.c.procedure_id, func.sum(share), func.count())
+                .group_by(bucket, links.c.procedure_id)
+            ).all()
+            catalog = get_procedure_catalog()
+            items = []
+            for period, procedure_id, revenue, appointments in rows:
+                entry = catalog.get(procedure_id)
+                items.append({'period': period, 'procedure_id': procedure_id,
+                              'procedure_nome': entry.nome if entry else None,
+                              'revenue': _money(revenue), 'appointments': appointments})
+        else:
+            bucket = _bucket(Appointment.data_hora, granularity).label('period')
+            keys = {None: (), 'tipo': (Appointment.tipo,), 'user': (Appointment.user_id, User.nome)}[by]
+            query = select(bucket, *keys, func.sum(Appointment.valor_total), func.count())\
+                .where(*_in_range(first, end))\
+                .group_by(bucket, *keys[:1])
+            if by == 'user':
+                query = query.join(User, User.id == Appointment.user_id)
+            rows = db.session.execute(query).all()
+
+            names = {None: (), 'tipo': ('tipo',), 'user': ('user_id', 'user_nome')}[by]
+            items = [{'period': row[0], **dict(zip(names, row[1:-2])),
+                      'revenue': _money(row[-2]), 'appointments': row[-1]} for row in rows]
+            if by is None:
+                found = {item['period']: item for item in items}
+                items = [found.get(day.isoformat(), {'period': day.isoformat(), 'revenue': 0.0, 'appointments': 0})
+                         for day in periods(first, end - timedelta(days=1), granularity)]
+
+        items.sort(key=lambda item: (item['period'], -item['revenue']))
+        return {
+            'granularity': granularity,
+            'by': by,
+            'start_date': first.isoformat(),
+            'end_date': (end - timedelta(days=1)).isoformat(),
+            'items': items
+        }
+
+    @staticmethod
+    def procedure_usage(first, last):
+        """Per procedure: appointments including it (by tipo), distinct patients and revenue share
+
+        One grouped query; procedures not used in the range are listed with
+        zeros. Sorted by appointments, most used first.
+        """
+        end = last + timedelta(days=1)
+        return _cached(('procedure_usage', first, end),
+                       lambda: AnalyticsService._procedure_usage(first, end))
+
+    @staticmethod
+    def _procedure_usage(first, end):
+        links, share = _procedure_shares(first, end)
+        rows = db.session.execute(
+            select(links.c.procedure_id, func.count(),
+                   func.sum(case((links.c.tipo == 'plano', 1), else_=0)),
+                   func.count(links.c.patient_id.distinct()),
+                   func.sum(share))
+            .group_by(links.c.procedure_id)
+        ).all()
+        usage = {row[0]: row[1:] for row in rows}
+
+        items = []
+        for entry in get_procedure_catalog().entries:
+            appointments, plano, patients, revenue = usage.pop(entry.id, (0, 0, 0, 0))
+            items.append({
+                'procedure_id': entry.id,
+                'nome': entry.nome,
+                'appointments': appointments,
+                'plano': plano,
+                'particular': appointments - plano,
+                'patients': patients,
+                'revenue': _money(revenue)
+            })
+        items.sort(key=lambda item: -item['appointments'])
+        return {
+            'start_date': first.isoformat(),
+            'end_date': (end - timedelta(days=1)).isoformat(),
+            'items': items
+        }
+
+    @staticmethod
+    def default_range(granularity, today=None):
+        """(first, last) day when the request gives none: the last 30 days, 12 weeks or 12 months"""
+        last = today or date.today()
+        if granularity == 'week':
+            return period_start(last, 'week') - timedelta(weeks=11), last
+        if granularity == 'month':
+            first = period_start(last, 'month')
+            for _ in range(11):
+                first = period_start(first - timedelta(days=1), 'month')
+            return first, last
+        return last - timedelta(days=29), last
@@ -1,10 +1,22 @@
-from datetime import datetime
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
 from decimal import Decimal
+from sqlalchemy import insert
 from app import db
-from app.models.appointment import Appointment, AppointmentProcedure
+from app.models.appointment import (Appointment, AppointmentProcedure, DEFAULT_DURATION_MINUTES,
+                                    MIN_DURATION_MINUTES, MAX_DURATION_MINUTES)
 from app.models.patient import Patient
-from app.models.procedure import Procedure
 from app.services.audit_service import AuditService
+from app.services.availability import (find_conflicts, interval_days, load_schedules, schedule_keys,
+                                       schedule_written)
+from app.services.daily_stats_service import DailyStatsService
+from app.services.procedure_catalog import ProcedureCatalog, get_procedure_catalog, attach_procedures
+
+CONFLICT_ERROR = "O profissional já possui atendimento neste horário"
+
+# Fields of a batch that act as defaults for its items
+BATCH_FIELDS = ('duracao_minutos', 'patient_id', 'tipo', 'numero_carteira', 'procedure_ids')
 
 class AppointmentService:
     @staticmethod
@@ -15,33 +27,29 @@ class AppointmentService:
         if not patient:
             return None, "Paciente não encontrado"
         
-        # Validate procedures exist
-        procedure_ids = data.get('procedures', [])
-        if not procedure_ids:
-            return None, "Pelo menos um procedimento é obrigatório"
-        
-        procedures = Procedure.query.filter(Procedure.id.in_(procedure_ids)).all()
-        if len(procedures) != len(procedure_ids):
-            return None, "Um ou mais procedimentos não encontrados"
+        # Validate procedures exist (against the in-memory catalog)
+        entries, error = get_procedure_catalog().resolve(data.get('procedure_ids', data.get('procedures', [])))
+        if error:
+            return None, error
         
         # Validate appointment type and carteira
         if data['tipo'] == 'plano' and not data.get('numero_carteira'):
             return None, "Número da carteira é obrigatório para tipo 'plano'"
         
         # Calculate total value
-        if data['tipo'] == 'plano':
-            total_value = sum(proc.valor_plano for proc in procedures)
-        else:
-            total_value = sum(proc.valor_particular for proc in procedures)
+        total_value = ProcedureCatalog.total(entries, data['tipo'])
         
         try:
-            # Parse date
-            data_hora = datetime.fromisoformat(data['data_hora'])
+            # Parse date (already a datetime when loaded through the schema)
+            data_hora = data['data_hora']
+            if not isinstance(data_hora, datetime):
+                data_hora = datetime.fromisoformat(data_hora)
         except ValueError:
             return None, "Formato de data/hora inválido (use ISO format)"
         
         appointment = Appointment(
             data_hora=data_hora,
+            duracao_minutos=data.get('duracao_minutos', DEFAULT_DURATION_MINUTES),
             patient_id=data['patient_id'],
             user_id=user_id,
             tipo=data['tipo'],
@@ -50,14 +58,20 @@ class AppointmentService:
         )
         
         try:
+            # Set before the flush so the empty collection is never loaded
+            appointment.procedures = attach_procedures(entries)
             db.session.add(appointment)
             db.session.flush()  # Get appointment ID
             
-            # Add procedures
-            for procedure in procedures:
-                appointment.procedures.append(procedure)
+            # Checked after the flush: the transaction already holds the write lock
+            if find_conflicts(appointment):
+                db.session.rollback()
+                return None, CONFLICT_ERROR
             
+            keys = schedule_keys(appointment.user_id, data_hora, appointment.duracao_minutos)
+            DailyStatsService.record_appointment(appointment)
             db.session.commit()
+            schedule_written(keys)
             
             # Audit Log
             AuditService.log_action(
@@ -74,6 +88,154 @@ class AppointmentService:
             db.session.rollback()
             return None, "Erro ao criar atendimento"
     
+    @staticmethod
+    def batch_items(data):
+        """Appointments described by a loaded AppointmentBatchSchema, the batch's fields filled in"""
+        defaults = {field: data[field] for field in BATCH_FIELDS if field in data}
+        if 'recurrence' in data:
+            recurrence = data['recurrence']
+            unit = timedelta(days=1) if recurrence['frequency'] == 'daily' else timedelta(weeks=1)
+            step = unit * recurrence['interval']
+            return [{**defaults, 'data_hora': data['data_hora'] + step * i} for i in range(recurrence['count'])]
+        return [{**defaults, **item} for item in data['items']]
+    
+    @staticmethod
+    def create_appointments(data, user_id):
+        """Create a batch of appointments (items or a recurring series) in one transaction
+        
+        Patients are checked with one query and each set of procedures against
+        the catalog once; appointments and their procedure links go in with
+        bulk inserts, then one read of the professional's schedule over the
+        touched days finds conflicts, with existing appointments and within
+        the batch. All or nothing: returns (ids, errors), errors being
+        [{'index', 'data_hora', 'error'}] for the items that failed.
+        """
+        items = AppointmentService.batch_items(data)
+        errors = []
+        
+        def fail(index, item, error):
+            errors.append({'index': index, 'data_hora': item['data_hora'].isoformat(), 'error': error})
+        
+        patient_ids = {item['patient_id'] for item in items if item.get('patient_id')}
+        patients = dict(db.session.query(Patient.id, Patient.nome).filter(Patient.id.in_(patient_ids))) \
+            if patient_ids else {}
+        catalog = get_procedure_catalog()
+        resolved = {}
+        now = datetime.utcnow()
+        
+        rows = []
+        for index, item in enumerate(items):
+            missing = [field for field in ('patient_id', 'tipo', 'procedure_ids') if not item.get(field)]
+            if missing:
+                fail(index, item, f"Campos obrigatórios: {', '.join(missing)}")
+                continue
+            if item['patient_id'] not in patients:
+                fail(index, item, "Paciente não encontrado")
+                continue
+            
+            procedure_ids = tuple(item['procedure_ids'])
+            if procedure_ids not in resolved:
+                resolved[procedure_ids] = catalog.resolve(list(procedure_ids))
+            entries, error = resolved[procedure_ids]
+            if error:
+                fail(index, item, error)
+                continue
+            
+            if item['tipo'] == 'plano' and not item.get('numero_carteira'):
+                fail(index, item, "Número da carteira é obrigatório para tipo 'plano'")
+                continue
+            
+            rows.append(({
+                'id': str(uuid.uuid4()),
+                'data_hora': item['data_hora'],
+                'duracao_minutos': item.get('duracao_minutos', DEFAULT_DURATION_MINUTES),
+                'patient_id': item['patient_id'],
+                'user_id': user_id,
+                'tipo': item['tipo'],
+                'numero_carteira': item.get('numero_carteira'),
+                'valor_total': ProcedureCatalog.total(entries, item['tipo']),
+                'created_at': now,
+                'updated_at': now
+            }, entries))
+        
+        if errors:
+            return None, errors
+        
+        keys = [key for row, _ in rows
+                for key in schedule_keys(user_id, row['data_hora'], row['duracao_minutos'])]
+        stats = defaultdict(lambda: {'appointments': 0, 'revenue': Decimal('0.00'), 'procedures': 0})
+        for row, entries in rows:
+            day = stats[row['data_hora'].date()]
+            day['appointments'] += 1
+            day['revenue'] += row['valor_total']
+            day['procedures'] += len(entries)
+        
+        try:
+            db.session.execute(insert(Appointment), [row for row, _ in rows])
+            db.session.execute(insert(AppointmentProcedure), [
+                {'appointment_id': row['id'], 'procedure_id': entry.id} for row, entries in rows for entry in entries
+            ])
+            
+            # Checked after the inserts: the transaction already holds the write lock
+            errors = AppointmentService._batch_conflicts(items, rows, user_id)
+            if errors:
+                db.session.rollback()
+                return None, errors
+            
+            DailyStatsService.apply_many([{'day': day, **deltas} for day, deltas in stats.items()])
+            db.session.commit()
+            schedule_written(keys)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error creating appointments: {e}")
+            return None, [{'index': None, 'data_hora': None, 'error': "Erro ao criar atendimentos"}]
+        
+        # Audit Log (one batch)
+        AuditService.log_actions([{
+            'user_id': user_id,
+            'action': 'CREATE',
+            'table_name': 'appointments',
+            'record_id': row['id'],
+            'new_values': {
+                'id': row['id'],
+                'data_hora': row['data_hora'].isoformat(),
+                'duracao_minutos': row['duracao_minutos'],
+                'patient_id': row['patient_id'],
+                'user_id': row['user_id'],
+                'tipo': row['tipo'],
+                'numero_carteira': row['numero_carteira'],
+                'valor_total': str(row['valor_total']),
+                'procedures': [entry.id for entry in entries]
+            },
+            'details': f"Atendimento criado para paciente {patients[row['patient_id']]}"
+        } for row, entries in rows])
+        
+        return [row['id'] for row, _ in rows], None
+    
+    @staticmethod
+    def _batch_conflicts(items, rows, user_id):
+        """Per-item errors for batch rows (already inserted) overlapping other appointments"""
+        batch = {row['id']: index for index, (row, _) in enumerate(rows)}
+        intervals = [(row['id'], row['data_hora'], row['data_hora'] + timedelta(minutes=row['duracao_minutos']))
+                     for row, _ in rows]
+        days = sorted({day for _, start, end in intervals for day in interval_days(start, end)})
+        schedules = load_schedules([user_id], days)
+        
+        errors = []
+        for index, (appointment_id, start, end) in enumerate(intervals):
+            for day in interval_days(start, end):
+                conflicts = schedules[(user_id, day)].conflicts(start, end, exclude=appointment_id)
+                if conflicts:
+                    siblings = [batch[other] for other in conflicts if other in batch]
+                    errors.append({
+                        'index': index,
+                        'data_hora': items[index]['data_hora'].isoformat(),
+                        'error': CONFLICT_ERROR if len(siblings) < len(conflicts)
+                        else f"Conflita com o item {siblings[0]} do lote"
+                    })
+                    break
+        return errors
+    
     @staticmethod
     def update_appointment(appointment_id, data, current_user):
         """Update appointment (only creator or admin)"""
@@ -86,6 +248,8 @@ class AppointmentService:
             return None, "Sem permissão para alterar este atendimento"
         
         old_values = appointment.to_dict()
+        old_stats = (appointment.data_hora, appointment.valor_total, len(appointment.procedures))
+        old_keys = schedule_keys(appointment.user_id, appointment.data_hora, appointment.duracao_minutos)
         
         # Update data_hora
         if 'data_hora' in data:
@@ -94,6 +258,17 @@ class AppointmentService:
             except ValueError:
                 return None, "Formato de data/hora inválido"
         
+        # Update duration
+        if 'duracao_minutos' in data:
+            duracao = data['duracao_minutos']
+            if not isinstance(duracao, int) or isinstance(duracao, bool) \
+                    or not MIN_DURATION_MINUTES <= duracao <= MAX_DURATION_MINUTES:
+                return None, f"Duração inválida (de {MIN_DURATION_MINUTES} a {MAX_DURATION_MINUTES} minutos)"
+            appointment.duracao_minutos = duracao
+        
+        # A new interval is checked for conflicts before the commit
+        rescheduled = (appointment.data_hora, appointment.duracao_minutos) != (old_stats[0], old_values['duracao_minutos'])
+        
         # Update tipo and carteira
         if 'tipo' in data:
             appointment.tipo = data['tipo']
@@ -107,24 +282,28 @@ class AppointmentService:
         
         # Update procedures if provided
         if 'procedures' in data:
-            procedure_ids = data['procedures']
-            if not procedure_ids:
-                return None, "Pelo menos um procedimento é obrigatório"
-            
-            procedures = Procedure.query.filter(Procedure.id.in_(procedure_ids)).all()
-            if len(procedures) != len(procedure_ids):
-                return None, "Um ou mais procedimentos não encontrados"
+            entries, error = get_procedure_catalog().resolve(data['procedures'])
+            if error:
+                return None, error
             
             # Update procedures and recalculate total
-            appointment.procedures = procedures
-            
-            if appointment.tipo == 'plano':
-                appointment.valor_total = sum(proc.valor_plano for proc in procedures)
-            else:
-                appointment.valor_total = sum(proc.valor_particular for proc in procedures)
+            appointment.procedures = attach_procedures(entries)
+            appointment.valor_total = ProcedureCatalog.total(entries, appointment.tipo)
         
         try:
+            if rescheduled:
+                db.session.flush()
+                if find_conflicts(appointment):
+                    db.session.rollback()
+                    return None, CONFLICT_ERROR
+            
+            # Move the appointment's contribution from its old day/values to the new ones
+            old_day, old_value, old_count = old_stats
+            DailyStatsService.apply(old_day, appointments=-1, revenue=-old_value, procedures=-old_count)
+            DailyStatsService.record_appointment(appointment)
+            new_keys = schedule_keys(appointment.user_id, appointment.data_hora, appointment.duracao_minutos)
             db.session.commit()
+            schedule_written(old_keys, new_keys)
             
             # Audit Log
             AuditService.log_action(
@@ -154,10 +333,13 @@ class AppointmentService:
             return False, "Sem permissão para remover este atendimento"
         
         old_values = appointment.to_dict()
+        old_keys = schedule_keys(appointment.user_id, appointment.data_hora, appointment.duracao_minutos)
         
         try:
+            DailyStatsService.record_appointment(appointment, sign=-1)
             db.session.delete(appointment)
             db.session.commit()
+            schedule_written(old_keys)
             
             # Audit Log
             AuditService.log_action(
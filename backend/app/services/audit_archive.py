@@ -0,0 +1,444 @@
+import math
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from heapq import merge
+from itertools import islice
+from flask import current_app, request
+from sqlalchemy import DDL, Column, Index, MetaData, Table, create_engine, func, insert, inspect, literal, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import load_only
+from sqlalchemy.schema import CreateColumn
+from app import db
+from app.models.audit_log import AuditLog, AuditArchiveRecord, AuditArchiveSegment
+from app.models.user import User
+from app.utils.pagination import _seek_condition, decode_cursor, encode_cursor
+
+# Name the segment file is attached under while a month is being archived
+SEGMENT_SCHEMA = 'segment'
+
+CURSOR_COLUMNS = (AuditLog.created_at, AuditLog.id)
+
+# Registry row of an archived month (row_count None: not known without opening the file)
+ArchivedMonth = namedtuple('ArchivedMonth', 'month path row_count first_at last_at archived_at records_indexed')
+
+def _segment_table():
+    """audit_logs as stored in a segment file: same columns and indexes, no foreign key"""
+    table = Table('audit_logs', MetaData(), *(
+        Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable,
+               server_default=column.server_default.arg if column.server_default is not None else None)
+        for column in AuditLog.__table__.columns
+    ))
+    for index in AuditLog.__table__.indexes:
+        Index(index.name, *(table.c[column.name] for column in index.columns))
+    return table
+
+segment_table = _segment_table()
+hot_table = AuditLog.__table__
+
+def _upgrade_segment(engine):
+    """Add the columns and indexes audit_logs gained since a segment file was created
+
+    Returns:
+        True if the file changed
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        present = {column['name'] for column in inspector.get_columns('audit_logs')}
+        indexes = {index['name'] for index in inspector.get_indexes('audit_logs')}
+        missing = [column for column in segment_table.columns if column.name not in present]
+        for column in missing:
+            connection.execute(DDL(f"ALTER TABLE audit_logs ADD COLUMN {CreateColumn(column).compile(engine)}"))
+        new_indexes = [index for index in segment_table.indexes if index.name not in indexes]
+        for index in new_indexes:
+            index.create(connection)
+    return bool(missing or new_indexes)
+
+def _record_bounds(table, month):
+    """audit_archive_records rows of one month: count and dates per record in a segment table"""
+    return select(
+        table.c.table_name, table.c.record_id, literal(month).label('month'),
+        func.count().label('row_count'),
+        func.min(table.c.created_at).label('first_at'), func.max(table.c.created_at).label('last_at')
+    ).where(table.c.table_name.isnot(None), table.c.record_id.isnot(None), table.c.created_at.isnot(None))\
+        .group_by(table.c.table_name, table.c.record_id)
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+def add_months(moment, months):
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+class AuditEntry:
+    """One audit row from the hot table or a segment, shaped for AuditLogSchema
+
+    Columns a segment file predates are None.
+    """
+
+    __slots__ = tuple(column.name for column in hot_table.columns) + ('user', '_snapshots')
+
+    def __init__(self, row, user):
+        for name in hot_table.columns.keys():
+            setattr(self, name, getattr(row, name, None))
+        self.user = user
+
+    snapshots = AuditLog.snapshots
+    old_snapshot = AuditLog.old_snapshot
+    new_snapshot = AuditLog.new_snapshot
+
+class AuditArchive:
+    """Archived audit months of one app: the segment registry and a read-only engine per file
+
+    The registry is small (one row per month) and only changes when the
+    archive script runs, so it is kept in memory and re-read at most every
+    AUDIT_ARCHIVE_CHECK_INTERVAL seconds. The script waits that long after
+    registering a month before deleting its rows from audit_logs, so no
+    worker misses them in between.
+    """
+
+    def __init__(self, directory, check_interval):
+        self.directory = directory
+        self.check_interval = check_interval
+        self.registry = None
+        self.checked_at = 0.0
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def path(self, segment):
+        return os.path.join(self.directory, segment.path)
+
+    def source(self, segment):
+        """(read-only engine, table) of a segment file
+
+        The table has the columns the file has: one archived before
+        audit_logs gained a column is read without it. Cached until the
+        month is archived into again (archived_at moves).
+        """
+        key = (segment.path, segment.archived_at)
+        with self._lock:
+            source = self._sources.get(key)
+            if source is None:
+                engine = create_engine(f'sqlite:///file:{self.path(segment)}?mode=ro&uri=true')
+                with engine.connect() as connection:
+                    present = {column['name'] for column in inspect(connection).get_columns('audit_logs')}
+                table = segment_table
+                if present != set(segment_table.columns.keys()):
+                    table = Table('audit_logs', MetaData(), *(column._copy() for column in segment_table.columns
+                                                              if column.name in present))
+                source = self._sources[key] = (engine, table)
+            return source
+
+    def segments(self, start=None, end=None):
+        """Archived months overlapping [start, end], newest first"""
+        registry = self.registry
+        if registry is None or time.monotonic() - self.checked_at >= self.check_interval:
+            with self._lock:
+                # Plain tuples: they outlive the session that read them
+                registry = self.registry = [ArchivedMonth(*row) for row in db.session.query(
+                    AuditArchiveSegment.month, AuditArchiveSegment.path, AuditArchiveSegment.row_count,
+                    AuditArchiveSegment.first_at, AuditArchiveSegment.last_at, AuditArchiveSegment.archived_at,
+                    AuditArchiveSegment.records_indexed
+                ).order_by(AuditArchiveSegment.last_at.desc())]
+                self.checked_at = time.monotonic()
+        return [segment for segment in registry
+                if (start is None or segment.last_at >= start) and (end is None or segment.first_at <= end)]
+
+    def record_segments(self, table_name, record_id):
+        """Archived months holding rows of one record, newest first, narrowed to that record
+
+        One lookup in audit_archive_records: months without the record are
+        left out, and the others carry the record's own row_count and dates,
+        so reads prune by them and counts open no file. Months archived
+        before that table existed keep the month's dates and no row_count.
+        """
+        segments = self.segments()
+        if not segments:
+            return []
+        records = {row.month: row for row in db.session.query(
+            AuditArchiveRecord.month, AuditArchiveRecord.row_count,
+            AuditArchiveRecord.first_at, AuditArchiveRecord.last_at
+        ).filter(AuditArchiveRecord.table_name == table_name, AuditArchiveRecord.record_id == record_id)}
+        narrowed = []
+        for segment in segments:
+            if not segment.records_indexed:
+                narrowed.append(segment._replace(row_count=None))
+            elif segment.month in records:
+                record = records[segment.month]
+                narrowed.append(segment._replace(row_count=record.row_count, first_at=record.first_at,
+                                                 last_at=record.last_at))
+        return narrowed
+
+    def invalidate(self):
+        self.registry = None
+
+def get_audit_archive():
+    """Audit archive of this app (AUDIT_ARCHIVE_DIR, default <instance>/audit_archive)"""
+    archive = current_app.extensions.get('audit_archive')
+    if archive is None:
+        config = current_app.config
+        directory = config.get('AUDIT_ARCHIVE_DIR') or os.path.join(current_app.instance_path, 'audit_archive')
+        archive = AuditArchive(directory, config.get('AUDIT_ARCHIVE_CHECK_INTERVAL', 1.0))
+        current_app.extensions['audit_archive'] = archive
+    return archive
+
+def _sort_key(row):
+    return (row.created_at or datetime.min, row.id)
+
+def _select(table, filters, after=None, limit=None, descending=True):
+    columns = [table.c.created_at, table.c.id]
+    query = select(table).where(*filters(table))\
+        .order_by(*(column.desc() if descending else column.asc() for column in columns))
+    if after:
+        query = query.where(_seek_condition(columns, after, descending))
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def _merged(sources, descending=True):
+    """Rows of already sorted sources, in the same order, without the copies a crashed archive run may leave"""
+    previous = None
+    for row in merge(*sources, key=_sort_key, reverse=descending):
+        if row.id != previous:
+            previous = row.id
+            yield row
+
+def _first(segments, filters, need, after=None, descending=True):
+    """The first `need` matching rows across the hot table and the segments
+
+    Segments are visited from the page's end of time (newest first when
+    descending) and skipped once `need` rows on the near side of everything
+    they hold were found, so a recent page never opens old files.
+    """
+    archive = get_audit_archive()
+    rows = db.session.execute(_select(hot_table, filters, after, need, descending)).all()
+    if not descending:
+        segments = sorted(segments, key=lambda segment: segment.first_at)
+    for segment in segments:
+        if len(rows) >= need:
+            edge = _sort_key(rows[need - 1])[0]
+            if edge > segment.last_at if descending else edge < segment.first_at:
+                break
+        engine, table = archive.source(segment)
+        with engine.connect() as connection:
+            found = connection.execute(_select(table, filters, after, need, descending)).all()
+        rows = list(islice(_merged([rows, found], descending), need))
+    return rows
+
+def _count(segments, filters, unfiltered, start, end):
+    total = db.session.execute(select(func.count()).select_from(hot_table).where(*filters(hot_table))).scalar()
+    archive = get_audit_archive()
+    for segment in segments:
+        if unfiltered and segment.row_count is not None and (start is None or start <= segment.first_at) and (end is None or segment.last_at <= end):
+            total += segment.row_count
+            continue
+        engine, table = archive.source(segment)
+        with engine.connect() as connection:
+            total += connection.execute(select(func.count()).select_from(table)
+                                        .where(*filters(table))).scalar()
+    return total
+
+def _entries(rows):
+    """AuditEntry per row, with the users' names loaded in one query"""
+    user_ids = {row.user_id for row in rows if row.user_id}
+    users = {}
+    if user_ids:
+        users = {user.id: user for user in User.query.options(load_only(User.id, User.nome))
+                 .filter(User.id.in_(user_ids))}
+    return [AuditEntry(row, users.get(row.user_id)) for row in rows]
+
+def paginate_archived(segments, filters, schema, unfiltered=False, window=(None, None), descending=True):
+    """paginate_query's page and cursor modes over the hot table plus archived segments
+
+    Args:
+        segments: Registry rows overlapping the date window, newest first
+        filters: Callable returning the WHERE conditions for a table (hot or segment)
+        schema: Marshmallow schema instance used to dump the rows
+        unfiltered: The segments' row_count is exact for `filters` within the date window
+            (no filter besides the window, or segments from record_segments)
+        window: (start, end) of the date filter, for the registry counts
+        descending: Newest first (the list) or oldest first (a record's history)
+
+    Raises:
+        ValueError: if the cursor token is malformed
+    """
+    per_page = min(request.args.get('limit', 10, type=int), 100)
+
+    if 'cursor' in request.args:
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor, CURSOR_COLUMNS) if cursor else None
+        rows = _first(segments, filters, per_page + 1, after, descending)
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        return {
+            'items': schema.dump(_entries(rows), many=True),
+            'pagination': {
+                'per_page': per_page,
+                'cursor': cursor or None,
+                'next_cursor': encode_cursor(_sort_key(rows[-1])) if has_next and rows else None,
+                'has_next': has_next
+            }
+        }
+
+    page = max(request.args.get('page', 1, type=int), 1)
+    offset = (page - 1) * per_page
+    rows = _first(segments, filters, offset + per_page, descending=descending)[offset:]
+    total = _count(segments, filters, unfiltered, *window)
+    pages = math.ceil(total / per_page) if total else 0
+    return {
+        'items': schema.dump(_entries(rows), many=True),
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': pages,
+            'has_next': page < pages,
+            'has_prev': page > 1
+        }
+    }
+
+def iter_archived(segments, filters, batch_size=500, descending=True):
+    """Every matching AuditEntry across the hot table and the segments, newest first by default (exports)"""
+    archive = get_audit_archive()
+    sources = [db.session.execute(_select(hot_table, filters, descending=descending)
+                                  .execution_options(yield_per=batch_size))]
+    connections = []
+    try:
+        for segment in segments:
+            engine, table = archive.source(segment)
+            connection = engine.connect()
+            connections.append(connection)
+            sources.append(connection.execute(_select(table, filters, descending=descending)
+                                              .execution_options(yield_per=batch_size)))
+        rows = _merged(sources, descending)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield from _entries(batch)
+    finally:
+        for connection in connections:
+            connection.close()
+
+class AuditArchiveService:
+    @staticmethod
+    def archive(hot_months=None, now=None):
+        """Move every month older than the last `hot_months` ones into its segment file
+
+        Rows are copied (INSERT OR IGNORE) and registered in one commit and
+        deleted from audit_logs in a later one, so an interrupted run loses
+        nothing and the next one finishes the move. A segment is only
+        appended to. Segment files archived by older versions first get the
+        columns and indexes audit_logs gained since.
+
+        Returns:
+            ({'YYYY-MM': rows moved}, error)
+        """
+        if hot_months is None:
+            hot_months = current_app.config.get('AUDIT_HOT_MONTHS', 3)
+        cutoff = add_months(month_start(now or datetime.utcnow()), -hot_months)
+        archive = get_audit_archive()
+        moved = {}
+
+        try:
+            AuditArchiveService._upgrade_segments(archive)
+            oldest = db.session.query(func.min(AuditLog.created_at)).scalar()
+            db.session.commit()
+            if oldest is None or oldest >= cutoff:
+                return moved, None
+            os.makedirs(archive.directory, exist_ok=True)
+
+            start = month_start(oldest)
+            while start < cutoff:
+                end = add_months(start, 1)
+                count = AuditArchiveService._archive_month(archive, start, end)
+                if count:
+                    moved[f'{start:%Y-%m}'] = count
+                start = end
+            return moved, None
+        except Exception as e:
+            db.session.rollback()
+            return moved, f"Erro ao arquivar logs de auditoria: {e}"
+
+    @staticmethod
+    def _upgrade_segments(archive):
+        """Bring every segment file up to the current audit_logs columns and indexes
+
+        Months archived before audit_archive_records existed get their
+        records listed.
+        """
+        for segment in AuditArchiveSegment.query.all():
+            engine = create_engine(f'sqlite:///{archive.path(segment)}')
+            try:
+                if _upgrade_segment(engine):
+                    # Readers re-read the file's columns when archived_at moves
+                    segment.archived_at = datetime.utcnow()
+                if not segment.records_indexed:
+                    with engine.connect() as connection:
+                        records = connection.execute(_record_bounds(segment_table, segment.month)).mappings().all()
+                    AuditArchiveService._index_records(db.session, segment.month, records)
+                    segment.records_indexed = True
+            finally:
+                engine.dispose()
+        db.session.commit()
+        archive.invalidate()
+
+    @staticmethod
+    def _index_records(connection, month, records):
+        """Replace a month's audit_archive_records with `records` (rows of _record_bounds)"""
+        table = AuditArchiveRecord.__table__
+        connection.execute(table.delete().where(table.c.month == month))
+        if records:
+            connection.execute(insert(table), [dict(record) for record in records])
+
+    @staticmethod
+    def _archive_month(archive, start, end):
+        in_month = (hot_table.c.created_at >= start) & (hot_table.c.created_at < end)
+        if db.session.query(AuditLog.id).filter(in_month).first() is None:
+            return 0
+        db.session.commit()
+
+        name = f'audit_logs_{start:%Y_%m}.db'
+        path = os.path.join(archive.directory, name)
+        engine = create_engine(f'sqlite:///{path}')
+        segment_table.metadata.create_all(engine)
+        _upgrade_segment(engine)
+        engine.dispose()
+
+        attached = segment_table.to_metadata(MetaData(), schema=SEGMENT_SCHEMA)
+        columns = list(hot_table.columns.keys())
+        with db.engine.connect() as connection:
+            # ATTACH cannot run inside a transaction
+            connection.exec_driver_sql(f"ATTACH DATABASE ? AS {SEGMENT_SCHEMA}", (path,))
+            connection.commit()
+            try:
+                with connection.begin():
+                    copied = connection.execute(
+                        insert(attached).prefix_with('OR IGNORE')
+                        .from_select(columns, select(*(hot_table.c[name] for name in columns)).where(in_month))
+                    ).rowcount
+                    row_count, first_at, last_at = connection.execute(select(
+                        func.count(), func.min(attached.c.created_at), func.max(attached.c.created_at)
+                    )).one()
+                    month = f'{start:%Y-%m}'
+                    records = connection.execute(_record_bounds(attached, month)).mappings().all()
+                    AuditArchiveService._index_records(connection, month, records)
+                    stmt = sqlite_insert(AuditArchiveSegment).values(
+                        month=month, path=name, row_count=row_count, first_at=first_at, last_at=last_at,
+                        archived_at=datetime.utcnow(), records_indexed=True
+                    )
+                    connection.execute(stmt.on_conflict_do_update(
+                        index_elements=[AuditArchiveSegment.month],
+                        set_={key: stmt.excluded[key]
+                              for key in ('row_count', 'first_at', 'last_at', 'archived_at', 'records_indexed')}
+                    ))
+                # Let every worker's registry pick the month up before its rows leave audit_logs
+                time.sleep(archive.check_interval)
+                archive.invalidate()
+                with connection.begin():
+                    connection.execute(hot_table.delete().where(in_month))
+            finally:
+                connection.exec_driver_sql(f"DETACH DATABASE {SEGMENT_SCHEMA}")
+        return copied
@@ -1,37 +1,26 @@
 import json
-from flask import request
+import uuid
+from datetime import datetime
+from flask import request, current_app, has_request_context, has_app_context
+from sqlalchemy import insert
 from app import db
 from app.models.audit_log import AuditLog
+from app.utils.audit_payload import FORMAT_FULL, encode_payload
 
 class AuditService:
     @staticmethod
     def log_action(user_id, action, table_name=None, record_id=None, old_values=None, new_values=None, details=None):
         try:
-            # Get IP address from request if available
-            ip_address = None
-            if request:
-                if request.headers.getlist("X-Forwarded-For"):
-                    ip_address = request.headers.getlist("X-Forwarded-For")[0]
-                else:
-                    ip_address = request.remote_addr
+            entry = AuditService.build_entry(AuditService.client_ip(), user_id, action, table_name, record_id,
+                                             old_values, new_values, details)
 
-            # Serialize values to JSON if they are dicts
-            if isinstance(old_values, dict):
-                old_values = json.dumps(old_values, default=str)
-            if isinstance(new_values, dict):
-                new_values = json.dumps(new_values, default=str)
+            # Async sink: the background writer batches the insert
+            writer = AuditService.get_writer()
+            if writer:
+                writer.enqueue(entry)
+                return AuditLog(**entry)
 
-            log = AuditLog(
-                user_id=user_id,
-                action=action,
-                table_name=table_name,
-                record_id=record_id,
-                old_values=old_values,
-                new_values=new_values,
-                ip_address=ip_address,
-                details=details
-            )
-            
+            log = AuditLog(**entry)
             db.session.add(log)
             db.session.commit()
             return log
@@ -39,3 +28,86 @@ class AuditService:
             print(f"Error creating audit log: {e}")
             db.session.rollback()
             return None
+
+    @staticmethod
+    def log_actions(actions):
+        """Write several entries at once (dicts of log_action's keyword arguments)
+
+        The sync sink inserts them with a single executemany and commit; the
+        async one queues them. Returns the number of entries written.
+        """
+        try:
+            ip_address = AuditService.client_ip()
+            entries = [AuditService.build_entry(ip_address, **action) for action in actions]
+            if not entries:
+                return 0
+
+            writer = AuditService.get_writer()
+            if writer:
+                for entry in entries:
+                    writer.enqueue(entry)
+                return len(entries)
+
+            db.session.execute(insert(AuditLog), entries)
+            db.session.commit()
+            return len(entries)
+        except Exception as e:
+            print(f"Error creating audit logs: {e}")
+            db.session.rollback()
+            return 0
+
+    @staticmethod
+    def client_ip():
+        """IP address of the request being handled, if any"""
+        if not has_request_context():
+            return None
+        if request.headers.getlist("X-Forwarded-For"):
+            return request.headers.getlist("X-Forwarded-For")[0]
+        return request.remote_addr
+
+    @staticmethod
+    def build_entry(ip_address, user_id, action, table_name=None, record_id=None,
+                    old_values=None, new_values=None, details=None):
+        """Column values of one audit row"""
+        return {
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'action': action,
+            'table_name': table_name,
+            'record_id': record_id,
+            **AuditService.encode_values(old_values, new_values),
+            'ip_address': ip_address,
+            'details': details,
+            'created_at': datetime.utcnow()
+        }
+
+    @staticmethod
+    def encode_values(old_values, new_values):
+        """Stored columns for the old/new values (AUDIT_PAYLOAD_FORMAT: 'delta' or 'full')"""
+        config = current_app.config if has_app_context() else {}
+        if config.get('AUDIT_PAYLOAD_FORMAT', 'delta') == 'full':
+            # Serialize values to JSON if they are dicts
+            if isinstance(old_values, dict):
+                old_values = json.dumps(old_values, default=str)
+            if isinstance(new_values, dict):
+                new_values = json.dumps(new_values, default=str)
+            return {'payload_format': FORMAT_FULL, 'payload': None,
+                    'old_values': old_values, 'new_values': new_values}
+        return encode_payload(old_values, new_values,
+                              compression=config.get('AUDIT_PAYLOAD_COMPRESSION', 'zlib'),
+                              compress_min_bytes=config.get('AUDIT_COMPRESS_MIN_BYTES', 128))
+
+    @staticmethod
+    def get_writer():
+        """Background AuditWriter when AUDIT_SINK is 'async', else None"""
+        if not has_app_context():
+            return None
+        return current_app.extensions.get('audit_writer')
+
+    @staticmethod
+    def sink_stats():
+        """Audit sink mode and queue metrics"""
+        writer = AuditService.get_writer()
+        if writer:
+            return writer.stats()
+        return {'mode': 'sync', 'queue_depth': 0}
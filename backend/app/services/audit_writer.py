@@ -0,0 +1,111 @@
+import atexit
+import queue
+import threading
+import time
+from app import db
+from app.models.audit_log import AuditLog
+from app.utils.metrics import AUDIT_QUEUE_DEPTH
+
+class AuditWriter:
+    """Buffers audit entries in memory and writes them in batches from a background thread
+
+    A batch is flushed when it reaches AUDIT_BATCH_SIZE entries or when
+    AUDIT_FLUSH_INTERVAL seconds have passed since its first entry. Pending
+    entries are flushed on interpreter shutdown. The queue depth is kept in
+    the audit_queue_depth gauge of /metrics.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.queue = None
+        self.flushed = 0
+        self.dropped = 0
+        self._stop = threading.Event()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('AUDIT_BATCH_SIZE', 100)
+        self.flush_interval = app.config.get('AUDIT_FLUSH_INTERVAL', 1.0)
+        self.queue = queue.Queue(maxsize=app.config.get('AUDIT_QUEUE_MAX', 10000))
+        app.extensions['audit_writer'] = self
+
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    @property
+    def queue_depth(self):
+        """Entries waiting to be written"""
+        return self.queue.qsize()
+
+    def stats(self):
+        return {
+            'mode': 'async',
+            'queue_depth': self.queue_depth,
+            'flushed': self.flushed,
+            'dropped': self.dropped,
+            'batch_size': self.batch_size,
+            'flush_interval': self.flush_interval
+        }
+
+    def enqueue(self, entry):
+        """Queue one audit row (dict of AuditLog columns); blocks when the queue is full"""
+        self.queue.put(entry)
+        AUDIT_QUEUE_DEPTH.set(self.queue.qsize())
+
+    def stop(self, timeout=10):
+        """Stop the background thread after flushing everything still queued"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            if self._stop.is_set() and self.queue.empty():
+                return
+
+    def _collect(self):
+        """Wait for the first entry, then gather up to batch_size within flush_interval"""
+        try:
+            batch = [self.queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if self._stop.is_set():
+                remaining = 0
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        AUDIT_QUEUE_DEPTH.set(self.queue.qsize())
+        return batch
+
+    def _flush(self, batch):
+        """Insert a batch with a single executemany; isolate bad rows if it fails"""
+        with self.app.app_context():
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(AuditLog.__table__.insert(), batch)
+                self.flushed += len(batch)
+                return
+            except Exception as e:
+                print(f"Error flushing audit batch ({len(batch)} entries): {e}")
+
+            for entry in batch:
+                try:
+                    with db.engine.begin() as conn:
+                        conn.execute(AuditLog.__table__.insert(), [entry])
+                    self.flushed += 1
+                except Exception as e:
+                    self.dropped += 1
+                    print(f"Error creating audit log: {e}")
@@ -0,0 +1,223 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from datetime import time as clock
+from flask import current_app
+from app import db
+from app.models.appointment import Appointment, MAX_DURATION_MINUTES
+from app.models.cache_version import ScheduleVersion
+
+# Longest appointment: only those starting less than this before a moment can still be running
+MAX_DURATION = timedelta(minutes=MAX_DURATION_MINUTES)
+
+ONE_DAY = timedelta(days=1)
+
+class DaySchedule:
+    """Busy intervals of one professional on one day, sorted by start
+
+    Holds every appointment overlapping the day, including one that started
+    the day before and runs past midnight. Never modified once built; free
+    intervals are computed once per working-hours window.
+    """
+
+    __slots__ = ('day', 'starts', 'ends', 'ids', '_free')
+
+    def __init__(self, day, intervals):
+        intervals = sorted(intervals)
+        self.day = day
+        self.starts = tuple(start for start, _, _ in intervals)
+        self.ends = tuple(end for _, end, _ in intervals)
+        self.ids = tuple(appointment_id for _, _, appointment_id in intervals)
+        self._free = {}
+
+    def __len__(self):
+        return len(self.starts)
+
+    def conflicts(self, start, end, exclude=None):
+        """Ids of the appointments overlapping [start, end)"""
+        first = bisect_right(self.starts, start - MAX_DURATION)
+        last = bisect_left(self.starts, end)
+        return [self.ids[i] for i in range(first, last) if self.ends[i] > start and self.ids[i] != exclude]
+
+    def free(self, opening, closing):
+        """Free (start, end) intervals between the opening and closing times"""
+        window = (opening, closing)
+        free = self._free.get(window)
+        if free is None:
+            free = self._free[window] = tuple(self._gaps(datetime.combine(self.day, opening),
+                                                         datetime.combine(self.day, closing)))
+        return free
+
+    def _gaps(self, cursor, closing):
+        for start, end in zip(self.starts, self.ends):
+            if start >= closing:
+                break
+            if start > cursor:
+                yield cursor, start
+            cursor = max(cursor, end)
+        if cursor < closing:
+            yield cursor, closing
+
+def interval_days(start, end):
+    """Days an interval [start, end) touches"""
+    day, last = start.date(), (end - timedelta(microseconds=1)).date()
+    days = []
+    while day <= last:
+        days.append(day)
+        day += ONE_DAY
+    return days
+
+def load_schedules(user_ids, days):
+    """{(user_id, day): DaySchedule} read from the database in one query
+
+    Reads the appointments of the given professionals starting between
+    MAX_DURATION before the first day and the end of the last one (the
+    user_id/data_hora index), then files each under every day it touches.
+    """
+    first, last = min(days), max(days)
+    window_start = datetime.combine(first, clock.min)
+    window_end = datetime.combine(last + ONE_DAY, clock.min)
+    rows = db.session.query(Appointment.user_id, Appointment.data_hora, Appointment.duracao_minutos,
+                            Appointment.id)\
+        .filter(Appointment.user_id.in_(user_ids),
+                Appointment.data_hora >= window_start - MAX_DURATION,
+                Appointment.data_hora < window_end)
+
+    intervals = defaultdict(list)
+    for user_id, start, minutes, appointment_id in rows:
+        end = start + timedelta(minutes=minutes)
+        for day in interval_days(max(start, window_start), min(end, window_end)):
+            intervals[(user_id, day)].append((start, end, appointment_id))
+    return {(user_id, day): DaySchedule(day, intervals.get((user_id, day), ()))
+            for user_id in user_ids for day in days}
+
+class AvailabilityIndex:
+    """Per-app LRU of DaySchedules keyed by (user_id, day), loaded on demand
+
+    Readers ask schedule_versions for the days bumped since their last look
+    at most every AVAILABILITY_CHECK_INTERVAL seconds and drop only those,
+    whichever worker wrote them; an update that does not move an appointment
+    bumps nothing. Writers in this process call written() after commit, so
+    their own days are dropped at once. Conflict checks never use the cache:
+    they read the touched days inside the write transaction.
+    """
+
+    def __init__(self, check_interval, maxsize, opening, closing):
+        self.check_interval = check_interval
+        self.maxsize = maxsize
+        self.opening = opening
+        self.closing = closing
+        self.version = None
+        self.schedules = OrderedDict()
+        self.checked_at = 0.0
+        self.loads = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_ids, days):
+        """{(user_id, day): DaySchedule} for every combination; missing days are loaded together"""
+        with self._lock:
+            if time.monotonic() - self.checked_at >= self.check_interval:
+                self._sync()
+
+            found, missing_users, missing_days = {}, set(), set()
+            for user_id in user_ids:
+                for day in days:
+                    schedule = self.schedules.get((user_id, day))
+                    if schedule is None:
+                        missing_users.add(user_id)
+                        missing_days.add(day)
+                    else:
+                        found[(user_id, day)] = schedule
+                        self.schedules.move_to_end((user_id, day))
+
+            if missing_users:
+                # Loaded under the lock, so written() cannot run between the read and the store
+                loaded = load_schedules(sorted(missing_users), sorted(missing_days))
+                self.loads += 1
+                for key, schedule in loaded.items():
+                    found.setdefault(key, schedule)
+                    self.schedules[key] = schedule
+                while len(self.schedules) > self.maxsize:
+                    self.schedules.popitem(last=False)
+            return found
+
+    def written(self, keys):
+        """Drop the (user_id, day) keys of an appointment write this process just committed"""
+        with self._lock:
+            for key in keys:
+                self.schedules.pop(key, None)
+
+    def _sync(self):
+        """Drop the days other writes bumped since the last check (one indexed query)"""
+        if self.version is None:
+            # Nothing cached yet: only the starting point is needed
+            self.version = ScheduleVersion.latest()
+        else:
+            for user_id, day, version in ScheduleVersion.changed_since(self.version):
+                self.schedules.pop((user_id, day), None)
+                self.version = max(self.version, version)
+        self.checked_at = time.monotonic()
+
+def _index():
+    index = current_app.extensions.get('availability_index')
+    if index is None:
+        config = current_app.config
+        index = AvailabilityIndex(
+            config.get('AVAILABILITY_CHECK_INTERVAL', 1.0),
+            config.get('AVAILABILITY_INDEX_SIZE', 20000),
+            clock.fromisoformat(config.get('AVAILABILITY_DAY_START', '08:00')),
+            clock.fromisoformat(config.get('AVAILABILITY_DAY_END', '18:00')),
+        )
+        current_app.extensions['availability_index'] = index
+    return index
+
+def get_availability_index():
+    """Availability index of this app"""
+    return _index()
+
+def schedule_keys(user_id, start, minutes):
+    """(user_id, day) keys an appointment occupies"""
+    return [(user_id, day) for day in interval_days(start, start + timedelta(minutes=minutes))]
+
+def find_conflicts(appointment):
+    """Ids of the professional's other appointments overlapping this one
+
+    Reads the database (not the cache); call after the appointment is
+    flushed, so the transaction holds SQLite's write lock and no other
+    writer can book the same interval before the commit.
+    """
+    start, end = appointment.data_hora, appointment.data_hora_fim
+    days = interval_days(start, end)
+    schedules = load_schedules([appointment.user_id], days)
+    conflicts = []
+    for day in days:
+        for appointment_id in schedules[(appointment.user_id, day)].conflicts(start, end, exclude=appointment.id):
+            if appointment_id not in conflicts:
+                conflicts.append(appointment_id)
+    return conflicts
+
+def schedule_written(*keys):
+    """Invalidate the cached days of a committed appointment write (lists of schedule_keys)"""
+    _index().written([key for group in keys for key in group])
+
+def free_intervals(user_ids, first_day, days=1, min_minutes=0):
+    """{user_id: [(day, [(start, end), ...]), ...]} of free time within working hours
+
+    Gaps shorter than min_minutes are left out.
+    """
+    index = _index()
+    dates = [first_day + timedelta(days=offset) for offset in range(days)]
+    schedules = index.get(user_ids, dates)
+    shortest = timedelta(minutes=min_minutes)
+    result = {}
+    for user_id in user_ids:
+        per_day = []
+        for day in dates:
+            free = schedules[(user_id, day)].free(index.opening, index.closing)
+            if min_minutes:
+                free = [gap for gap in free if gap[1] - gap[0] >= shortest]
+            per_day.append((day, free))
+        result[user_id] = per_day
+    return result
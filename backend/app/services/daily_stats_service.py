@@ -0,0 +1,101 @@
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from app import db
+from app.models.appointment import Appointment, AppointmentProcedure
+from app.models.patient import Patient
+from app.models.daily_stats import DailyStats
+
+class DailyStatsService:
+    @staticmethod
+    def apply(day, appointments=0, revenue=0, procedures=0, patients=0):
+        """Add deltas to a day's rollup row in the current transaction (no commit)"""
+        DailyStatsService.apply_many([{'day': day, 'appointments': appointments, 'revenue': revenue,
+                                       'procedures': procedures, 'patients': patients}])
+    
+    @staticmethod
+    def apply_many(deltas):
+        """apply() for several days with a single executemany (dicts of apply's arguments)"""
+        rows = []
+        for delta in deltas:
+            day = delta['day']
+            if isinstance(day, datetime):
+                day = day.date()
+            rows.append({
+                'day': day,
+                'appointment_count': delta.get('appointments', 0),
+                'revenue': Decimal(delta.get('revenue') or 0),
+                'procedure_count': delta.get('procedures', 0),
+                'patient_count': delta.get('patients', 0)
+            })
+        if not rows:
+            return
+        
+        stmt = insert(DailyStats)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyStats.day],
+            set_={
+                'appointment_count': DailyStats.appointment_count + stmt.excluded.appointment_count,
+                'revenue': DailyStats.revenue + stmt.excluded.revenue,
+                'procedure_count': DailyStats.procedure_count + stmt.excluded.procedure_count,
+                'patient_count': DailyStats.patient_count + stmt.excluded.patient_count
+            }
+        )
+        db.session.execute(stmt, rows)
+    
+    @staticmethod
+    def record_appointment(appointment, sign=1):
+        """Count (sign=1) or discount (sign=-1) an appointment on its day"""
+        DailyStatsService.apply(
+            appointment.data_hora,
+            appointments=sign,
+            revenue=sign * Decimal(appointment.valor_total or 0),
+            procedures=sign * len(appointment.procedures)
+        )
+    
+    @staticmethod
+    def record_patient(patient, sign=1):
+        """Count (sign=1) or discount (sign=-1) a patient on its creation day"""
+        DailyStatsService.apply(patient.created_at or datetime.utcnow(), patients=sign)
+    
+    @staticmethod
+    def rebuild():
+        """Recompute the whole rollup from the business tables"""
+        rows = {}
+        
+        def row(day):
+            # func.date() returns ISO strings on SQLite
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            if day not in rows:
+                rows[day] = DailyStats(day=day, appointment_count=0, revenue=Decimal('0.00'),
+                                       procedure_count=0, patient_count=0)
+            return rows[day]
+        
+        appointment_day = func.date(Appointment.data_hora)
+        for day, count, revenue in db.session.query(
+            appointment_day, func.count(Appointment.id), func.sum(Appointment.valor_total)
+        ).group_by(appointment_day):
+            stats = row(day)
+            stats.appointment_count = count
+            stats.revenue = Decimal(str(revenue or 0)).quantize(Decimal('0.01'))
+        
+        for day, count in db.session.query(
+            appointment_day, func.count(AppointmentProcedure.procedure_id)
+        ).join(AppointmentProcedure, AppointmentProcedure.appointment_id == Appointment.id).group_by(appointment_day):
+            row(day).procedure_count = count
+        
+        patient_day = func.date(Patient.created_at)
+        for day, count in db.session.query(patient_day, func.count(Patient.id)).group_by(patient_day):
+            if day is not None:
+                row(day).patient_count = count
+        
+        try:
+            DailyStats.query.delete()
+            db.session.add_all(rows.values())
+            db.session.commit()
+            return len(rows), None
+        except Exception as e:
+            db.session.rollback()
+            return 0, "Erro ao reconstruir estatísticas diárias"
@@ -1,8 +1,19 @@
-from datetime import date
+import re
+import uuid
+from datetime import date, datetime
+from marshmallow import ValidationError, EXCLUDE
+from sqlalchemy import insert, or_, text
 from app import db
 from app.models.patient import Patient, Responsible
-from app.utils.validators import validate_cpf, validate_email, calculate_age
-from app.utils.auth import hash_password
+from app.models.patient_search import PATIENT_SEARCH_TABLE, build_match_expression
+from app.schemas.patient_schema import PatientCreateSchema
+from app.utils.validators import validate_cpf, validate_email, validate_cpfs, validate_emails, calculate_age
+from app.utils.auth import initial_password, initial_passwords
+from app.utils.importers import chunked
+from app.services.daily_stats_service import DailyStatsService
+
+# Imported patients get the CPF as initial password, so 'senha' is not required
+patient_import_schema = PatientCreateSchema(unknown=EXCLUDE, partial=('senha',))
 
 class PatientService:
     @staticmethod
@@ -24,9 +35,11 @@ class PatientService:
         if Patient.query.filter_by(email=data['email']).first():
             return None, "Email já está em uso"
         
-        # Parse birth date
+        # Parse birth date (already a date when loaded through the schema)
         try:
-            birth_date = date.fromisoformat(data['data_nascimento'])
+            birth_date = data['data_nascimento']
+            if not isinstance(birth_date, date):
+                birth_date = date.fromisoformat(birth_date)
         except ValueError:
             return None, "Formato de data inválido (use YYYY-MM-DD)"
         
@@ -34,26 +47,29 @@ class PatientService:
         import re
         clean_cpf = re.sub(r'\D', '', data['cpf'])
         
+        # Address comes nested under 'endereco' or flat (PatientCreateSchema)
+        address = data.get('endereco', data)
+        
         # Create patient with default password (CPF)
         patient = Patient(
             cpf=clean_cpf,
             nome=data['nome'],
             email=data['email'],
-            senha=hash_password(clean_cpf),  # Default password is cleaned CPF
+            senha=initial_password(clean_cpf),  # Default password is cleaned CPF
             first_access=True,
             telefone=data['telefone'],
             data_nascimento=birth_date,
-            estado=data['endereco']['estado'],
-            cidade=data['endereco']['cidade'],
-            bairro=data['endereco']['bairro'],
-            cep=data['endereco']['cep'],
-            rua=data['endereco']['rua'],
-            numero=data['endereco']['numero']
+            estado=address['estado'],
+            cidade=address['cidade'],
+            bairro=address['bairro'],
+            cep=address['cep'],
+            rua=address['rua'],
+            numero=address['numero']
         )
         
         # If patient is minor, responsible is required
         if calculate_age(birth_date) < 18:
-            if 'responsible' not in data:
+            if not data.get('responsible'):
                 return None, "Paciente menor de idade requer dados do responsável"
             
             responsible_data = data['responsible']
@@ -68,7 +84,9 @@ class PatientService:
             
             # Check if responsible is minor
             try:
-                responsible_birth = date.fromisoformat(responsible_data['data_nascimento'])
+                responsible_birth = responsible_data['data_nascimento']
+                if not isinstance(responsible_birth, date):
+                    responsible_birth = date.fromisoformat(responsible_birth)
                 if calculate_age(responsible_birth) < 18:
                     return None, "Responsável não pode ser menor de idade"
             except ValueError:
@@ -86,6 +104,8 @@ class PatientService:
         
         try:
             db.session.add(patient)
+            db.session.flush()  # Get created_at
+            DailyStatsService.record_patient(patient)
             db.session.commit()
             return patient, None
         except Exception as e:
@@ -204,9 +224,216 @@ class PatientService:
         #     return False, "Não é possível remover paciente com atendimentos"
         
         try:
+            # Appointments are removed by cascade, so discount them as well
+            DailyStatsService.record_patient(patient, sign=-1)
+            for appointment in patient.appointments:
+                DailyStatsService.record_appointment(appointment, sign=-1)
             db.session.delete(patient)
             db.session.commit()
             return True, None
         except Exception as e:
             db.session.rollback()
-            return False, "Erro ao remover paciente"
\ No newline at end of file
+            return False, "Erro ao remover paciente"
+    
+    @staticmethod
+    def search_patients(term, page=1, per_page=10, options=()):
+        """Ranked full-text search on name, CPF, email and phone prefixes
+        
+        Every match is ranked by bm25, ties broken by patient_id, so pages
+        come from one fixed order and never repeat or skip a patient. Pages
+        fetch one extra row instead of counting matches.
+        Returns ((patients, has_next), error).
+        """
+        expression = build_match_expression(term)
+        if expression is None:
+            return None, 'Informe um termo de busca'
+        
+        page = max(page, 1)
+        offset = (page - 1) * per_page
+        matches = text(
+            f"SELECT patient_id, bm25({PATIENT_SEARCH_TABLE}) AS score FROM {PATIENT_SEARCH_TABLE}"
+            f" WHERE {PATIENT_SEARCH_TABLE} MATCH :expression"
+            " ORDER BY score, patient_id LIMIT :limit OFFSET :offset"
+        ).columns(patient_id=db.String, score=db.Float).subquery('matches')
+        
+        rows = (
+            db.session.query(Patient)
+            .options(*options)
+            .join(matches, matches.c.patient_id == Patient.id)
+            .order_by(matches.c.score, matches.c.patient_id)
+            .params(expression=expression, limit=per_page + 1, offset=offset)
+            .all()
+        )
+        return (rows[:per_page], len(rows) > per_page), None
+    
+    @staticmethod
+    def import_patients(records, chunk_size=500, max_errors=1000):
+        """Bulk import patients from (row_number, record, error) tuples
+        
+        Records are processed in chunks: each chunk is validated in one pass,
+        checked for CPF/email conflicts with a single IN query and inserted
+        with bulk inserts in its own transaction. Returns a per-row report:
+        `failed` counts every rejected row, `errors` lists the first
+        max_errors of them in row order (`errors_truncated` if there were more),
+        so memory stays flat however many rows fail.
+        """
+        report = {'imported': 0, 'failed': 0, 'errors': [], 'errors_truncated': False}
+        
+        for chunk in chunked(records, chunk_size):
+            errors = []
+            valid = PatientService._validate_import_chunk(chunk, errors)
+            if valid:
+                PatientService._insert_import_chunk(valid, report, errors)
+            
+            # Rows are numbered in file order: sorting each chunk sorts the report
+            report['failed'] += len(errors)
+            errors.sort(key=lambda error: error['row'])
+            room = max_errors - len(report['errors'])
+            report['errors'].extend(errors[:room])
+            if len(errors) > room:
+                report['errors_truncated'] = True
+        
+        return report
+    
+    @staticmethod
+    def _validate_import_chunk(chunk, errors):
+        """Validate a chunk; returns [(row_number, data)] for rows that can be inserted"""
+        def fail(row_number, error):
+            errors.append({'row': row_number, 'error': error})
+        
+        loaded = []
+        for row_number, record, error in chunk:
+            if error:
+                fail(row_number, error)
+                continue
+            
+            try:
+                data = patient_import_schema.load(record)
+            except ValidationError as err:
+                fail(row_number, err.messages)
+                continue
+            
+            data['cpf'] = re.sub(r'\D', '', data['cpf'])
+            loaded.append((row_number, data))
+        
+        # CPF and email formats for the whole chunk at once
+        cpf_ok = validate_cpfs(data['cpf'] for _, data in loaded)
+        email_ok = validate_emails(data['email'] for _, data in loaded)
+        
+        candidates = []
+        seen_cpfs = set()
+        seen_emails = set()
+        
+        for (row_number, data), valid_cpf, valid_email in zip(loaded, cpf_ok, email_ok):
+            if not valid_cpf:
+                fail(row_number, "CPF inválido")
+                continue
+            if not valid_email:
+                fail(row_number, "Formato de email inválido")
+                continue
+            
+            if calculate_age(data['data_nascimento']) < 18:
+                responsible = data.get('responsible')
+                if not responsible:
+                    fail(row_number, "Paciente menor de idade requer dados do responsável")
+                    continue
+                if not validate_cpf(responsible['cpf']):
+                    fail(row_number, "CPF do responsável inválido")
+                    continue
+                if not validate_email(responsible['email']):
+                    fail(row_number, "Email do responsável inválido")
+                    continue
+                if calculate_age(responsible['data_nascimento']) < 18:
+                    fail(row_number, "Responsável não pode ser menor de idade")
+                    continue
+            else:
+                data.pop('responsible', None)
+            
+            # Duplicates inside the file itself
+            if data['cpf'] in seen_cpfs:
+                fail(row_number, "CPF já está em uso")
+                continue
+            if data['email'] in seen_emails:
+                fail(row_number, "Email já está em uso")
+                continue
+            seen_cpfs.add(data['cpf'])
+            seen_emails.add(data['email'])
+            
+            candidates.append((row_number, data))
+        
+        if not candidates:
+            return []
+        
+        # Uniqueness against the database: one query for the whole chunk
+        existing = db.session.query(Patient.cpf, Patient.email).filter(or_(
+            Patient.cpf.in_(seen_cpfs),
+            Patient.email.in_(seen_emails)
+        )).all()
+        taken_cpfs = {cpf for cpf, _ in existing}
+        taken_emails = {email for _, email in existing}
+        
+        valid = []
+        for row_number, data in candidates:
+            if data['cpf'] in taken_cpfs:
+                fail(row_number, "CPF já está em uso")
+            elif data['email'] in taken_emails:
+                fail(row_number, "Email já está em uso")
+            else:
+                valid.append((row_number, data))
+        return valid
+    
+    @staticmethod
+    def _insert_import_chunk(valid, report, errors):
+        """Insert a validated chunk with bulk inserts in a single transaction"""
+        now = datetime.utcnow()
+        patient_rows = []
+        responsible_rows = []
+        
+        # Default password is the cleaned CPF, hashed in parallel (or deferred)
+        passwords = initial_passwords(data['cpf'] for _, data in valid)
+        
+        for (_, data), senha in zip(valid, passwords):
+            patient_id = str(uuid.uuid4())
+            patient_rows.append({
+                'id': patient_id,
+                'cpf': data['cpf'],
+                'nome': data['nome'],
+                'email': data['email'],
+                'senha': senha,
+                'first_access': True,
+                'telefone': data['telefone'],
+                'data_nascimento': data['data_nascimento'],
+                'estado': data['estado'],
+                'cidade': data['cidade'],
+                'bairro': data['bairro'],
+                'cep': data['cep'],
+                'rua': data['rua'],
+                'numero': data['numero'],
+                'created_at': now,
+                'updated_at': now
+            })
+            
+            responsible = data.get('responsible')
+            if responsible:
+                responsible_rows.append({
+                    'id': str(uuid.uuid4()),
+                    'patient_id': patient_id,
+                    'nome': responsible['nome'],
+                    'cpf': responsible['cpf'],
+                    'data_nascimento': responsible['data_nascimento'],
+                    'email': responsible['email'],
+                    'telefone': responsible['telefone'],
+                    'created_at': now,
+                    'updated_at': now
+                })
+        
+        try:
+            db.session.execute(insert(Patient), patient_rows)
+            if responsible_rows:
+                db.session.execute(insert(Responsible), responsible_rows)
+            DailyStatsService.apply(now, patients=len(patient_rows))
+            db.session.commit()
+            report['imported'] += len(patient_rows)
+        except Exception as e:
+            db.session.rollback()
+            errors.extend({'row': row_number, 'error': "Erro ao importar paciente"} for row_number, _ in valid)
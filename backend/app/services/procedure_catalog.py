@@ -0,0 +1,146 @@
+import threading
+import time
+from bisect import bisect_right
+from types import MappingProxyType
+from typing import NamedTuple
+from datetime import datetime
+from decimal import Decimal
+from flask import current_app, g
+from sqlalchemy.orm import make_transient_to_detached
+from app import db
+from app.models.cache_version import CacheVersion
+from app.models.procedure import Procedure
+from app.schemas.procedure_schema import ProcedureSchema
+
+# cache_versions row bumped by the procedures table's triggers
+CATALOG_NAME = 'procedures'
+
+class ProcedureEntry(NamedTuple):
+    """Immutable copy of one Procedure row"""
+    id: str
+    nome: str
+    descricao: str
+    valor_plano: Decimal
+    valor_particular: Decimal
+    created_at: datetime
+    updated_at: datetime
+
+    def price(self, tipo):
+        """Price charged for an appointment of the given tipo"""
+        return self.valor_plano if tipo == 'plano' else self.valor_particular
+
+class ProcedureCatalog:
+    """Versioned, read-only snapshot of the procedures table
+
+    Entries are sorted by (nome, id) like GET /procedures and already
+    serialized, so listing and pricing never touch the database. A new
+    snapshot is built on change; an existing one is never modified.
+    """
+
+    __slots__ = ('version', 'entries', 'keys', 'serialized', 'by_id')
+
+    def __init__(self, version, entries):
+        entries = tuple(sorted(entries, key=lambda entry: (entry.nome, entry.id)))
+        self.version = version
+        self.entries = entries
+        self.keys = tuple((entry.nome, entry.id) for entry in entries)
+        self.serialized = tuple(ProcedureSchema().dump(entries, many=True))
+        self.by_id = MappingProxyType({entry.id: i for i, entry in enumerate(entries)})
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, procedure_id):
+        index = self.by_id.get(procedure_id)
+        return None if index is None else self.entries[index]
+
+    def dump(self, procedure_id):
+        """Serialized procedure (ProcedureSchema output) or None"""
+        index = self.by_id.get(procedure_id)
+        return None if index is None else self.serialized[index]
+
+    def resolve(self, procedure_ids):
+        """Entries for the given ids; returns (entries, error)"""
+        if not procedure_ids:
+            return None, "Pelo menos um procedimento é obrigatório"
+        entries = [self.get(procedure_id) for procedure_id in procedure_ids]
+        if None in entries or len(set(procedure_ids)) != len(procedure_ids):
+            return None, "Um ou mais procedimentos não encontrados"
+        return entries, None
+
+    def page_start(self, key):
+        """Index of the first entry sorted after key (for cursor pagination)"""
+        return bisect_right(self.keys, tuple(key))
+
+    @staticmethod
+    def total(entries, tipo):
+        return sum((entry.price(tipo) for entry in entries), Decimal('0.00'))
+
+class CatalogHolder:
+    """Per-app slot holding the current snapshot
+
+    Writers in this process drop the snapshot after commit. Other workers
+    compare the procedures row of cache_versions at most every
+    PROCEDURE_CATALOG_CHECK_INTERVAL seconds and reload when it moved.
+    """
+
+    def __init__(self, check_interval):
+        self.check_interval = check_interval
+        self.catalog = None
+        self.checked_at = 0.0
+        self.loads = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        catalog = self.catalog
+        if catalog is not None:
+            # Version already read in this request (conditional GET): trust it over the interval
+            known = g.get('cache_versions', {}).get(CATALOG_NAME)
+            if known is not None:
+                if known[0] == catalog.version:
+                    return catalog
+            elif time.monotonic() - self.checked_at < self.check_interval:
+                return catalog
+
+        with self._lock:
+            catalog = self.catalog
+            version = CacheVersion.current(CATALOG_NAME)
+            if catalog is None or catalog.version != version:
+                catalog = self._load(version)
+            self.checked_at = time.monotonic()
+            self.catalog = catalog
+            return catalog
+
+    def invalidate(self):
+        self.catalog = None
+
+    def _load(self, version):
+        # Version is read before the rows: a concurrent write can only make
+        # the snapshot newer than its label, which triggers another reload
+        rows = db.session.query(*(getattr(Procedure, field) for field in ProcedureEntry._fields)).all()
+        self.loads += 1
+        return ProcedureCatalog(version, (ProcedureEntry(*row) for row in rows))
+
+def _holder():
+    holder = current_app.extensions.get('procedure_catalog')
+    if holder is None:
+        holder = CatalogHolder(current_app.config.get('PROCEDURE_CATALOG_CHECK_INTERVAL', 1.0))
+        current_app.extensions['procedure_catalog'] = holder
+    return holder
+
+def get_procedure_catalog():
+    """Current procedure catalog snapshot for this app"""
+    return _holder().get()
+
+def invalidate_procedure_catalog():
+    """Drop this process's snapshot (call after commit)"""
+    _holder().invalidate()
+
+def attach_procedures(entries):
+    """Session-bound Procedure instances for catalog entries, without a SELECT"""
+    procedures = []
+    for entry in entries:
+        procedure = Procedure(**entry._asdict())
+        make_transient_to_detached(procedure)
+        procedures.append(db.session.merge(procedure, load=False))
+    return procedures
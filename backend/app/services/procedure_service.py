@@ -1,5 +1,6 @@
 from app import db
 from app.models.procedure import Procedure
+from app.services.procedure_catalog import invalidate_procedure_catalog
 
 class ProcedureService:
     @staticmethod
@@ -19,6 +20,7 @@ class ProcedureService:
             
             db.session.add(procedure)
             db.session.commit()
+            invalidate_procedure_catalog()
             return procedure, None
         except Exception as e:
             db.session.rollback()
@@ -45,6 +47,7 @@ class ProcedureService:
         
         try:
             db.session.commit()
+            invalidate_procedure_catalog()
             return procedure, None
         except Exception as e:
             db.session.rollback()
@@ -63,6 +66,7 @@ class ProcedureService:
         try:
             db.session.delete(procedure)
             db.session.commit()
+            invalidate_procedure_catalog()
             return True, None
         except Exception as e:
             db.session.rollback()
@@ -0,0 +1,97 @@
+import json
+import zlib
+
+# payload_format values of audit_logs
+FORMAT_FULL = 0        # old_values/new_values hold complete JSON snapshots (rows written before the delta format)
+FORMAT_DELTA = 1       # payload: UTF-8 JSON delta (see encode_payload)
+FORMAT_DELTA_ZLIB = 2  # payload: the same delta, zlib-compressed with ZLIB_DICTIONARY
+
+COMPRESSION_LEVEL = 6
+
+# Preset dictionary of FORMAT_DELTA_ZLIB: the delta keys and the audited
+# snapshots' field names, which small payloads cannot amortize on their own.
+# Part of the format: never edit it, add a new format with another one.
+ZLIB_DICTIONARY = (
+    b'{"n":{"o":{"a":["id":"data_hora":"duracao_minutos":"patient_id":"user_id":'
+    b'"tipo":"particular""convenio""numero_carteira":null,"valor_total":".00","procedures":["'
+)
+
+def encode_payload(old_values, new_values, compression='zlib', compress_min_bytes=128):
+    """Column values {payload_format, payload, old_values, new_values} for a pair of snapshots
+
+    Dicts are stored as one delta: "n" holds the new snapshot and "o" the
+    old values of the keys whose serialized JSON differs from it (keys the
+    update removed included), with "a" listing the keys the update added. An update touching
+    one field stores it twice and everything else once; a create has only "n"
+    and a delete only "o". Deltas of compress_min_bytes or more are
+    zlib-compressed (preset dictionary) when that makes them smaller.
+    Anything else (strings) is kept as before, in old_values/new_values.
+    """
+    if not all(values is None or isinstance(values, dict) for values in (old_values, new_values)) \
+            or (old_values is None and new_values is None):
+        return {
+            'payload_format': FORMAT_FULL,
+            'payload': None,
+            'old_values': _dumps(old_values),
+            'new_values': _dumps(new_values),
+        }
+
+    delta = {}
+    if new_values is not None:
+        delta['n'] = new_values
+    if old_values is not None and new_values is not None:
+        delta['o'] = {key: value for key, value in old_values.items()
+                      if key not in new_values or _serialized(new_values[key]) != _serialized(value)}
+        added = [key for key in new_values if key not in old_values]
+        if added:
+            delta['a'] = added
+    elif old_values is not None:
+        delta['o'] = old_values
+
+    payload = json.dumps(delta, default=str, separators=(',', ':')).encode('utf-8')
+    payload_format = FORMAT_DELTA
+    if compression == 'zlib' and len(payload) >= compress_min_bytes:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=ZLIB_DICTIONARY)
+        compressed = compressor.compress(payload) + compressor.flush()
+        if len(compressed) < len(payload):
+            payload, payload_format = compressed, FORMAT_DELTA_ZLIB
+    return {'payload_format': payload_format, 'payload': payload, 'old_values': None, 'new_values': None}
+
+def decode_payload(entry):
+    """(old_values, new_values) of an audit row as the JSON text log_action used to store
+
+    Works on AuditLog instances and archived rows alike (anything with the
+    payload_format, payload, old_values and new_values attributes).
+    """
+    payload_format = entry.payload_format or FORMAT_FULL
+    if payload_format == FORMAT_FULL:
+        return entry.old_values, entry.new_values
+
+    payload = entry.payload
+    if payload_format == FORMAT_DELTA_ZLIB:
+        decompressor = zlib.decompressobj(zdict=ZLIB_DICTIONARY)
+        payload = decompressor.decompress(payload) + decompressor.flush()
+    elif payload_format != FORMAT_DELTA:
+        raise ValueError(f"Formato de auditoria desconhecido: {payload_format}")
+    delta = json.loads(payload)
+
+    new_values = delta.get('n')
+    old_values = delta.get('o')
+    if new_values is not None and old_values is not None:
+        # Same key order as the new snapshot, which it shared before the update
+        added = set(delta.get('a', ()))
+        old_values = {**{key: value for key, value in new_values.items() if key not in added}, **old_values}
+    return _dumps(old_values), _dumps(new_values)
+
+def _serialized(value):
+    """A value as the delta stores it: equal only if both decode to the same JSON
+
+    Python equality is not enough (True == 1 == 1.0, Decimal('1.0') ==
+    Decimal('1.00')), and dropping such a change would not round-trip.
+    """
+    return json.dumps(value, default=str)
+
+def _dumps(values):
+    if isinstance(values, dict):
+        return json.dumps(values, default=str)
+    return values
@@ -1,8 +1,37 @@
 import bcrypt
+import hmac
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import jsonify, g, current_app, has_app_context
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, create_access_token
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from app import db
 from app.models.user import User
+from app.models.patient import Patient
+from app.utils.cache import TTLCache
+
+# Principal kinds carried in the token's 'kind' claim
+PRINCIPAL_MODELS = {
+    'user': User,
+    'patient': Patient
+}
+
+# Column snapshots of recently seen principals, keyed by (kind, id).
+# Password hashes are never cached; they load on access when needed.
+identity_cache = TTLCache(maxsize=1024, ttl=60)
+
+# Stored instead of a hash when the initial credential is hashed on first login.
+# Never a valid bcrypt hash, so it can't match any password by itself.
+DEFERRED_PASSWORD = '!deferred'
+
+# Below this many passwords the pool overhead isn't worth it
+HASH_POOL_MIN_BATCH = 4
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
 
 def hash_password(password):
     """Hash a password using bcrypt"""
@@ -10,28 +39,133 @@ def hash_password(password):
 
 def check_password(password, hashed):
     """Check if password matches the hash"""
+    if is_deferred_password(hashed):
+        return False
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+def hash_passwords(passwords):
+    """Hash many passwords, on a process pool for batches (PASSWORD_HASH_WORKERS)"""
+    passwords = list(passwords)
+    workers = _hash_workers()
+    if workers <= 1 or len(passwords) < HASH_POOL_MIN_BATCH:
+        return [hash_password(password) for password in passwords]
+    
+    pool = _get_hash_pool(workers)
+    return list(pool.map(hash_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+def initial_password(plain):
+    """Initial credential for a new patient: a hash, or the deferred marker"""
+    if _config('PATIENT_DEFERRED_CREDENTIALS', False):
+        return DEFERRED_PASSWORD
+    return hash_password(plain)
+
+def initial_passwords(plains):
+    """Batch version of initial_password"""
+    plains = list(plains)
+    if _config('PATIENT_DEFERRED_CREDENTIALS', False):
+        return [DEFERRED_PASSWORD] * len(plains)
+    return hash_passwords(plains)
+
+def is_deferred_password(stored):
+    return stored == DEFERRED_PASSWORD
+
+def check_deferred_password(password, expected):
+    """Compare a login attempt with a not-yet-hashed initial credential"""
+    return hmac.compare_digest(password.encode('utf-8'), expected.encode('utf-8'))
+
+def _config(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+def _hash_workers():
+    workers = _config('PASSWORD_HASH_WORKERS', 0)
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+def _get_hash_pool(workers):
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ProcessPoolExecutor(max_workers=workers)
+        return _hash_pool
+
+def create_token(principal):
+    """Create an access token carrying the principal kind and role as claims"""
+    if isinstance(principal, Patient):
+        claims = {'kind': 'patient', 'role': 'patient'}
+    else:
+        claims = {'kind': 'user', 'role': principal.tipo}
+    return create_access_token(identity=str(principal.id), additional_claims=claims)
+
 def admin_required(f):
     """Decorator to require admin privileges"""
     @wraps(f)
     @jwt_required()
     def decorated_function(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        # Tokens with a role claim that is not admin are rejected without touching the DB
+        role = get_jwt().get('role')
+        if role is not None and role != 'admin':
+            return jsonify({'error': 'Acesso negado. Apenas administradores.'}), 403
         
-        if not user or user.tipo != 'admin':
+        user = get_current_user()
+        if not isinstance(user, User) or user.tipo != 'admin':
             return jsonify({'error': 'Acesso negado. Apenas administradores.'}), 403
             
         return f(*args, **kwargs)
     return decorated_function
 
-from app.models.patient import Patient
-
 def get_current_user():
-    """Get current user from JWT token"""
+    """Get current user from JWT token
+
+    Memoized for the request in flask.g and served from identity_cache
+    across requests, so the common case needs no DB round-trip.
+    """
+    if 'current_user' in g:
+        return g.current_user
+    
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if user:
-        return user
-    return Patient.query.get(user_id)
\ No newline at end of file
+    kind = get_jwt().get('kind')
+    # Tokens issued before the 'kind' claim existed: users first, then patients
+    kinds = [kind] if kind in PRINCIPAL_MODELS else ['user', 'patient']
+    
+    principal = None
+    for kind in kinds:
+        principal = _load_principal(kind, user_id)
+        if principal:
+            break
+    
+    g.current_user = principal
+    return principal
+
+def _load_principal(kind, principal_id):
+    model = PRINCIPAL_MODELS[kind]
+    snapshot = identity_cache.get((kind, principal_id))
+    if snapshot is not None:
+        return _attach(model, snapshot)
+    
+    principal = db.session.get(model, principal_id)
+    if principal:
+        identity_cache.set((kind, principal_id), _snapshot(principal))
+    return principal
+
+def _snapshot(principal):
+    return {
+        attr.key: getattr(principal, attr.key)
+        for attr in inspect(type(principal)).column_attrs
+        if attr.key != 'senha'
+    }
+
+def _attach(model, snapshot):
+    """Rebuild a persistent instance from a snapshot without a SELECT"""
+    principal = model(**snapshot)
+    make_transient_to_detached(principal)
+    return db.session.merge(principal, load=False)
+
+def _invalidate_principal(kind):
+    def listener(mapper, connection, target):
+        identity_cache.invalidate((kind, target.id))
+    return listener
+
+for _kind, _model in PRINCIPAL_MODELS.items():
+    event.listen(_model, 'after_update', _invalidate_principal(_kind))
+    event.listen(_model, 'after_delete', _invalidate_principal(_kind))
@@ -0,0 +1,62 @@
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/csv'}
+
+def init_compression(app):
+    """Compress responses according to Accept-Encoding (br when available, else gzip)
+
+    Buffered responses are compressed when they reach COMPRESS_MIN_SIZE bytes;
+    streamed exports are gzip-compressed chunk by chunk so they stay streamed.
+    """
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    level = app.config.get('COMPRESS_LEVEL', 6)
+    br_quality = app.config.get('COMPRESS_BR_QUALITY', 4)
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        if response.is_streamed:
+            if request.accept_encodings['gzip']:
+                response.response = _gzip_stream(response.response, level)
+                response.headers.pop('Content-Length', None)
+                response.headers['Content-Encoding'] = 'gzip'
+            return response
+
+        if response.calculate_content_length() < min_size:
+            return response
+
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if encoding == 'br':
+            response.set_data(brotli.compress(data, quality=br_quality))
+        else:
+            response.set_data(gzip.compress(data, compresslevel=level, mtime=0))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+def _gzip_stream(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
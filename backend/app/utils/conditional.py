@@ -0,0 +1,61 @@
+import hashlib
+from functools import wraps
+from datetime import timezone
+from flask import g, request, make_response
+from flask_jwt_extended import get_jwt_identity
+from app.models.cache_version import CacheVersion
+
+def conditional(*tables):
+    """Answer GETs with ETag / Last-Modified and reply 304 while nothing changed
+
+    The validator is built from the cache_versions rows of every table the
+    response reads (including embedded relationships), the full request path
+    and the caller's identity. Checking it costs one primary-key query and
+    happens before the view runs, so a 304 neither loads nor serializes rows.
+    Must be applied below the jwt_required/admin_required decorator.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = compute_validators(tables)
+
+            if is_not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            # Clients may keep the copy but must revalidate it; it varies per user
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Authorization')
+            return response
+        return wrapper
+    return decorator
+
+def compute_validators(tables):
+    """(etag, last_modified) for the current request over the given tables"""
+    versions = CacheVersion.snapshot(tables)
+    # Shared with in-process caches so the body matches the validator
+    g.cache_versions = versions
+
+    digest = hashlib.sha1()
+    digest.update(request.full_path.encode('utf-8'))
+    digest.update(str(get_jwt_identity()).encode('utf-8'))
+    for table in tables:
+        digest.update(f"|{table}:{versions[table][0]}".encode('utf-8'))
+
+    changed = [changed_at for _, changed_at in versions.values() if changed_at]
+    last_modified = max(changed).replace(tzinfo=timezone.utc, microsecond=0) if changed else None
+    return digest.hexdigest(), last_modified
+
+def is_not_modified(etag, last_modified):
+    """If-None-Match wins over If-Modified-Since (RFC 9110)"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+    return False
@@ -0,0 +1,90 @@
+from marshmallow import fields
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload, load_only
+
+def eager_load_options(model, schema, columns=False, always=()):
+    """Build loader options for every relationship a schema will serialize
+
+    Relationships are found from the schema's dump fields: nested fields
+    (Nested / List(Nested)) and dotted attributes such as 'user.nome'.
+    Collections use selectinload (one extra SELECT per page), scalar
+    relationships use joinedload (same SELECT), so the number of statements
+    per page does not depend on the page size.
+
+    Args:
+        model: SQLAlchemy model class being queried
+        schema: Marshmallow schema instance used to dump the results
+        columns: Also restrict every level to the columns the schema reads
+            (load_only), plus primary keys and the keys relationships join on
+        always: Columns of `model` loaded even if the schema does not read them
+
+    A field whose attribute is a Python property declares the columns it
+    reads with metadata={'columns': (...)}.
+    """
+    return list(_loader_options(model, schema, None, columns, always))
+
+def _loader_options(model, schema, parent, columns, always=()):
+    mapper = inspect(model)
+    relationships = mapper.relationships
+    seen = set()
+    column_keys = {column.key for column in always}
+    column_keys.update(_primary_key_names(mapper))
+    # Relationships read only through dotted attributes ('user.nome'): option and columns read
+    dotted = {}
+
+    for name, field in schema.fields.items():
+        if field.load_only or name in schema.exclude:
+            continue
+
+        attribute_name, _, rest = (field.attribute or name).partition('.')
+        if field.metadata.get('columns'):
+            column_keys.update(field.metadata['columns'])
+            continue
+        if attribute_name in mapper.column_attrs:
+            column_keys.add(attribute_name)
+            continue
+        if attribute_name not in relationships:
+            continue
+        if attribute_name in dotted:
+            dotted[attribute_name][1].add(rest)
+        if attribute_name in seen:
+            continue
+        seen.add(attribute_name)
+
+        relationship = relationships[attribute_name]
+        column_keys.update(mapper.get_property_by_column(column).key for column in relationship.local_columns)
+        attribute = getattr(model, attribute_name)
+        if parent is None:
+            option = selectinload(attribute) if relationship.uselist else joinedload(attribute)
+        else:
+            option = parent.selectinload(attribute) if relationship.uselist else parent.joinedload(attribute)
+        yield option
+
+        nested = nested_schema(field)
+        if nested is not None:
+            yield from _loader_options(relationship.mapper.class_, nested, option, columns)
+        elif rest:
+            dotted[attribute_name] = (option, {rest})
+
+    if not columns:
+        return
+
+    attributes = [getattr(model, key) for key in sorted(column_keys)]
+    yield load_only(*attributes) if parent is None else parent.load_only(*attributes)
+
+    for attribute_name, (option, keys) in dotted.items():
+        target = relationships[attribute_name].mapper
+        if all(key in target.column_attrs for key in keys):
+            keys = sorted(keys | set(_primary_key_names(target)))
+            yield option.load_only(*[getattr(target.class_, key) for key in keys])
+
+def _primary_key_names(mapper):
+    return [mapper.get_property_by_column(column).key for column in mapper.primary_key]
+
+def nested_schema(field):
+    """Schema of a Nested / List(Nested) field, None for other fields"""
+    if isinstance(field, fields.List):
+        field = field.inner
+    if isinstance(field, fields.Nested):
+        return field.schema
+    return None
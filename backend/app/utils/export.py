@@ -0,0 +1,79 @@
+import csv
+import io
+from flask import Response, current_app, stream_with_context
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+def stream_export(query, schema, fmt, filename, csv_columns=None, batch_size=500):
+    """Stream every row of a query as NDJSON or CSV
+
+    Rows are fetched `batch_size` at a time with yield_per and written out in
+    batches, so memory use does not depend on the size of the result.
+
+    Args:
+        query: SQLAlchemy query (filters and eager loading already applied), or
+            any iterable of rows that already streams itself
+        schema: Marshmallow schema instance used to dump each row
+        fmt: 'ndjson' or 'csv'
+        filename: Download name, without extension
+        csv_columns: [(header, dotted path into the dumped row)]; defaults to the schema's fields
+        batch_size: Rows fetched per round-trip and written per chunk
+    """
+    rows = query.yield_per(batch_size) if hasattr(query, 'yield_per') else query
+
+    if fmt == 'csv':
+        columns = csv_columns or [(name, name) for name in schema.dump_fields]
+        body = _csv_chunks(rows, schema, columns, batch_size)
+    else:
+        body = _ndjson_chunks(rows, schema, batch_size)
+
+    return Response(
+        stream_with_context(body),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}.{fmt}'}
+    )
+
+def _ndjson_chunks(rows, schema, batch_size):
+    dumps = current_app.json.dumps
+    lines = []
+    for row in rows:
+        lines.append(dumps(schema.dump(row)))
+        if len(lines) >= batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+def _csv_chunks(rows, schema, columns, batch_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for header, _ in columns])
+
+    pending = 0
+    for row in rows:
+        data = schema.dump(row)
+        writer.writerow([_resolve(data, path.split('.')) for _, path in columns])
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+def _resolve(value, parts):
+    """Follow a dotted path through dumped data; lists are joined with '|'"""
+    for i, part in enumerate(parts):
+        if isinstance(value, list):
+            return '|'.join(str(_resolve(item, parts[i:])) for item in value)
+        if not isinstance(value, dict):
+            return ''
+        value = value.get(part)
+    if value is None:
+        return ''
+    return value
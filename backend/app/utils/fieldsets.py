@@ -0,0 +1,156 @@
+from functools import lru_cache
+from flask import request
+from app.utils.eager_loading import eager_load_options, nested_schema
+
+class Fieldsets:
+    """Sparse fieldsets (?fields=) and expand controls (?expand=) for one endpoint
+
+    `fields` lists the attributes to return, dotted for embedded objects
+    (fields=id,data_hora,patient.nome); a bare relationship name returns it
+    whole. `expand` lists the relationships to embed (expand=patient,procedures,
+    dotted for deeper ones: expand=patient.responsible); when it is given,
+    relationships it does not name are left out unless `fields` asks for them,
+    so expand= alone returns no relationships.
+
+    Without either parameter resolve() returns the endpoint's own schema and
+    loader options. Otherwise it returns a schema built with only= and
+    options that load just the selected relationships and, with load_only,
+    just the columns that schema reads. Both are cached per selection.
+    """
+
+    def __init__(self, model, schema, options, always=(), maxsize=64):
+        """
+        Args:
+            model: SQLAlchemy model class being queried
+            schema: Full schema instance used when no selection is requested
+            options: Loader options for the full schema (eager_load_options)
+            always: Columns loaded for every selection (e.g. cursor columns)
+            maxsize: Distinct selections kept compiled
+        """
+        self.model = model
+        self.schema = schema
+        self.options = options
+        self.always = tuple(always)
+        self._build = lru_cache(maxsize=maxsize)(self._build_uncached)
+
+    def selected(self):
+        """Sorted only= entries for the current request, None without fields/expand
+
+        Raises:
+            ValueError: if fields/expand name something the schema does not serialize
+        """
+        # An empty fields= selects nothing useful; treat it as absent
+        requested_fields = _parse_list('fields') or None
+        requested_expand = _parse_list('expand')
+        if requested_fields is None and requested_expand is None:
+            return None
+        return tuple(sorted(selection(self.schema, requested_fields, requested_expand)))
+
+    def resolve(self):
+        """(schema, loader options) for the current request
+
+        Raises:
+            ValueError: if fields/expand name something the schema does not serialize
+        """
+        only = self.selected()
+        if only is None:
+            return self.schema, self.options
+        return self._build(only)
+
+    def project(self, items):
+        """Apply the current request's selection to items already dumped by the schema
+
+        For pre-serialized snapshots (the procedure catalog) that never reach the ORM.
+
+        Raises:
+            ValueError: if fields/expand name something the schema does not serialize
+        """
+        only = self.selected()
+        if only is None:
+            return items
+        return [_project(item, self.schema, only) for item in items]
+
+    def _build_uncached(self, only):
+        schema = type(self.schema)(only=only)
+        return schema, eager_load_options(self.model, schema, columns=True, always=self.always)
+
+def selection(schema, requested_fields, requested_expand):
+    """Marshmallow only= entries for a schema given sets of dotted paths (None = not given)
+
+    Raises:
+        ValueError: if a path names a field the schema does not serialize
+    """
+    dump_fields = schema.dump_fields
+    related = {name for name, field in dump_fields.items() if nested_schema(field) is not None}
+
+    heads = {}
+    for path in requested_fields or ():
+        head, _, rest = path.partition('.')
+        if head not in dump_fields or (rest and head not in related):
+            raise ValueError(f"Campo inválido em fields: '{path}'")
+        if not rest:
+            # Bare relationship name: the whole object
+            heads[head] = None
+        elif heads.setdefault(head, set()) is not None:
+            heads[head].add(rest)
+
+    expands = {}
+    for path in requested_expand or ():
+        head, _, rest = path.partition('.')
+        if head not in related:
+            raise ValueError(f"Relacionamento inválido em expand: '{path}'")
+        expands.setdefault(head, set())
+        if rest:
+            expands[head].add(rest)
+
+    if requested_fields is None:
+        names = set(dump_fields) - related
+    else:
+        names = {head for head in heads if head not in related}
+    if requested_expand is None and requested_fields is None:
+        names |= related
+
+    only = set(names)
+    for name in related:
+        in_fields = requested_fields is not None and name in heads
+        in_expand = requested_expand is not None and name in expands
+        if not (in_fields or in_expand or (requested_fields is None and requested_expand is None)):
+            continue
+
+        sub_fields = heads[name] if in_fields else None
+        sub_expand = None if requested_expand is None else expands.get(name, set())
+
+        nested = nested_schema(dump_fields[name])
+        if sub_fields is None and sub_expand is None:
+            only.add(name)
+        else:
+            only.update(f"{name}.{entry}" for entry in selection(nested, sub_fields, sub_expand))
+    return only
+
+def _project(item, schema, only):
+    """Restrict one dumped item to only= entries"""
+    out = {}
+    grouped = {}
+    for entry in only:
+        head, _, rest = entry.partition('.')
+        grouped.setdefault(head, set())
+        if rest:
+            grouped[head].add(rest)
+    for name, field in schema.dump_fields.items():
+        if name not in grouped:
+            continue
+        key = field.data_key or name
+        if key not in item:
+            continue
+        value, rest = item[key], grouped[name]
+        nested = nested_schema(field)
+        if rest and nested is not None and value is not None:
+            value = [_project(v, nested, rest) for v in value] if isinstance(value, list) else _project(value, nested, rest)
+        out[key] = value
+    return out
+
+def _parse_list(name):
+    """Comma-separated request arg as a set, or None when absent"""
+    if name not in request.args:
+        return None
+    return {part.strip() for part in request.args.get(name, '').split(',') if part.strip()}
@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+from itertools import islice
+
+def open_text_stream(stream, encoding='utf-8-sig'):
+    """Wrap a binary request stream so it can be read line by line"""
+    return io.TextIOWrapper(stream, encoding=encoding, newline='')
+
+def iter_csv_records(text_stream):
+    """Yield (row_number, record, error) for each CSV data row
+
+    Header names with dots (e.g. 'responsible.cpf') become nested dicts.
+    Empty cells are dropped so optional fields stay absent.
+    """
+    reader = csv.DictReader(text_stream)
+    for row_number, row in enumerate(reader, start=1):
+        if None in row:
+            yield row_number, None, "Número de colunas inválido"
+            continue
+        yield row_number, unflatten({k: v for k, v in row.items() if v not in ('', None)}), None
+
+def iter_ndjson_records(text_stream):
+    """Yield (row_number, record, error) for each non-blank NDJSON line"""
+    row_number = 0
+    for line in text_stream:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield row_number, None, "JSON inválido"
+            continue
+        if not isinstance(record, dict):
+            yield row_number, None, "Cada linha deve ser um objeto JSON"
+            continue
+        yield row_number, record, None
+
+def unflatten(row):
+    """Turn {'a.b': 1} into {'a': {'b': 1}}"""
+    result = {}
+    for key, value in row.items():
+        target = result
+        parts = key.split('.')
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return result
+
+def chunked(iterable, size):
+    """Yield lists of at most `size` items without materializing the iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
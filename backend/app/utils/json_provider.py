@@ -0,0 +1,35 @@
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, producing the same documents as the default one
+
+    Keys stay sorted; Decimal, date/datetime, UUID and dataclasses go through
+    Flask's default() so values match the stdlib provider (marshmallow
+    already dumps dates as ISO strings). Non-ASCII text is written as UTF-8
+    instead of \\u escapes. Calls with stdlib-only kwargs (indent, cls...)
+    fall back to the default provider.
+    """
+
+    options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME \
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumpb(obj).decode('utf-8')
+
+    def dumpb(self, obj, option=0):
+        return orjson.dumps(obj, default=self.default, option=self.options | option)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = 0
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option = orjson.OPT_INDENT_2
+        return self._app.response_class(self.dumpb(obj, option) + b'\n', mimetype=self.mimetype)
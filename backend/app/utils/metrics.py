@@ -0,0 +1,130 @@
+import hmac
+import os
+import time
+from flask import g, jsonify, request, has_request_context
+from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST,
+                               REGISTRY, generate_latest, multiprocess)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+# Set (before the workers start) to aggregate every worker process in /metrics
+MULTIPROC_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+
+# Clients served /metrics without METRICS_TOKEN (the scraper on the same host)
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+REQUEST_LABELS = ('blueprint', 'endpoint', 'method')
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency, handler and after_request hooks included',
+    REQUEST_LABELS, buckets=LATENCY_BUCKETS)
+REQUESTS = Counter(
+    'http_requests_total', 'Requests by response status', REQUEST_LABELS + ('status',))
+REQUEST_SQL_STATEMENTS = Histogram(
+    'http_request_sql_statements', 'SQL statements executed per request',
+    REQUEST_LABELS, buckets=STATEMENT_BUCKETS)
+REQUEST_SQL_SECONDS = Histogram(
+    'http_request_sql_seconds', 'Time spent executing SQL per request',
+    REQUEST_LABELS, buckets=LATENCY_BUCKETS)
+SQL_STATEMENTS = Counter(
+    'sql_statements_total', 'SQL statements executed, in and out of requests')
+POOL_CHECKOUTS = Counter(
+    'db_pool_checkouts_total', 'Connections checked out of the SQLAlchemy pool')
+POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out', 'Connections currently checked out', multiprocess_mode='livesum')
+AUDIT_QUEUE_DEPTH = Gauge(
+    'audit_queue_depth', 'Audit entries waiting for the async writer (AUDIT_SINK=async)',
+    multiprocess_mode='livesum')
+
+def init_metrics(app):
+    """Record request, SQL and pool metrics and serve them at /metrics
+
+    Register before other after_request hooks (Flask runs them in reverse),
+    so the latency includes them. With PROMETHEUS_MULTIPROC_DIR set, every
+    worker writes its samples there and /metrics sums them (gunicorn.conf.py
+    cleans up after exited workers). /metrics requires METRICS_TOKEN as a
+    bearer token when it is set, and is only served to loopback clients
+    otherwise.
+    """
+    _install_sql_hooks()
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.sql_statements = 0
+        g.sql_seconds = 0.0
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        labels = (request.blueprint or '', request.endpoint or 'unmatched', request.method)
+        REQUEST_LATENCY.labels(*labels).observe(time.perf_counter() - start)
+        REQUESTS.labels(*labels, str(response.status_code)).inc()
+        REQUEST_SQL_STATEMENTS.labels(*labels).observe(g.get('sql_statements', 0))
+        REQUEST_SQL_SECONDS.labels(*labels).observe(g.get('sql_seconds', 0.0))
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus text exposition (all workers when PROMETHEUS_MULTIPROC_DIR is set)"""
+        if not _scrape_allowed(app.config.get('METRICS_TOKEN')):
+            return jsonify({'error': 'Acesso às métricas não autorizado'}), 401, {'WWW-Authenticate': 'Bearer'}
+        if os.environ.get(MULTIPROC_DIR_ENV):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return generate_latest(registry), 200, {'Content-Type': CONTENT_TYPE_LATEST}
+
+def _scrape_allowed(token):
+    """Bearer token matches METRICS_TOKEN, or no token is configured and the client is local
+
+    remote_addr, not X-Forwarded-For: behind a proxy every client needs the token.
+    """
+    if not token:
+        return request.remote_addr in LOOPBACK_ADDRESSES
+    scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(supplied.strip().encode(), token.encode())
+
+_hooks_installed = False
+
+def _install_sql_hooks():
+    """Listen on every Engine and Pool (once per process)"""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_query_start'].pop()
+        SQL_STATEMENTS.inc()
+        if has_request_context() and 'sql_statements' in g:
+            g.sql_statements += 1
+            g.sql_seconds += elapsed
+
+    @event.listens_for(Engine, 'handle_error')
+    def handle_error(context):
+        # Failed statements never reach after_cursor_execute
+        starts = context.connection.info.get('metrics_query_start') if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+    @event.listens_for(Pool, 'checkout')
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKOUTS.inc()
+        POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(Pool, 'checkin')
+    def checkin(dbapi_connection, connection_record):
+        POOL_CHECKED_OUT.dec()
@@ -1,32 +1,44 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
 from flask import request, jsonify
+from sqlalchemy import and_, or_
 
-def paginate_query(query, page=None, per_page=None, schema=None):
+def paginate_query(query, page=None, per_page=None, schema=None, cursor_columns=None, descending=True):
     """Paginate a SQLAlchemy query
-    
+
     Args:
         query: SQLAlchemy query object
         page: Page number (default from request args)
         per_page: Items per page (default from request args)
         schema: Marshmallow schema instance for serialization (optional)
+        cursor_columns: Columns identifying the sort key, last one unique (enables ?cursor=)
+        descending: Sort direction used for cursor pagination
     """
-    page = page or request.args.get('page', 1, type=int)
     per_page = per_page or request.args.get('limit', 10, type=int)
-    
+
     # Limit per_page to prevent abuse
     per_page = min(per_page, 100)
-    
+
+    # Keyset mode: only when the endpoint supports it and the client asked for it
+    if cursor_columns and 'cursor' in request.args:
+        return paginate_cursor(query, cursor_columns, request.args.get('cursor'), per_page, schema, descending)
+
+    page = page or request.args.get('page', 1, type=int)
+
     pagination = query.paginate(
         page=page,
         per_page=per_page,
         error_out=False
     )
-    
+
     # Use schema if provided, otherwise fallback to to_dict (for backward compatibility)
     if schema:
         items = schema.dump(pagination.items, many=True)
     else:
         items = [item.to_dict() for item in pagination.items]
-    
+
     return {
         'items': items,
         'pagination': {
@@ -37,4 +49,133 @@ def paginate_query(query, page=None, per_page=None, schema=None):
             'has_next': pagination.has_next,
             'has_prev': pagination.has_prev
         }
-    }
\ No newline at end of file
+    }
+
+def paginate_cursor(query, cursor_columns, cursor, per_page, schema=None, descending=True):
+    """Keyset pagination: seeks past the last seen key instead of COUNT + OFFSET
+
+    Raises:
+        ValueError: if the cursor token is malformed
+    """
+    columns = list(cursor_columns)
+    ordering = [col.desc() if descending else col.asc() for col in columns]
+    query = query.order_by(None).order_by(*ordering)
+
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        query = query.filter(_seek_condition(columns, values, descending))
+
+    # Fetch one extra row to know whether there is a next page
+    rows = query.limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    next_cursor = None
+    if has_next and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, col.key) for col in columns])
+
+    if schema:
+        items = schema.dump(rows, many=True)
+    else:
+        items = [item.to_dict() for item in rows]
+
+    return {
+        'items': items,
+        'pagination': {
+            'per_page': per_page,
+            'cursor': cursor or None,
+            'next_cursor': next_cursor,
+            'has_next': has_next
+        }
+    }
+
+def _seek_condition(columns, values, descending):
+    """Build (a, b) < (x, y) as OR/AND so it works on any backend and uses the index"""
+    conditions = []
+    for i, col in enumerate(columns):
+        equals = [columns[j] == values[j] for j in range(i)]
+        beyond = col < values[i] if descending else col > values[i]
+        conditions.append(and_(*equals, beyond))
+    return or_(*conditions)
+
+def encode_cursor(values):
+    """Encode the last row's sort key as an opaque URL-safe token"""
+    payload = [v.isoformat() if isinstance(v, (date, datetime)) else str(v) if isinstance(v, Decimal) else v
+               for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token, columns):
+    """Decode a cursor token back into typed values for the given columns"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('Cursor inválido')
+
+    if not isinstance(payload, list) or len(payload) != len(columns):
+        raise ValueError('Cursor inválido')
+
+    values = []
+    for col, value in zip(columns, payload):
+        if value is None:
+            raise ValueError('Cursor inválido')
+        try:
+            python_type = col.type.python_type
+        except NotImplementedError:
+            python_type = None
+        try:
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            elif python_type is Decimal:
+                value = Decimal(value)
+        except (ValueError, TypeError, ArithmeticError):
+            raise ValueError('Cursor inválido')
+        values.append(value)
+    return values
+
+def paginate_catalog(catalog, cursor_columns, per_page=None):
+    """Paginate an in-memory sorted snapshot with the same response shape as paginate_query
+
+    The catalog provides pre-serialized `serialized` items, their sort `keys`
+    (matching cursor_columns, ascending) and page_start(key) for ?cursor=.
+
+    Raises:
+        ValueError: if the cursor token is malformed
+    """
+    per_page = max(min(per_page or request.args.get('limit', 10, type=int), 100), 1)
+    items = catalog.serialized
+    
+    if 'cursor' in request.args:
+        cursor = request.args.get('cursor')
+        start = catalog.page_start(decode_cursor(cursor, cursor_columns)) if cursor else 0
+        end = start + per_page
+        has_next = end < len(items)
+        return {
+            'items': list(items[start:end]),
+            'pagination': {
+                'per_page': per_page,
+                'cursor': cursor or None,
+                'next_cursor': encode_cursor(catalog.keys[end - 1]) if has_next else None,
+                'has_next': has_next
+            }
+        }
+    
+    page = max(request.args.get('page', 1, type=int), 1)
+    total = len(items)
+    pages = -(-total // per_page) if per_page > 0 else 0
+    start = (page - 1) * per_page
+    return {
+        'items': list(items[start:start + per_page]),
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': pages,
+            'has_next': page < pages,
+            'has_prev': page > 1
+        }
+    }
@@ -0,0 +1,29 @@
+from sqlalchemy import event
+from app import db
+
+def init_sqlite_pragmas(app):
+    """Run PRAGMA name=value for each SQLITE_PRAGMAS entry on every new connection
+
+    No-op without SQLITE_PRAGMAS or on other databases. journal_mode=WAL is
+    stored in the database file; the others only last for the connection,
+    hence the connect hook rather than a one-off statement.
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+    
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+    
+    statements = [f"PRAGMA {name}={value}" for name, value in pragmas.items()]
+    
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
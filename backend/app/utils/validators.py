@@ -1,5 +1,13 @@
 import re
 from datetime import date
+import numpy as np
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+NON_DIGIT_PATTERN = re.compile(r'\D')
+
+# Check digit weights: 10..2 over the first 9 digits, 11..2 over the first 10
+CPF_WEIGHTS_1 = np.arange(10, 1, -1)
+CPF_WEIGHTS_2 = np.arange(11, 1, -1)
 
 def validate_cpf(cpf):
     """Validate CPF format and checksum"""
@@ -25,10 +33,50 @@ def validate_cpf(cpf):
     # Check if calculated digits match
     return cpf[9] == str(digit1) and cpf[10] == str(digit2)
 
+def validate_cpfs(cpfs):
+    """Validate many CPFs at once; returns a boolean mask matching validate_cpf
+
+    Digits of all well-formed values are packed into an (n, 11) matrix and
+    both check digits are computed with two matrix-vector products.
+    """
+    cpfs = list(cpfs)
+    mask = np.zeros(len(cpfs), dtype=bool)
+    
+    positions = []
+    packed = []
+    for i, cpf in enumerate(cpfs):
+        if not cpf.isdecimal():
+            cpf = NON_DIGIT_PATTERN.sub('', cpf)
+        if len(cpf) != 11:
+            continue
+        if not cpf.isascii():
+            # Non-ASCII Unicode digits: leave the exact semantics to the scalar path
+            mask[i] = validate_cpf(cpf)
+            continue
+        positions.append(i)
+        packed.append(cpf)
+    
+    if not packed:
+        return mask
+    
+    digits = (np.frombuffer(''.join(packed).encode('ascii'), dtype=np.uint8)
+              .reshape(-1, 11).astype(np.int64) - ord('0'))
+    
+    digit1 = ((digits[:, :9] @ CPF_WEIGHTS_1) * 10 % 11) % 10
+    digit2 = ((digits[:, :10] @ CPF_WEIGHTS_2) * 10 % 11) % 10
+    all_same = (digits == digits[:, :1]).all(axis=1)
+    
+    mask[positions] = (digits[:, 9] == digit1) & (digits[:, 10] == digit2) & ~all_same
+    return mask
+
 def validate_email(email):
     """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return EMAIL_PATTERN.match(email) is not None
+
+def validate_emails(emails):
+    """Validate many emails at once; returns a boolean mask matching validate_email"""
+    match = EMAIL_PATTERN.match
+    return np.fromiter((match(email) is not None for email in emails), dtype=bool)
 
 def validate_date(date_string):
     """Validate date format (YYYY-MM-DD)"""
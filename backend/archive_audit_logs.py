@@ -0,0 +1,30 @@
+"""
+Script para mover os logs de auditoria antigos para o arquivo frio
+Cada mês anterior aos últimos AUDIT_HOT_MONTHS vira um arquivo SQLite em
+AUDIT_ARCHIVE_DIR e sai da tabela audit_logs; /audit continua lendo os dois.
+Pode ser agendado (cron) e reexecutado: uma execução interrompida é
+completada pela próxima.
+Execute: python archive_audit_logs.py [meses_quentes]
+"""
+import sys
+from app import create_app
+from app.services.audit_archive import AuditArchiveService
+from config import get_config
+
+def archive_audit_logs(hot_months=None):
+    app = create_app(get_config())
+    
+    with app.app_context():
+        moved, error = AuditArchiveService.archive(int(hot_months) if hot_months else None)
+        
+        for month, count in moved.items():
+            print(f"{month}: {count} registro(s) arquivado(s)")
+        
+        if error:
+            print(f"Erro: {error}")
+            return
+        
+        print(f"Arquivamento concluído: {len(moved)} mês(es)")
+
+if __name__ == '__main__':
+    archive_audit_logs(*sys.argv[1:2])
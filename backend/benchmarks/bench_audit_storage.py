@@ -0,0 +1,163 @@
+"""
+Benchmark: espaço ocupado pelos logs de auditoria, snapshots completos vs delta (com e sem zlib)
+Gera uma sequência realista de ações sobre atendimentos (criação, remarcação,
+troca de duração, de procedimentos ou de convênio, remoção), grava os mesmos
+logs num banco SQLite em arquivo para cada formato e compara o tamanho do
+arquivo após VACUUM, os bytes de old_values/new_values/payload por log e o
+tempo de codificação e de leitura (reconstrução dos snapshots completos).
+Execute (na pasta backend):
+    python -m benchmarks.bench_audit_storage [quantidade]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from sqlalchemy import create_engine, text
+from app.services.audit_archive import segment_table
+from app.utils.audit_payload import FORMAT_FULL, decode_payload, encode_payload
+
+# (nome, codificação dos valores)
+FORMATS = [
+    ('completo', lambda old, new: {
+        'payload_format': FORMAT_FULL, 'payload': None,
+        'old_values': json.dumps(old, default=str) if old is not None else None,
+        'new_values': json.dumps(new, default=str) if new is not None else None,
+    }),
+    ('delta', lambda old, new: encode_payload(old, new, compression='none')),
+    ('delta+zlib', lambda old, new: encode_payload(old, new, compression='zlib')),
+]
+
+# Ações sobre atendimentos: 50% criação, 40% edição, 10% remoção
+ACTIONS = ['CREATE'] * 5 + ['UPDATE'] * 4 + ['DELETE']
+
+# Edições: remarcação, duração, procedimentos (muda o valor), convênio
+EDITS = ['data_hora'] * 5 + ['duracao_minutos'] * 2 + ['procedures'] * 2 + ['tipo']
+
+def uid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def snapshot(rng, procedure_ids, patient_ids, user_ids):
+    """Appointment.to_dict() of a random appointment"""
+    tipo = rng.choice(['particular', 'convenio'])
+    procedures = rng.sample(procedure_ids, rng.randint(1, 3))
+    return {
+        'id': uid(rng),
+        'data_hora': (datetime(2026, 1, 5, 8) + timedelta(minutes=30 * rng.randrange(20000))).isoformat(),
+        'duracao_minutos': rng.choice([30, 30, 30, 45, 60]),
+        'patient_id': rng.choice(patient_ids),
+        'user_id': rng.choice(user_ids),
+        'tipo': tipo,
+        'numero_carteira': f"{rng.randrange(10**11):011d}" if tipo == 'convenio' else None,
+        'valor_total': f"{rng.randint(80, 900)}.00",
+        'procedures': procedures,
+    }
+
+def edit(rng, current, procedure_ids):
+    new = dict(current)
+    field = rng.choice(EDITS)
+    if field == 'data_hora':
+        moved = datetime.fromisoformat(current['data_hora']) + timedelta(minutes=30 * rng.randint(-200, 200))
+        new['data_hora'] = moved.isoformat()
+    elif field == 'duracao_minutos':
+        new['duracao_minutos'] = rng.choice([30, 45, 60, 90])
+    elif field == 'procedures':
+        new['procedures'] = rng.sample(procedure_ids, rng.randint(1, 3))
+        new['valor_total'] = f"{rng.randint(80, 900)}.00"
+    else:
+        new['tipo'] = 'convenio' if current['tipo'] == 'particular' else 'particular'
+        new['numero_carteira'] = f"{rng.randrange(10**11):011d}" if new['tipo'] == 'convenio' else None
+    return new
+
+def generate(count, seed=42):
+    """[(action, old, new)] for `count` audit logs"""
+    rng = random.Random(seed)
+    procedure_ids = [uid(rng) for _ in range(40)]
+    patient_ids = [uid(rng) for _ in range(2000)]
+    user_ids = [uid(rng) for _ in range(20)]
+    live, logs = [], []
+    for _ in range(count):
+        action = rng.choice(ACTIONS) if live else 'CREATE'
+        if action == 'CREATE':
+            new = snapshot(rng, procedure_ids, patient_ids, user_ids)
+            live.append(new)
+            logs.append((action, None, new))
+        elif action == 'UPDATE':
+            i = rng.randrange(len(live))
+            new = edit(rng, live[i], procedure_ids)
+            logs.append((action, live[i], new))
+            live[i] = new
+        else:
+            old = live.pop(rng.randrange(len(live)))
+            logs.append((action, old, None))
+    return logs
+
+def measure(name, encode, logs, directory):
+    start = time.perf_counter()
+    rows = [{
+        'id': str(uuid.UUID(int=i)),
+        'user_id': None,
+        'action': action,
+        'table_name': 'appointments',
+        'record_id': (old or new)['id'],
+        **encode(old, new),
+        'ip_address': '10.0.0.1',
+        'details': None,
+        'created_at': datetime(2026, 1, 1) + timedelta(seconds=i),
+    } for i, (action, old, new) in enumerate(logs)]
+    encode_seconds = time.perf_counter() - start
+
+    payload_bytes = sum(len(row[column] or '') for row in rows
+                        for column in ('old_values', 'new_values', 'payload'))
+
+    path = os.path.join(directory, f'{name}.db')
+    engine = create_engine(f'sqlite:///{path}')
+    segment_table.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(segment_table.insert(), rows)
+    with engine.connect() as connection:
+        connection.execution_options(isolation_level='AUTOCOMMIT').execute(text('VACUUM'))
+    engine.dispose()
+    file_bytes = os.path.getsize(path)
+
+    start = time.perf_counter()
+    for row in rows:
+        decode_payload(SimpleNamespace(**row))
+    decode_seconds = time.perf_counter() - start
+
+    _check(rows, logs)
+    return {
+        'formato': name,
+        'arquivo': file_bytes,
+        'payload': payload_bytes / len(rows),
+        'codificar': encode_seconds / len(rows) * 1e6,
+        'ler': decode_seconds / len(rows) * 1e6,
+    }
+
+def _check(rows, logs):
+    """Every format reads back the exact text the full snapshots were stored as"""
+    for row, (_, old, new) in zip(rows, logs):
+        old_text, new_text = decode_payload(SimpleNamespace(**row))
+        assert old_text == (json.dumps(old, default=str) if old is not None else None), "snapshot antigo diverge"
+        assert new_text == (json.dumps(new, default=str) if new is not None else None), "snapshot novo diverge"
+
+def main(count=100_000):
+    count = int(count)
+    logs = generate(count)
+    mix = {action: sum(1 for a, _, _ in logs if a == action) for action in ('CREATE', 'UPDATE', 'DELETE')}
+    print(f"{count:,} logs ({', '.join(f'{a} {n:,}' for a, n in mix.items())})")
+    print(f"{'formato':<12} {'arquivo':>10} {'vs completo':>12} {'bytes/log':>10} {'codificar':>11} {'ler':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = None
+        for name, encode in FORMATS:
+            row = measure(name, encode, logs, directory)
+            baseline = baseline or row['arquivo']
+            print(f"{row['formato']:<12} {row['arquivo'] / 2**20:>8.1f}MB {row['arquivo'] / baseline:>11.0%} "
+                  f"{row['payload']:>10.0f} {row['codificar']:>9.1f}µs {row['ler']:>7.1f}µs")
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
@@ -0,0 +1,130 @@
+"""
+Benchmark: leitores e escritores concorrentes no SQLite, perfil padrão vs produção
+Para cada perfil cria um banco em arquivo (benchmarks.datagen), dispara N
+leitores (listagem de atendimentos) e M escritores (criação de atendimentos)
+pelo test client durante alguns segundos e mede vazão, latência p95 e
+respostas com erro ("database is locked" e afins). Cada leitor/escritor é um
+processo, como os workers do gunicorn: com threads o GIL serializa boa parte
+do trabalho e esconde a disputa pelos locks do banco.
+O perfil padrão é Config (journal padrão, sem pragmas); o de produção é
+ProductionConfig (WAL, synchronous=NORMAL, busy_timeout, cache, mmap).
+Execute (na pasta backend):
+    python -m benchmarks.bench_concurrency [leitores] [escritores] [segundos] [escala]
+"""
+import contextlib
+import io
+import math
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.models.patient import Patient
+from app.models.user import User
+from app.services.procedure_catalog import get_procedure_catalog
+from app.utils.auth import create_token
+from benchmarks.datagen import ADMIN_EMAIL, populate
+from config import Config, ProductionConfig
+
+PROFILES = [
+    ('padrão', Config),
+    ('produção', ProductionConfig),
+]
+
+def percentile(samples, p):
+    """Nearest-rank percentile of a sorted list"""
+    return samples[max(0, math.ceil(p / 100 * len(samples)) - 1)] if samples else 0.0
+
+def build_app(profile, path, scale):
+    """App for the profile on a new database file populated with `scale` appointments"""
+    config = type('ConcurrencyConfig', (profile,), {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+        'DEBUG': False,
+        'METRICS_ENABLED': False,
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        populate(scale)
+        admin = User.query.filter_by(email=ADMIN_EMAIL).one()
+        payload = {
+            'patient_id': Patient.query.first().id,
+            'user_id': admin.id,
+            'tipo': 'particular',
+            'procedure_ids': [entry.id for entry in get_procedure_catalog().entries[:2]],
+        }
+        headers = {'Authorization': f'Bearer {create_token(admin)}'}
+        # Workers start on fresh connections (never share one across fork), so they all get the pragmas
+        db.engine.dispose()
+    return app, headers, payload
+
+def worker(app, request, number, seconds, barrier, results):
+    """Call request(client, slot) for `seconds`; puts the list of (ok, ms) on `results`
+
+    Slots are unique across workers (number is the worker's position).
+    """
+    client = app.test_client()
+    samples = []
+    # The list endpoint prints debug lines; keep them out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        barrier.wait()
+        deadline = time.perf_counter() + seconds
+        slot = number * 100_000
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = request(client, slot)
+            slot += 1
+            response.get_data()
+            samples.append((response.status_code < 400, (time.perf_counter() - start) * 1000))
+    results.put(samples)
+
+def run_profile(name, profile, readers, writers, seconds, scale):
+    # fork: the children inherit the app built here and open their own connections
+    context = multiprocessing.get_context('fork')
+    with tempfile.TemporaryDirectory() as directory:
+        app, headers, payload = build_app(profile, os.path.join(directory, 'bench.db'), scale)
+
+        def read(client, slot):
+            return client.get('/appointments', query_string={'limit': 20}, headers=headers)
+
+        def write(client, slot):
+            # A free 30-minute slot per request, so no write is rejected as a conflict
+            data_hora = datetime(2040, 1, 1) + timedelta(minutes=30 * slot)
+            return client.post('/appointments', json={**payload, 'data_hora': data_hora.isoformat()}, headers=headers)
+
+        barrier = context.Barrier(readers + writers)
+        queues = {'leituras': context.Queue(), 'escritas': context.Queue()}
+        processes = [context.Process(target=worker, args=(app, read, number, seconds, barrier, queues['leituras']))
+                     for number in range(readers)]
+        processes += [context.Process(target=worker, args=(app, write, number, seconds, barrier, queues['escritas']))
+                      for number in range(writers)]
+        for process in processes:
+            process.start()
+        results = {
+            'leituras': [sample for _ in range(readers) for sample in queues['leituras'].get()],
+            'escritas': [sample for _ in range(writers) for sample in queues['escritas'].get()],
+        }
+        for process in processes:
+            process.join()
+
+    row = {'perfil': name}
+    for kind, samples in results.items():
+        latencies = sorted(ms for ok, ms in samples if ok)
+        row[kind] = len(latencies) / seconds
+        row[f'{kind}_p95'] = percentile(latencies, 95)
+        row[f'{kind}_erros'] = sum(1 for ok, _ in samples if not ok)
+    return row
+
+def main(readers=8, writers=2, seconds=5, scale=2000):
+    readers, writers, seconds, scale = int(readers), int(writers), float(seconds), int(scale)
+    print(f"{readers} leitores x {writers} escritores, {seconds:g}s por perfil, {scale:,} atendimentos")
+    print(f"{'perfil':<10} {'leituras/s':>11} {'p95':>9} {'erros':>6} {'escritas/s':>11} {'p95':>9} {'erros':>6}")
+    for name, profile in PROFILES:
+        row = run_profile(name, profile, readers, writers, seconds, scale)
+        print(f"{row['perfil']:<10} {row['leituras']:>11.1f} {row['leituras_p95']:>7.1f}ms {row['leituras_erros']:>6} "
+              f"{row['escritas']:>11.1f} {row['escritas_p95']:>7.1f}ms {row['escritas_erros']:>6}")
+
+if __name__ == '__main__':
+    main(*sys.argv[1:5])
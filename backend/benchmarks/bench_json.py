@@ -0,0 +1,99 @@
+"""
+Benchmark: serialização e bytes trafegados de páginas de atendimentos
+Compara o provider JSON padrão (stdlib) com o OrjsonProvider e mede o tamanho
+da resposta sem compressão, com gzip e com brotli (se instalado).
+Execute (na pasta backend): python -m benchmarks.bench_json [tamanhos de página...]
+"""
+import gzip
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+from app import create_app, db
+from app.models.user import User
+from app.models.patient import Patient, Responsible
+from app.models.procedure import Procedure
+from app.models.appointment import Appointment
+from app.controllers.appointments import appointment_schema, appointment_load_options
+from app.utils.compression import brotli
+from app.utils.json_provider import OrjsonProvider
+from config import Config
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+def seed(count):
+    """Appointments with every serialized relationship populated"""
+    admin = User(nome='Administrador', email='admin@clinic.com', senha='-', tipo='admin')
+    procedures = [
+        Procedure(nome=f'Procedimento {i}', descricao='Consulta de rotina com avaliação clínica',
+                  valor_plano=Decimal('100.00'), valor_particular=Decimal('150.00'))
+        for i in range(3)
+    ]
+    db.session.add(admin)
+    db.session.add_all(procedures)
+    for i in range(count):
+        patient = Patient(
+            cpf=f'{i:011d}', nome=f'Paciente {i} da Silva', email=f'paciente{i}@clinic.com', senha='-',
+            telefone='11999999999', data_nascimento=date(2015, 1, 1),
+            estado='SP', cidade='São Paulo', bairro='Centro', cep='01001000', rua='Rua Augusta', numero=str(i)
+        )
+        patient.responsible = Responsible(
+            nome=f'Responsável {i}', cpf='11144477735', data_nascimento=date(1980, 1, 1),
+            email=f'responsavel{i}@clinic.com', telefone='11988888888'
+        )
+        patient.appointments.append(Appointment(
+            data_hora=datetime(2025, 6, 1, 8, 0) + timedelta(minutes=30 * i), user=admin,
+            tipo='particular', valor_total=Decimal('450.00'), procedures=procedures
+        ))
+        db.session.add(patient)
+    db.session.commit()
+
+def best_of(fn, repeat):
+    """Fastest of `repeat` runs, in milliseconds, and the last result"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def main(page_sizes):
+    app = create_app(BenchConfig)
+    stdlib = DefaultJSONProvider(app)
+    fast = OrjsonProvider(app)
+
+    with app.app_context():
+        db.create_all()
+        seed(max(page_sizes))
+
+        header = f"{'página':>7} {'dump':>8} {'stdlib':>8} {'orjson':>8} {'speedup':>8} {'bytes':>9} {'gzip':>8} {'ms':>6}"
+        if brotli is not None:
+            header += f" {'br':>8} {'ms':>6}"
+        print(header)
+
+        for size in page_sizes:
+            rows = Appointment.query.options(*appointment_load_options)\
+                .order_by(Appointment.data_hora.desc()).limit(size).all()
+            repeat = max(5, 2000 // size)
+
+            t_dump, items = best_of(lambda: appointment_schema.dump(rows, many=True), repeat)
+            page = {'items': items, 'pagination': {'page': 1, 'per_page': size}}
+            t_std, std_body = best_of(lambda: stdlib.dumps(page).encode('utf-8'), repeat)
+            t_fast, body = best_of(lambda: fast.dumpb(page), repeat)
+            assert stdlib.loads(std_body) == fast.loads(body), "orjson diverge do provider padrão"
+
+            t_gzip, gzipped = best_of(lambda: gzip.compress(body, compresslevel=app.config['COMPRESS_LEVEL']), repeat)
+            line = (f"{size:>7} {t_dump:>6.2f}ms {t_std:>6.2f}ms {t_fast:>6.2f}ms {t_std / t_fast:>7.1f}x "
+                    f"{len(body):>9,} {len(gzipped):>8,} {t_gzip:>6.2f}")
+            if brotli is not None:
+                t_br, compressed = best_of(lambda: brotli.compress(body, quality=app.config['COMPRESS_BR_QUALITY']), repeat)
+                line += f" {len(compressed):>8,} {t_br:>6.2f}"
+            print(line)
+
+    print("dump = marshmallow (igual para os dois providers); stdlib/orjson = só a codificação JSON")
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10, 50, 100])
@@ -0,0 +1,50 @@
+"""
+Benchmark: custo por registro do dump marshmallow vs serializador compilado
+Mede AppointmentSchema, PatientSchema e AuditLogSchema sobre registros do
+banco de verificação (check_query_plans), já carregados na sessão.
+Execute (na pasta backend): python -m benchmarks.bench_serializers [registros]
+"""
+import sys
+from app import create_app, db
+from app.models.appointment import Appointment
+from app.models.audit_log import AuditLog
+from app.models.patient import Patient
+from app.schemas.appointment_schema import AppointmentSchema
+from app.schemas.audit_schema import AuditLogSchema
+from app.schemas.patient_schema import PatientSchema
+from benchmarks.bench_json import best_of
+from check_query_plans import PlanCheckConfig, seed
+from check_serializers import marshmallow_only
+
+CASES = [
+    (AppointmentSchema, Appointment),
+    (PatientSchema, Patient),
+    (AuditLogSchema, AuditLog),
+]
+
+def main(limit):
+    app = create_app(PlanCheckConfig)
+
+    with app.app_context():
+        db.create_all()
+        seed()
+
+        print(f"{'schema':<18} {'linhas':>7} {'marshmallow':>12} {'compilado':>10} {'speedup':>8}")
+        for schema_cls, model in CASES:
+            rows = model.query.limit(limit).all()
+            reference, compiled = marshmallow_only(schema_cls()), schema_cls()
+            reference.dump(rows, many=True)  # load lazy relationships before timing
+            repeat = max(5, 5000 // max(len(rows), 1))
+
+            t_ref, expected = best_of(lambda: reference.dump(rows, many=True), repeat)
+            t_fast, actual = best_of(lambda: compiled.dump(rows, many=True), repeat)
+            assert app.json.dumps(expected) == app.json.dumps(actual), "saída compilada diverge do marshmallow"
+
+            per_row = 1_000_000 / max(len(rows), 1) / 1000
+            print(f"{schema_cls.__name__:<18} {len(rows):>7} {t_ref * per_row:>9.1f}µs "
+                  f"{t_fast * per_row:>8.1f}µs {t_ref / t_fast:>7.1f}x")
+
+    print("tempos por registro (melhor de várias execuções), relacionamentos já carregados")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
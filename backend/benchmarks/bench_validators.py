@@ -0,0 +1,54 @@
+"""
+Micro-benchmark: validação de CPF/email escalar vs. em lote (NumPy)
+Execute (na pasta backend): python -m benchmarks.bench_validators [quantidade]
+"""
+import sys
+import time
+import numpy as np
+from app.utils.validators import validate_cpf, validate_cpfs, validate_email, validate_emails
+
+def generate_cpfs(count, seed=42):
+    """Random CPFs: ~70% valid, ~20% wrong check digit, ~10% formatted with punctuation"""
+    rng = np.random.default_rng(seed)
+    digits = rng.integers(0, 10, size=(count, 11))
+    digits[:, 9] = ((digits[:, :9] @ np.arange(10, 1, -1)) * 10 % 11) % 10
+    digits[:, 10] = ((digits[:, :10] @ np.arange(11, 1, -1)) * 10 % 11) % 10
+
+    broken = rng.random(count) < 0.2
+    digits[broken, 10] = (digits[broken, 10] + 1) % 10
+
+    cpfs = [''.join(map(str, row)) for row in digits.tolist()]
+    for i in np.flatnonzero(rng.random(count) < 0.1):
+        cpf = cpfs[i]
+        cpfs[i] = f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}"
+    return cpfs
+
+def generate_emails(count):
+    return [f"paciente{i}@clinic.com" if i % 10 else f"invalido{i}" for i in range(count)]
+
+def timed(label, fn, count):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s  {count / elapsed:12,.0f} itens/s")
+    return result, elapsed
+
+def main(count):
+    print(f"Gerando {count:,} CPFs e emails...")
+    cpfs = generate_cpfs(count)
+    emails = generate_emails(count)
+
+    scalar_cpf, t_scalar = timed('validate_cpf (escalar)', lambda: [validate_cpf(c) for c in cpfs], count)
+    batch_cpf, t_batch = timed('validate_cpfs (lote)', lambda: validate_cpfs(cpfs), count)
+    print(f"  speedup: {t_scalar / t_batch:.1f}x")
+    assert batch_cpf.tolist() == scalar_cpf, "validate_cpfs diverge de validate_cpf"
+
+    scalar_email, t_scalar = timed('validate_email (escalar)', lambda: [validate_email(e) for e in emails], count)
+    batch_email, t_batch = timed('validate_emails (lote)', lambda: validate_emails(emails), count)
+    print(f"  speedup: {t_scalar / t_batch:.1f}x")
+    assert batch_email.tolist() == scalar_email, "validate_emails diverge de validate_email"
+
+    print(f"Resultados idênticos ({int(batch_cpf.sum()):,} CPFs válidos, {int(batch_email.sum()):,} emails válidos)")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,291 @@
+"""
+Gerador de dados sintéticos da clínica para benchmarks
+Insere usuários, procedimentos, pacientes (CPFs válidos, responsáveis para
+menores), atendimentos com procedimentos vinculados e logs de auditoria em
+lotes com INSERT em massa, de forma determinística para uma mesma semente.
+A escala é o número de atendimentos (10k, 1m, 10m ou um inteiro); os demais
+volumes são proporcionais. Ao final recalcula a tabela daily_stats; o índice
+de busca e cache_versions são mantidos pelos triggers.
+Execute (na pasta backend):
+    python -m benchmarks.datagen sqlite:///bench.db [escala] [semente]
+"""
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import insert
+from app import create_app, db
+from app.models.appointment import Appointment, AppointmentProcedure
+from app.models.audit_log import AuditLog
+from app.models.patient import Patient, Responsible
+from app.models.procedure import Procedure
+from app.models.user import User
+from app.services.daily_stats_service import DailyStatsService
+from app.utils.auth import hash_password
+from config import Config
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+# Every generated user and patient logs in with this password
+BENCH_PASSWORD = 'bench123'
+ADMIN_EMAIL = 'admin@clinic.com'
+
+PROCEDURE_COUNT = 60
+CHUNK_SIZE = 10_000
+
+FIRST_NAMES = ['Maria', 'José', 'Ana', 'João', 'Antônio', 'Francisca', 'Carlos', 'Paulo', 'Adriana',
+               'Lucas', 'Juliana', 'Marcos', 'Fernanda', 'Rafael', 'Patrícia', 'Bruno', 'Aline', 'Gabriel']
+LAST_NAMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira',
+              'Lima', 'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes']
+CITIES = [('SP', 'São Paulo'), ('RJ', 'Rio de Janeiro'), ('MG', 'Belo Horizonte'), ('BA', 'Salvador'),
+          ('PR', 'Curitiba'), ('RS', 'Porto Alegre'), ('PE', 'Recife'), ('CE', 'Fortaleza')]
+AUDIT_ACTIONS = ['CREATE', 'UPDATE', 'DELETE', 'LOGIN']
+AUDIT_TABLES = ['appointments', 'patients', 'procedures', 'users']
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+    DEBUG = False
+    # Deterministic query counts: version checks run on every request (like
+    # a worker that always sees another one's writes) and TTL caches never
+    # expire during a run, so no query depends on timing
+    PROCEDURE_CATALOG_CHECK_INTERVAL = 0.0
+    AVAILABILITY_CHECK_INTERVAL = 0.0
+    AUDIT_ARCHIVE_CHECK_INTERVAL = 0.0
+    IDENTITY_CACHE_TTL = 24 * 3600
+    ANALYTICS_CACHE_TTL = 24 * 3600
+
+def parse_scale(value):
+    """'10k' / '1m' / '10m' or a plain number of appointments"""
+    value = str(value).lower()
+    return SCALES[value] if value in SCALES else int(value.replace('_', ''))
+
+def volumes(scale):
+    """Row counts per table for a number of appointments"""
+    return {
+        'users': max(5, scale // 5000),
+        'procedures': PROCEDURE_COUNT,
+        'patients': max(10, scale // 4),
+        'appointments': scale,
+        'audit_logs': scale,
+    }
+
+def make_cpf(base):
+    """Valid CPF from a 9-digit base (bases with all digits equal are avoided by callers)"""
+    digits = [int(d) for d in f'{base:09d}']
+    digit1 = (sum(d * w for d, w in zip(digits, range(10, 1, -1))) * 10 % 11) % 10
+    digits.append(digit1)
+    digit2 = (sum(d * w for d, w in zip(digits, range(11, 1, -1))) * 10 % 11) % 10
+    return f'{base:09d}{digit1}{digit2}'
+
+class Generator:
+    """Deterministic row factory; ids are UUIDs drawn from the seeded RNG"""
+
+    def __init__(self, scale, seed=42, now=None):
+        self.rng = random.Random(seed)
+        self.counts = volumes(scale)
+        self.now = now or datetime.utcnow().replace(microsecond=0)
+        self.senha = hash_password(BENCH_PASSWORD)
+        self.user_ids = []
+        self.patient_ids = []
+        self.procedures = []
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def timestamp(self, days=365):
+        """Moment in the last `days` days"""
+        return self.now - timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def name(self):
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def users(self):
+        for i in range(self.counts['users']):
+            user_id = self.uuid()
+            self.user_ids.append(user_id)
+            created = self.timestamp()
+            yield {
+                'id': user_id,
+                'nome': 'Administrador' if i == 0 else self.name(),
+                'email': ADMIN_EMAIL if i == 0 else f'usuario{i}@bench.clinic',
+                'senha': self.senha,
+                'tipo': 'admin' if i == 0 else 'default',
+                'created_at': created,
+                'updated_at': created,
+            }
+
+    def procedure_rows(self):
+        for i in range(self.counts['procedures']):
+            plano = Decimal(self.rng.randrange(5000, 50000)) / 100
+            created = self.timestamp()
+            row = {
+                'id': self.uuid(),
+                'nome': f'Procedimento {i:03d}',
+                'descricao': 'Procedimento gerado para benchmark',
+                'valor_plano': plano,
+                'valor_particular': (plano * Decimal('1.5')).quantize(Decimal('0.01')),
+                'created_at': created,
+                'updated_at': created,
+            }
+            self.procedures.append(row)
+            yield row
+
+    def patients(self):
+        """(patient rows, responsible rows) per chunk; about one patient in five is a minor"""
+        patients, responsibles = [], []
+        for i in range(self.counts['patients']):
+            patient_id = self.uuid()
+            self.patient_ids.append(patient_id)
+            created = self.timestamp()
+            minor = self.rng.random() < 0.2
+            birth = date(2010 if minor else 1950, 1, 1) + timedelta(days=self.rng.randrange(365 * (12 if minor else 50)))
+            estado, cidade = self.rng.choice(CITIES)
+            patients.append({
+                'id': patient_id,
+                'cpf': make_cpf(100_000_000 + i),
+                'nome': self.name(),
+                'email': f'paciente{i}@bench.clinic',
+                'senha': self.senha,
+                'first_access': False,
+                'telefone': f'{self.rng.randrange(11, 99)}9{self.rng.randrange(10**8):08d}',
+                'data_nascimento': birth,
+                'estado': estado,
+                'cidade': cidade,
+                'bairro': 'Centro',
+                'cep': f'{self.rng.randrange(10**8):08d}',
+                'rua': f'Rua {self.rng.choice(LAST_NAMES)}',
+                'numero': str(self.rng.randrange(1, 9999)),
+                'created_at': created,
+                'updated_at': created,
+            })
+            if minor:
+                responsibles.append({
+                    'id': self.uuid(),
+                    'patient_id': patient_id,
+                    'nome': self.name(),
+                    'cpf': make_cpf(200_000_000 + i),
+                    'data_nascimento': date(1960, 1, 1) + timedelta(days=self.rng.randrange(365 * 30)),
+                    'email': f'responsavel{i}@bench.clinic',
+                    'telefone': f'{self.rng.randrange(11, 99)}9{self.rng.randrange(10**8):08d}',
+                    'created_at': created,
+                    'updated_at': created,
+                })
+            if len(patients) >= CHUNK_SIZE:
+                yield patients, responsibles
+                patients, responsibles = [], []
+        if patients:
+            yield patients, responsibles
+
+    def appointments(self):
+        """(appointment rows, link rows, audit rows) per chunk"""
+        appointments, links, audits = [], [], []
+        for _ in range(self.counts['appointments']):
+            appointment_id = self.uuid()
+            user_id = self.rng.choice(self.user_ids)
+            tipo = 'plano' if self.rng.random() < 0.6 else 'particular'
+            chosen = self.rng.sample(self.procedures, self.rng.randint(1, 4))
+            price = 'valor_plano' if tipo == 'plano' else 'valor_particular'
+            created = self.timestamp()
+            appointments.append({
+                'id': appointment_id,
+                'data_hora': self.timestamp().replace(minute=self.rng.choice((0, 30)), second=0),
+                'duracao_minutos': self.rng.choice((30, 30, 60)),
+                'patient_id': self.rng.choice(self.patient_ids),
+                'user_id': user_id,
+                'tipo': tipo,
+                'numero_carteira': f'{self.rng.randrange(10**12):012d}' if tipo == 'plano' else None,
+                'valor_total': sum((procedure[price] for procedure in chosen), Decimal('0.00')),
+                'created_at': created,
+                'updated_at': created,
+            })
+            links.extend({'appointment_id': appointment_id, 'procedure_id': procedure['id']} for procedure in chosen)
+            action = self.rng.choice(AUDIT_ACTIONS)
+            audits.append({
+                'id': self.uuid(),
+                'user_id': user_id,
+                'action': action,
+                'table_name': None if action == 'LOGIN' else self.rng.choice(AUDIT_TABLES),
+                'record_id': appointment_id,
+                'old_values': None,
+                'new_values': json.dumps({'tipo': tipo}) if action != 'LOGIN' else None,
+                'ip_address': f'10.0.{self.rng.randrange(256)}.{self.rng.randrange(256)}',
+                'details': None,
+                'created_at': created,
+            })
+            if len(appointments) >= CHUNK_SIZE:
+                yield appointments, links, audits
+                appointments, links, audits = [], [], []
+        if appointments:
+            yield appointments, links, audits
+
+def populate(scale, seed=42, progress=None):
+    """Fill the current app's (empty) database; returns the row counts inserted
+
+    Runs on one connection with synchronous=OFF (SQLite) and commits per chunk.
+    """
+    generator = Generator(scale, seed)
+    inserted = dict.fromkeys(['users', 'procedures', 'patients', 'responsibles',
+                              'appointments', 'appointment_procedures', 'audit_logs'], 0)
+
+    def write(connection, model, rows, name):
+        if rows:
+            connection.execute(insert(model), rows)
+            inserted[name] += len(rows)
+
+    with db.engine.connect() as connection:
+        if connection.dialect.name == 'sqlite':
+            connection.exec_driver_sql('PRAGMA synchronous=OFF')
+            connection.commit()
+        with connection.begin():
+            write(connection, User, list(generator.users()), 'users')
+            write(connection, Procedure, list(generator.procedure_rows()), 'procedures')
+        for patients, responsibles in generator.patients():
+            with connection.begin():
+                write(connection, Patient, patients, 'patients')
+                write(connection, Responsible, responsibles, 'responsibles')
+            if progress:
+                progress(inserted)
+        for appointments, links, audits in generator.appointments():
+            with connection.begin():
+                write(connection, Appointment, appointments, 'appointments')
+                write(connection, AppointmentProcedure, links, 'appointment_procedures')
+                write(connection, AuditLog, audits, 'audit_logs')
+            if progress:
+                progress(inserted)
+
+    _, error = DailyStatsService.rebuild()
+    if error:
+        raise RuntimeError(error)
+    return inserted
+
+def main(database_url, scale='10k', seed=42):
+    config = type('DatagenConfig', (BenchConfig,), {'SQLALCHEMY_DATABASE_URI': database_url})
+    app = create_app(config)
+    started = time.perf_counter()
+
+    def progress(inserted):
+        elapsed = time.perf_counter() - started
+        print(f"\r{inserted['appointments']:>12,} atendimentos, {inserted['patients']:>11,} pacientes "
+              f"({elapsed:.0f}s)", end='', file=sys.stderr)
+
+    with app.app_context():
+        db.create_all()
+        if User.query.first() is not None:
+            print("O banco já contém dados; use um arquivo novo")
+            sys.exit(1)
+        inserted = populate(parse_scale(scale), int(seed), progress)
+
+    print(file=sys.stderr)
+    for table, count in inserted.items():
+        print(f"{table:<24} {count:>12,}")
+    print(f"concluído em {time.perf_counter() - started:.1f}s; senha de todos os usuários: {BENCH_PASSWORD}")
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    main(*sys.argv[1:4])
@@ -0,0 +1,405 @@
+"""
+Suíte de benchmarks: latência e consultas por requisição de cada endpoint
+Chama todos os endpoints dos blueprints pelo test client do Flask e as
+principais operações da camada de serviço diretamente, mede p50/p95/p99 e o
+número de consultas SQL por chamada e compara com o baseline salvo: mais
+consultas que no baseline falham a execução. A latência depende da máquina
+em que o baseline foi gravado, então p50/p95 acima da tolerância só geram
+avisos.
+Sem --database, gera um banco em memória na escala pedida (benchmarks.datagen).
+Os cenários de escrita criam e removem seus próprios registros.
+Execute (na pasta backend):
+    python -m benchmarks.runner [--scale 10k] [--requests 30] [--database URL]
+                                [--baseline benchmarks/baseline.json] [--save-baseline]
+                                [--only appointments]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import math
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from app.models.appointment import Appointment
+from app.models.audit_log import AuditLog
+from app.models.patient import Patient
+from app.models.user import User
+from app.services.analytics_service import AnalyticsService, analytics_cache
+from app.services.appointment_service import AppointmentService
+from app.services.audit_service import AuditService
+from app.services.availability import free_intervals
+from app.services.patient_service import PatientService
+from app.services.procedure_catalog import ProcedureCatalog, get_procedure_catalog
+from app.utils.auth import create_token
+from benchmarks.datagen import ADMIN_EMAIL, BENCH_PASSWORD, BenchConfig, make_cpf, parse_scale, populate
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# A percentile is reported as slower when it exceeds the baseline by its fraction
+# here and by at least FLOOR_MS; p95 gets more room because single requests are
+# noisier. Only a warning: timings are not comparable across hosts
+TOLERANCES = {'p50': 0.5, 'p95': 1.0}
+FLOOR_MS = 2.0
+
+PERCENTILES = (50, 95, 99)
+
+# Appointments per series of the batch scenario
+SERIES_SESSIONS = 10
+
+# kind: 'http' (called with the test client) or 'service' (called inside a request context)
+Scenario = namedtuple('Scenario', 'name kind call')
+
+class Fixtures:
+    """Ids and tokens the scenarios need, read from the benchmark database"""
+
+    def __init__(self, app):
+        with app.app_context():
+            admin = User.query.filter_by(email=ADMIN_EMAIL).one()
+            patient = Patient.query.order_by(Patient.created_at.desc()).first()
+            appointment = Appointment.query.order_by(Appointment.data_hora.desc()).first()
+            self.admin_id = admin.id
+            self.user_ids = [row.id for row in db.session.query(User.id).order_by(User.created_at, User.id)]
+            self.patient_id = patient.id
+            self.patient_email = patient.email
+            self.patient_nome = patient.nome
+            self.appointment_id = appointment.id
+            self.history_record_id = db.session.query(AuditLog.record_id)\
+                .filter(AuditLog.table_name == 'appointments').order_by(AuditLog.created_at.desc()).limit(1).scalar()
+            self.export_day = appointment.data_hora.date()
+            self.procedure_ids = [entry.id for entry in get_procedure_catalog().entries[:3]]
+            self.admin = {'Authorization': f'Bearer {create_token(admin)}'}
+            self.patient = {'Authorization': f'Bearer {create_token(patient)}'}
+        # Records created by write scenarios, removed by the matching delete scenario
+        self.created = {}
+
+    def export_range(self):
+        """One day of data, so exports stay comparable across scales"""
+        return {'start_date': self.export_day.isoformat(),
+                'end_date': (self.export_day + timedelta(days=1)).isoformat()}
+
+    def audit_range(self):
+        """One day of generated audit logs: the write scenarios log theirs today"""
+        day = self.export_day - timedelta(days=1)
+        return {'start_date': day.isoformat(), 'end_date': self.export_day.isoformat()}
+
+def get(url, headers='admin', **args):
+    def call(client, fx, i):
+        return client.get(url.format(fx=fx), query_string={k: v(fx) if callable(v) else v for k, v in args.items()},
+                          headers=getattr(fx, headers))
+    return call
+
+def unique(i):
+    """Suffix that keeps generated records unique across runs on the same database"""
+    return f'{os.getpid()}{i:05d}'
+
+def create(kind, url, payload, headers='admin'):
+    def call(client, fx, i):
+        response = client.post(url, json=payload(fx, i), headers=getattr(fx, headers))
+        if response.status_code == 201:
+            fx.created.setdefault(kind, []).append(response.get_json()['id'])
+        return response
+    return call
+
+def delete(kind, url):
+    def call(client, fx, i):
+        return client.delete(url.format(id=fx.created[kind].pop()), headers=fx.admin)
+    return call
+
+def put(url, payload):
+    def call(client, fx, i):
+        return client.put(url.format(fx=fx), json=payload(fx, i), headers=fx.admin)
+    return call
+
+def login(email, senha):
+    def call(client, fx, i):
+        return client.post('/auth/login', json={'email': email(fx), 'senha': senha})
+    return call
+
+def conditional_get(url):
+    """Revalidation: the second request carries the ETag of the first and gets 304"""
+    def call(client, fx, i):
+        etag = fx.created.get(('etag', url))
+        if etag is None:
+            etag = client.get(url, headers=fx.admin).headers['ETag']
+            fx.created[('etag', url)] = etag
+        return client.get(url, headers={**fx.admin, 'If-None-Match': etag})
+    return call
+
+def import_patients(client, fx, i):
+    cpf = make_cpf(300_000_000 + int(unique(i)) % 600_000_000)
+    record = {'cpf': cpf, 'nome': 'Importado Bench', 'email': f'import{unique(i)}@bench.clinic',
+              'telefone': '11999999999', 'data_nascimento': '1980-01-01', 'estado': 'SP',
+              'cidade': 'São Paulo', 'bairro': 'Centro', 'cep': '01001000', 'rua': 'Rua A', 'numero': '1'}
+    return client.post('/patients/import?format=ndjson', data=json.dumps(record) + '\n',
+                       content_type='application/x-ndjson', headers=fx.admin)
+
+def new_patient(fx, i):
+    return {'cpf': make_cpf(600_000_000 + int(unique(i)) % 300_000_000), 'nome': 'Paciente Bench',
+            'email': f'novo{unique(i)}@bench.clinic', 'senha': BENCH_PASSWORD, 'telefone': '11999999999',
+            'data_nascimento': '1980-01-01', 'estado': 'SP', 'cidade': 'São Paulo', 'bairro': 'Centro',
+            'cep': '01001000', 'rua': 'Rua A', 'numero': '1'}
+
+def new_appointment(fx, i):
+    # One free 30-minute slot per call: the admin's agenda rejects overlapping appointments
+    data_hora = datetime(2040, 1, 1, 8) + timedelta(minutes=30 * i)
+    return {'data_hora': data_hora.isoformat(), 'patient_id': fx.patient_id, 'user_id': fx.admin_id,
+            'tipo': 'particular', 'procedure_ids': fx.procedure_ids}
+
+def create_series(client, fx, i):
+    """Weekly series of SERIES_SESSIONS appointments, one free slot per call like new_appointment"""
+    data_hora = datetime(2041, 1, 1, 8) + timedelta(minutes=30 * i)
+    response = client.post('/appointments/batch', json={
+        'data_hora': data_hora.isoformat(), 'patient_id': fx.patient_id, 'tipo': 'particular',
+        'procedure_ids': fx.procedure_ids, 'recurrence': {'frequency': 'weekly', 'count': SERIES_SESSIONS}
+    }, headers=fx.admin)
+    if response.status_code == 201:
+        fx.created.setdefault('series', []).append(response.get_json()['ids'])
+    return response
+
+def delete_series(client, fx, i):
+    for appointment_id in fx.created['series'].pop():
+        response = client.delete(f'/appointments/{appointment_id}', headers=fx.admin)
+    return response
+
+def service_search(fx, i):
+    return PatientService.search_patients(fx.patient_nome.split()[0], per_page=10)
+
+def service_pricing(fx, i):
+    entries, _ = get_procedure_catalog().resolve(fx.procedure_ids)
+    return ProcedureCatalog.total(entries, 'plano')
+
+def service_create_appointment(fx, i):
+    appointment, error = AppointmentService.create_appointment(new_appointment(fx, i), fx.admin_id)
+    fx.created.setdefault('service_appointments', []).append(appointment.id)
+    return appointment
+
+def service_delete_appointment(fx, i):
+    return AppointmentService.delete_appointment(fx.created['service_appointments'].pop(), db.session.get(User, fx.admin_id))
+
+def service_availability(fx, i):
+    return free_intervals(fx.user_ids, fx.export_day, 7)
+
+def service_revenue(fx, i):
+    # Cold path: the grouped query itself, not the cached result
+    analytics_cache.clear()
+    return AnalyticsService.revenue(fx.export_day - timedelta(days=365), fx.export_day, 'month', 'procedure')
+
+def service_audit(fx, i):
+    return AuditService.log_action(fx.admin_id, 'BENCH', details='benchmark')
+
+SCENARIOS = [
+    # auth
+    Scenario('POST /auth/login (usuário)', 'http', login(lambda fx: ADMIN_EMAIL, BENCH_PASSWORD)),
+    Scenario('POST /auth/login (paciente)', 'http', login(lambda fx: fx.patient_email, BENCH_PASSWORD)),
+    Scenario('POST /auth/change-password', 'http', lambda client, fx, i: client.post(
+        '/auth/change-password', json={'new_password': BENCH_PASSWORD}, headers=fx.patient)),
+    # users
+    Scenario('GET /users', 'http', get('/users')),
+    Scenario('GET /users?cursor', 'http', get('/users', cursor='')),
+    Scenario('GET /users/search', 'http', get('/users/search', email=ADMIN_EMAIL)),
+    Scenario('POST /users', 'http', create('users', '/users', lambda fx, i: {
+        'nome': 'Usuário Bench', 'email': f'bench{unique(i)}@bench.clinic', 'senha': BENCH_PASSWORD})),
+    Scenario('PUT /users/:id', 'http', put('/users/{fx.admin_id}', lambda fx, i: {'nome': 'Administrador'})),
+    Scenario('POST /users/:id/reset-password', 'http', lambda client, fx, i: client.post(
+        f"/users/{fx.created['users'][-1]}/reset-password", json={'nova_senha': BENCH_PASSWORD}, headers=fx.admin)),
+    Scenario('DELETE /users/:id', 'http', delete('users', '/users/{id}')),
+    # patients
+    Scenario('GET /patients', 'http', get('/patients')),
+    Scenario('GET /patients?cursor', 'http', get('/patients', cursor='')),
+    Scenario('GET /patients?fields', 'http', get('/patients', fields='id,nome,cpf')),
+    Scenario('GET /patients/search', 'http', get('/patients/search', q=lambda fx: fx.patient_nome)),
+    Scenario('GET /patients/search (cpf)', 'http', get('/patients/search', q='100.000')),
+    Scenario('GET /patients/:id', 'http', get('/patients/{fx.patient_id}')),
+    Scenario('POST /patients', 'http', create('patients', '/patients', new_patient)),
+    Scenario('PUT /patients/:id', 'http', put('/patients/{fx.patient_id}', lambda fx, i: {'bairro': 'Centro'})),
+    Scenario('DELETE /patients/:id', 'http', delete('patients', '/patients/{id}')),
+    Scenario('POST /patients/import', 'http', import_patients),
+    # procedures
+    Scenario('GET /procedures', 'http', get('/procedures')),
+    Scenario('GET /procedures?cursor', 'http', get('/procedures', cursor='')),
+    Scenario('GET /procedures/:id', 'http', get('/procedures/{fx.procedure_ids[0]}')),
+    Scenario('POST /procedures', 'http', create('procedures', '/procedures', lambda fx, i: {
+        'nome': f'Bench {unique(i)}', 'valor_plano': 10, 'valor_particular': 15})),
+    Scenario('PUT /procedures/:id', 'http', put('/procedures/{fx.procedure_ids[0]}',
+                                               lambda fx, i: {'descricao': 'Procedimento gerado para benchmark'})),
+    Scenario('DELETE /procedures/:id', 'http', delete('procedures', '/procedures/{id}')),
+    # appointments
+    Scenario('GET /appointments', 'http', get('/appointments')),
+    Scenario('GET /appointments?cursor', 'http', get('/appointments', cursor='')),
+    Scenario('GET /appointments?fields', 'http', get('/appointments', fields='id,data_hora,patient.nome', expand='')),
+    Scenario('GET /appointments (datas)', 'http', get('/appointments', **{
+        'start_date': lambda fx: fx.export_range()['start_date'], 'end_date': lambda fx: fx.export_range()['end_date']})),
+    Scenario('GET /appointments (paciente)', 'http', get('/appointments', headers='patient')),
+    Scenario('GET /appointments 304', 'http', conditional_get('/appointments')),
+    Scenario('GET /appointments/:id', 'http', get('/appointments/{fx.appointment_id}')),
+    Scenario('GET /appointments/export ndjson', 'http', get('/appointments/export', format='ndjson', **{
+        'start_date': lambda fx: fx.export_range()['start_date'], 'end_date': lambda fx: fx.export_range()['end_date']})),
+    Scenario('GET /appointments/export csv', 'http', get('/appointments/export', format='csv', **{
+        'start_date': lambda fx: fx.export_range()['start_date'], 'end_date': lambda fx: fx.export_range()['end_date']})),
+    Scenario('GET /appointments/availability', 'http', get('/appointments/availability', **{
+        'user_id': lambda fx: fx.admin_id, 'date': lambda fx: fx.export_day.isoformat()})),
+    Scenario('GET /appointments/availability (semana)', 'http', get('/appointments/availability', **{
+        'date': lambda fx: fx.export_day.isoformat(), 'days': 7})),
+    Scenario('POST /appointments', 'http', create('appointments', '/appointments', new_appointment)),
+    Scenario('PUT /appointments/:id', 'http', lambda client, fx, i: client.put(
+        f"/appointments/{fx.created['appointments'][i]}", json={'tipo': 'particular'}, headers=fx.admin)),
+    Scenario('DELETE /appointments/:id', 'http', delete('appointments', '/appointments/{id}')),
+    Scenario('POST /appointments/batch (10 semanais)', 'http', create_series),
+    Scenario('DELETE /appointments/:id ×10 (série)', 'http', delete_series),
+    # dashboard
+    Scenario('GET /dashboard/stats', 'http', get('/dashboard/stats')),
+    Scenario('GET /dashboard/revenue', 'http', get('/dashboard/revenue', granularity='week', by='procedure')),
+    Scenario('GET /dashboard/procedures/usage', 'http', get('/dashboard/procedures/usage')),
+    # audit
+    Scenario('GET /audit', 'http', get('/audit')),
+    Scenario('GET /audit?cursor', 'http', get('/audit', cursor='')),
+    Scenario('GET /audit (action)', 'http', get('/audit', action='LOGIN')),
+    Scenario('GET /audit/export ndjson', 'http', get('/audit/export', format='ndjson', **{
+        'start_date': lambda fx: fx.audit_range()['start_date'], 'end_date': lambda fx: fx.audit_range()['end_date']})),
+    Scenario('GET /audit/:table/:id', 'http', get('/audit/appointments/{fx.history_record_id}')),
+    Scenario('GET /audit/queue', 'http', get('/audit/queue')),
+    # service layer
+    Scenario('PatientService.search_patients', 'service', service_search),
+    Scenario('ProcedureCatalog.resolve+total', 'service', service_pricing),
+    Scenario('free_intervals (semana, todos)', 'service', service_availability),
+    Scenario('AppointmentService.create_appointment', 'service', service_create_appointment),
+    Scenario('AppointmentService.delete_appointment', 'service', service_delete_appointment),
+    Scenario('AnalyticsService.revenue (sem cache)', 'service', service_revenue),
+    Scenario('AuditService.log_action', 'service', service_audit),
+]
+
+def percentile(samples, p):
+    """Nearest-rank percentile of a sorted list"""
+    return samples[max(0, math.ceil(p / 100 * len(samples)) - 1)]
+
+def run_scenario(app, client, fixtures, scenario, requests, warmup, counter):
+    """Time `requests` calls (after `warmup` untimed ones); returns the result row"""
+    timings, queries = [], []
+    # Like timeit: no collector pauses inside the timings. The list endpoints
+    # print debug lines; keep them out of the report.
+    gc.collect()
+    gc.disable()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(warmup + requests):
+            if scenario.kind == 'service':
+                with app.test_request_context():
+                    counter[0] = 0
+                    start = time.perf_counter()
+                    scenario.call(fixtures, i)
+                    elapsed = time.perf_counter() - start
+                    db.session.remove()
+            else:
+                counter[0] = 0
+                start = time.perf_counter()
+                response = scenario.call(client, fixtures, i)
+                response.get_data()  # drain streamed bodies (exports) inside the timing
+                elapsed = time.perf_counter() - start
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{scenario.name}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}")
+            if i >= warmup:
+                timings.append(elapsed * 1000)
+                queries.append(counter[0])
+    gc.enable()
+
+    timings.sort()
+    row = {f'p{p}': round(percentile(timings, p), 3) for p in PERCENTILES}
+    row['queries'] = max(queries)
+    return row
+
+def compare(results, baseline, same_scale):
+    """(regressions, warnings) against the baseline results
+
+    More queries than the baseline is a regression; slower percentiles are warnings.
+    """
+    regressions, warnings = [], []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if row['queries'] > base['queries']:
+            regressions.append(f"{name}: {row['queries']} consultas (baseline {base['queries']})")
+        if not same_scale:
+            continue
+        for key, tolerance in TOLERANCES.items():
+            if row[key] > base[key] * (1 + tolerance) and row[key] - base[key] >= FLOOR_MS:
+                warnings.append(f"{name}: {key} {row[key]:.2f}ms (baseline {base[key]:.2f}ms)")
+    return regressions, warnings
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks dos endpoints e serviços')
+    parser.add_argument('--scale', default='10k', help='atendimentos gerados no banco em memória (10k, 1m, 10m...)')
+    parser.add_argument('--database', help='banco já populado por benchmarks.datagen (em vez do banco em memória)')
+    parser.add_argument('--requests', type=int, default=30, help='chamadas medidas por cenário')
+    parser.add_argument('--warmup', type=int, default=3, help='chamadas descartadas por cenário')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='grava os resultados como novo baseline')
+    parser.add_argument('--only', help='roda só os cenários cujo nome contém este texto')
+    options = parser.parse_args()
+
+    config = type('RunnerConfig', (BenchConfig,), {'SQLALCHEMY_DATABASE_URI': options.database or 'sqlite://'})
+    app = create_app(config)
+    scale = options.database or options.scale
+
+    with app.app_context():
+        if not options.database:
+            db.create_all()
+            started = time.perf_counter()
+            populate(parse_scale(options.scale))
+            print(f"banco em memória com {parse_scale(options.scale):,} atendimentos "
+                  f"({time.perf_counter() - started:.1f}s)")
+        engine = db.engine
+
+    counter = [0]
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        counter[0] += 1
+
+    fixtures = Fixtures(app)
+    client = app.test_client()
+    scenarios = [s for s in SCENARIOS if not options.only or options.only in s.name]
+    results = {}
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        print(f"{'cenário':<42} {'p50':>9} {'p95':>9} {'p99':>9} {'consultas':>10}")
+        for scenario in scenarios:
+            row = run_scenario(app, client, fixtures, scenario, options.requests, options.warmup, counter)
+            results[scenario.name] = row
+            print(f"{scenario.name:<42} {row['p50']:>7.2f}ms {row['p95']:>7.2f}ms {row['p99']:>7.2f}ms {row['queries']:>10}")
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    if options.save_baseline:
+        with open(options.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'scale': scale, 'requests': options.requests, 'results': results}, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"baseline gravado em {options.baseline}")
+        return
+
+    if not os.path.exists(options.baseline):
+        print("sem baseline para comparar (use --save-baseline)")
+        return
+
+    with open(options.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    same_scale = baseline.get('scale') == scale
+    if not same_scale:
+        print(f"baseline gerado com escala {baseline.get('scale')}: só o número de consultas é comparado")
+
+    regressions, warnings = compare(results, baseline['results'], same_scale)
+    for message in warnings:
+        print(f"mais lento: {message}")
+    for message in regressions:
+        print(f"REGRESSÃO: {message}")
+    if regressions:
+        sys.exit(1)
+    print("sem regressões de consultas em relação ao baseline")
+
+if __name__ == '__main__':
+    main()
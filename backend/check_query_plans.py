@@ -0,0 +1,211 @@
+"""
+Script para verificar os planos de execução das consultas dos endpoints
+Executa cada endpoint de listagem contra um banco SQLite em memória, roda
+EXPLAIN QUERY PLAN em todo SELECT gerado e falha se algum cair em SCAN
+sem índice ou se o número de consultas por página crescer com o tamanho
+da página (N+1).
+Execute: python check_query_plans.py
+"""
+import re
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.user import User
+from app.models.patient import Patient, Responsible
+from app.models.procedure import Procedure
+from app.models.appointment import Appointment
+from app.models.audit_log import AuditLog
+from app.models.patient_search import PATIENT_SEARCH_TABLE
+from config import Config
+
+class PlanCheckConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+
+# Endpoint -> query string variants exercised for each access path
+ENDPOINTS = [
+    ('/patients', [{}, {'cursor': ''}, {'fields': 'nome,responsible.nome'}]),
+    ('/patients/search', [{'q': 'Paciente 1'}, {'q': '000.000.000'}, {'q': 'paciente1@clinic'}]),
+    ('/procedures', [{}, {'cursor': ''}]),
+    ('/users', [{}, {'cursor': ''}]),
+    ('/appointments', [
+        {},
+        {'cursor': ''},
+        {'start_date': '2025-01-01T00:00:00', 'end_date': '2025-12-31T23:59:59'},
+        {'fields': 'id,data_hora,patient.nome', 'cursor': ''},
+        {'expand': 'procedures'},
+    ]),
+    ('/appointments/availability', [
+        {'date': '2025-06-01', 'user_id': '{admin_id}'},
+        {'date': '2025-06-01', 'days': '7'},
+    ]),
+    ('/audit', [
+        {},
+        {'cursor': ''},
+        {'action': 'CREATE'},
+        {'table_name': 'appointments'},
+        {'user_id': '{admin_id}'},
+        {'start_date': '2025-01-01T00:00:00', 'end_date': '2025-12-31T23:59:59'},
+    ]),
+    ('/audit/appointments/00000000-0000-0000-0000-000000000000', [{}, {'cursor': ''}]),
+    ('/dashboard/stats', [{}]),
+    ('/dashboard/revenue', [
+        {'start_date': '2025-01-01', 'end_date': '2025-12-31'},
+        {'granularity': 'day', 'by': 'tipo', 'start_date': '2025-06-01', 'end_date': '2025-06-30'},
+        {'granularity': 'week', 'by': 'user', 'start_date': '2025-01-01', 'end_date': '2025-06-30'},
+        {'by': 'procedure', 'start_date': '2025-01-01', 'end_date': '2025-12-31'},
+    ]),
+    ('/dashboard/procedures/usage', [{'start_date': '2025-01-01', 'end_date': '2025-12-31'}]),
+]
+
+# Full table scan: "SCAN <table>" with no index (SCAN ... USING INDEX walks an index,
+# VIRTUAL TABLE INDEX n:M... is an FTS5 MATCH lookup)
+FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)(?!.* USING (COVERING )?INDEX )(?!.* VIRTUAL TABLE INDEX \d+:M)(\w+)')
+
+# Tables that are small by construction and meant to be read whole
+ALLOWED_SCANS = {
+    'daily_stats',  # one row per day
+    'procedures',   # loaded whole into the in-memory procedure catalog
+    'audit_archive_segments',  # one row per archived month, kept in memory by the audit archive
+}
+
+def is_full_scan(detail):
+    """Check one EXPLAIN QUERY PLAN line for a table scan outside ALLOWED_SCANS
+
+    Scans of subqueries (already bounded by their own LIMIT) are not table scans.
+    """
+    match = FULL_SCAN.match(detail)
+    if not match:
+        return False
+    table = match.group(2)
+    is_table = table in db.metadata.tables or table == PATIENT_SEARCH_TABLE
+    return is_table and table not in ALLOWED_SCANS
+
+# Page sizes compared when counting statements per request
+PAGE_SIZES = (5, 25)
+
+def seed(count=max(PAGE_SIZES)):
+    """Insert enough rows for the largest page, with every relationship populated"""
+    admin = User(nome='Administrador', email='admin@clinic.com', senha='-', tipo='admin')
+    procedures = [
+        Procedure(nome=f'Procedimento {i}', valor_plano=Decimal('100.00'), valor_particular=Decimal('150.00'))
+        for i in range(3)
+    ]
+    db.session.add(admin)
+    db.session.add_all(procedures)
+
+    for i in range(count):
+        patient = Patient(
+            cpf=f'{i:011d}', nome=f'Paciente {i}', email=f'paciente{i}@clinic.com', senha='-',
+            telefone='11999999999', data_nascimento=date(2015, 1, 1),
+            estado='SP', cidade='São Paulo', bairro='Centro', cep='01001000', rua='Rua A', numero='1'
+        )
+        patient.responsible = Responsible(
+            nome=f'Responsável {i}', cpf='11144477735', data_nascimento=date(1980, 1, 1),
+            email=f'responsavel{i}@clinic.com', telefone='11988888888'
+        )
+        db.session.add(patient)
+        db.session.flush()
+
+        appointment = Appointment(
+            data_hora=datetime(2025, 6, 1, 10, 0), patient_id=patient.id, user_id=admin.id,
+            tipo='particular', valor_total=Decimal('450.00'), procedures=procedures
+        )
+        db.session.add(appointment)
+        db.session.flush()
+        db.session.add(AuditLog(user_id=admin.id, action='CREATE', table_name='appointments', record_id=appointment.id))
+
+    db.session.commit()
+    return admin
+
+def collect_statements(client, headers, admin_id):
+    """Call every endpoint and capture the SELECTs it emits"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((current[0], statement, parameters))
+
+    current = [None]
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        for url, variants in ENDPOINTS:
+            for args in variants:
+                args = {k: v.format(admin_id=admin_id) for k, v in args.items()}
+                current[0] = f"{url} {args}" if args else url
+                response = client.get(url, query_string=args, headers=headers)
+                if response.status_code != 200:
+                    print(f"ERRO: {current[0]} retornou {response.status_code}")
+                    sys.exit(1)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+def count_statements(client, headers, url, args, limit):
+    """Number of statements a single list request emits"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        client.get(url, query_string={**args, 'limit': limit}, headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return len(statements)
+
+def check_statement_counts(client, headers):
+    """Statements per list request must not grow with the page size"""
+    failures = []
+    for url, variants in ENDPOINTS:
+        counts = [count_statements(client, headers, url, variants[0], limit) for limit in PAGE_SIZES]
+        if len(set(counts)) > 1:
+            failures.append((url, counts))
+    return failures
+
+def check_query_plans():
+    app = create_app(PlanCheckConfig)
+
+    with app.app_context():
+        db.create_all()
+        admin = seed()
+        headers = {'Authorization': f"Bearer {create_access_token(identity=admin.id)}"}
+        statements = collect_statements(app.test_client(), headers, admin.id)
+        n_plus_one = check_statement_counts(app.test_client(), headers)
+
+        failures = []
+        connection = db.engine.raw_connection()
+        try:
+            for label, statement, parameters in statements:
+                plan = connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+                details = [row[-1] for row in plan]
+                scans = [d for d in details if is_full_scan(d)]
+                if scans:
+                    failures.append((label, statement, details))
+        finally:
+            connection.close()
+
+    print(f"{len(statements)} consultas analisadas")
+    for label, statement, details in failures:
+        print(f"\nSCAN em {label}:\n  {' '.join(statement.split())}")
+        for detail in details:
+            print(f"    {detail}")
+
+    for url, counts in n_plus_one:
+        sizes = ', '.join(f"limit={limit}: {count}" for limit, count in zip(PAGE_SIZES, counts))
+        print(f"\nN+1 em {url}: {sizes} consultas")
+
+    if failures:
+        print(f"\n{len(failures)} consulta(s) sem índice")
+    if n_plus_one:
+        print(f"\n{len(n_plus_one)} endpoint(s) com N+1")
+    if failures or n_plus_one:
+        sys.exit(1)
+    print("Todos os planos usam índices e o número de consultas por página é constante")
+
+if __name__ == '__main__':
+    check_query_plans()
@@ -0,0 +1,128 @@
+"""
+Script para verificar que os serializadores compilados geram a mesma saída do marshmallow
+Compara, byte a byte, o JSON de cada schema compilado com o do marshmallow puro
+em objetos aleatórios (valores nulos, atributos ausentes, Unicode, Decimal com
+escalas variadas, inteiros, datas com e sem fuso, relacionamentos vazios, dicts) e em
+registros reais de um banco SQLite em memória.
+Execute: python check_serializers.py [quantidade de casos por schema]
+"""
+import json
+import random
+import sys
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from marshmallow import fields
+from app import create_app, db
+from app.models.appointment import Appointment
+from app.models.audit_log import AuditLog
+from app.models.patient import Patient
+from app.schemas.appointment_schema import AppointmentSchema
+from app.schemas.audit_schema import AuditLogSchema
+from app.schemas.compiled import CompiledSchema
+from app.schemas.patient_schema import PatientSchema
+from check_query_plans import PlanCheckConfig, seed
+
+SCHEMAS = [AppointmentSchema, PatientSchema, AuditLogSchema]
+
+# Attribute values drawn for each kind of field
+TEXT = ['', 'Maria', 'José Ávila', '日本語', 'a"b\\c\n', '0' * 11, b'bytes', 123, None]
+DECIMALS = [Decimal('0'), Decimal('1.5'), Decimal('1.005'), Decimal('-3.14159'), Decimal('1E+3'), 7, 2.675, '9.999', None]
+INTEGERS = [0, 30, 480, -5, '45', 2.9, Decimal('60'), None]
+DATETIMES = [datetime(2025, 1, 2, 3, 4, 5), datetime(2025, 1, 2, 3, 4, 5, 678901),
+             datetime(2025, 6, 1, tzinfo=timezone.utc), datetime(2025, 6, 1, tzinfo=timezone(timedelta(hours=-3))), None]
+DATES = [date(2015, 1, 1), date(1999, 12, 31), datetime(2020, 2, 29, 10, 0), None]
+
+def marshmallow_only(schema):
+    """Disable the compiled path on a schema and every nested schema"""
+    if isinstance(schema, CompiledSchema):
+        schema._compiled_dump = None
+    for field in schema.dump_fields.values():
+        nested = field.inner if isinstance(field, fields.List) else field
+        if isinstance(nested, fields.Nested):
+            marshmallow_only(nested.schema)
+    return schema
+
+def random_value(field, rng, depth):
+    if isinstance(field, fields.List):
+        if rng.random() < 0.1:
+            return None
+        return [random_value(field.inner, rng, depth) if rng.random() < 0.9 else None
+                for _ in range(rng.randrange(4))]
+    if isinstance(field, fields.Nested):
+        if rng.random() < 0.2 or depth > 2:
+            return None
+        return random_object(field.schema, rng, depth + 1)
+    if isinstance(field, fields.Decimal):
+        return rng.choice(DECIMALS)
+    if isinstance(field, fields.Integer):
+        return rng.choice(INTEGERS)
+    if isinstance(field, fields.DateTime) and not isinstance(field, fields.Date):
+        return rng.choice(DATETIMES)
+    if isinstance(field, fields.Date):
+        return rng.choice(DATES)
+    return rng.choice(TEXT)
+
+def random_object(schema, rng, depth=0):
+    """Attribute object for a schema; some attributes missing, dotted attributes nested"""
+    obj = SimpleNamespace()
+    for name, field in schema.dump_fields.items():
+        if rng.random() < 0.1:
+            continue
+        path = (field.attribute or name).split('.')
+        target = obj
+        for part in path[:-1]:
+            if rng.random() < 0.15:
+                setattr(target, part, None)
+                break
+            if getattr(target, part, None) is None:
+                setattr(target, part, SimpleNamespace())
+            target = getattr(target, part)
+        else:
+            setattr(target, path[-1], random_value(field, rng, depth))
+    # Dict-like objects go through marshmallow's item access
+    if rng.random() < 0.05:
+        return dict(vars(obj))
+    return obj
+
+def encode(app, data):
+    """Provider bytes plus an order- and type-preserving rendering"""
+    return app.json.dumps(data), json.dumps(data, default=repr, ensure_ascii=False)
+
+def compare(app, label, compiled, reference, objects, failures):
+    for many, payload in ((True, objects), (False, objects[0] if objects else None)):
+        expected = encode(app, reference.dump(payload, many=many))
+        actual = encode(app, compiled.dump(payload, many=many))
+        if actual != expected:
+            failures.append((label, expected[1], actual[1]))
+
+def check_serializers(cases=500):
+    app = create_app(PlanCheckConfig)
+    rng = random.Random(1234)
+    failures = []
+
+    with app.app_context():
+        for schema_cls in SCHEMAS:
+            compiled, reference = schema_cls(), marshmallow_only(schema_cls())
+            if compiled._compiled_dump is None:
+                failures.append((schema_cls.__name__, 'compilado', 'não compilou'))
+                continue
+            for case in range(cases):
+                objects = [random_object(compiled, rng) for _ in range(rng.randrange(1, 4))]
+                compare(app, f"{schema_cls.__name__} caso {case}", compiled, reference, objects, failures)
+
+        db.create_all()
+        seed()
+        for schema_cls, model in ((AppointmentSchema, Appointment), (PatientSchema, Patient), (AuditLogSchema, AuditLog)):
+            compare(app, f"{schema_cls.__name__} (banco)", schema_cls(), marshmallow_only(schema_cls()),
+                    model.query.all(), failures)
+
+    for label, expected, actual in failures[:10]:
+        print(f"\nDIVERGÊNCIA em {label}:\n  marshmallow: {expected[:300]}\n  compilado:   {actual[:300]}")
+    if failures:
+        print(f"\n{len(failures)} divergência(s)")
+        sys.exit(1)
+    print(f"{len(SCHEMAS)} schemas x {cases} casos aleatórios + registros do banco: saída idêntica")
+
+if __name__ == '__main__':
+    check_serializers(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
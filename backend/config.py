@@ -13,6 +13,90 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key-here')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', '3600')))
     
+    # Identity cache (authenticated users/patients kept per process)
+    IDENTITY_CACHE_SIZE = int(os.getenv('IDENTITY_CACHE_SIZE', '1024'))
+    IDENTITY_CACHE_TTL = int(os.getenv('IDENTITY_CACHE_TTL', '60'))
+    
+    # Analytics cache (grouped dashboard results, also dropped when the data changes)
+    ANALYTICS_CACHE_SIZE = int(os.getenv('ANALYTICS_CACHE_SIZE', '256'))
+    ANALYTICS_CACHE_TTL = int(os.getenv('ANALYTICS_CACHE_TTL', '30'))
+    
     # Flask
     DEBUG = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
-    ENV = os.getenv('FLASK_ENV', 'development')
\ No newline at end of file
+    ENV = os.getenv('FLASK_ENV', 'development')
+    
+    # Audit
+    AUDIT_SINK = os.getenv('AUDIT_SINK', 'sync')  # 'sync' or 'async'
+    AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '100'))
+    AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', '1.0'))
+    AUDIT_QUEUE_MAX = int(os.getenv('AUDIT_QUEUE_MAX', '10000'))
+    # 'delta' stores the new snapshot and only the old values that changed; 'full' stores both snapshots
+    AUDIT_PAYLOAD_FORMAT = os.getenv('AUDIT_PAYLOAD_FORMAT', 'delta')
+    AUDIT_PAYLOAD_COMPRESSION = os.getenv('AUDIT_PAYLOAD_COMPRESSION', 'zlib')  # 'zlib' or 'none'
+    AUDIT_COMPRESS_MIN_BYTES = int(os.getenv('AUDIT_COMPRESS_MIN_BYTES', '128'))
+    # Months kept in audit_logs; older ones are moved to one SQLite file per month (archive_audit_logs.py)
+    AUDIT_HOT_MONTHS = int(os.getenv('AUDIT_HOT_MONTHS', '3'))
+    AUDIT_ARCHIVE_DIR = os.getenv('AUDIT_ARCHIVE_DIR')  # default: <instance>/audit_archive
+    AUDIT_ARCHIVE_CHECK_INTERVAL = float(os.getenv('AUDIT_ARCHIVE_CHECK_INTERVAL', '1.0'))
+    
+    # Password hashing
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '0'))  # 0 = one per CPU
+    # Store a marker for new patients and hash the initial password (CPF) on first login
+    PATIENT_DEFERRED_CREDENTIALS = os.getenv('PATIENT_DEFERRED_CREDENTIALS', 'False').lower() == 'true'
+    
+    # Bulk patient import: rows per chunk and row errors listed in the report (the rest are only counted)
+    PATIENT_IMPORT_CHUNK_SIZE = int(os.getenv('PATIENT_IMPORT_CHUNK_SIZE', '500'))
+    PATIENT_IMPORT_MAX_ERRORS = int(os.getenv('PATIENT_IMPORT_MAX_ERRORS', '1000'))
+    
+    # Procedure catalog: seconds between version checks against other workers' writes
+    PROCEDURE_CATALOG_CHECK_INTERVAL = float(os.getenv('PROCEDURE_CATALOG_CHECK_INTERVAL', '1.0'))
+    
+    # Professional availability: working hours, cached (professional, day) schedules and
+    # seconds between version checks against other workers' writes
+    AVAILABILITY_DAY_START = os.getenv('AVAILABILITY_DAY_START', '08:00')
+    AVAILABILITY_DAY_END = os.getenv('AVAILABILITY_DAY_END', '18:00')
+    AVAILABILITY_INDEX_SIZE = int(os.getenv('AVAILABILITY_INDEX_SIZE', '20000'))
+    AVAILABILITY_CHECK_INTERVAL = float(os.getenv('AVAILABILITY_CHECK_INTERVAL', '1.0'))
+    
+    # Response compression (brotli is used when the package is installed)
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '6'))
+    COMPRESS_BR_QUALITY = int(os.getenv('COMPRESS_BR_QUALITY', '4'))
+    
+    # Prometheus metrics at /metrics (set PROMETHEUS_MULTIPROC_DIR to aggregate workers).
+    # Scrapers send METRICS_TOKEN as a bearer token; without one only localhost is served
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+class ProductionConfig(Config):
+    """Production profile: SQLite in WAL mode with tuned pragmas and a sized pool"""
+    DEBUG = False
+    ENV = 'production'
+    
+    # Applied to every new SQLite connection (app/utils/sqlite_pragmas.py). WAL lets
+    # readers run while a writer commits; busy_timeout (ms) waits for the write lock
+    # instead of failing with "database is locked"
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),
+        'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-65536')),  # negative = KiB (64 MiB)
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+        'temp_store': 'MEMORY',
+    }
+    
+    # One connection per request thread; overflow absorbs bursts
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30')),
+    }
+
+CONFIGS = {
+    'development': Config,
+    'production': ProductionConfig,
+}
+
+def get_config(name=None):
+    """Config class for a profile name (default: FLASK_ENV)"""
+    return CONFIGS.get(name or os.getenv('FLASK_ENV', 'development'), Config)
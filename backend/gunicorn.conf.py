@@ -0,0 +1,15 @@
+"""
+Configuração do gunicorn para produção
+Com PROMETHEUS_MULTIPROC_DIR definido (diretório vazio a cada start), cada
+worker grava suas métricas nesse diretório e /metrics soma todos eles.
+Execute: PROMETHEUS_MULTIPROC_DIR=/tmp/clinic-metrics gunicorn -c gunicorn.conf.py run:app
+"""
+import os
+from prometheus_client import multiprocess
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges (db_pool_checked_out); its counters stay summed
+    multiprocess.mark_process_dead(worker.pid)
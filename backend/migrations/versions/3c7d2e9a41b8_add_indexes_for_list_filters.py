@@ -0,0 +1,66 @@
+"""Add indexes for list filters
+
+Revision ID: 3c7d2e9a41b8
+Revises: f116eec1e685
+Create Date: 2026-10-17 09:12:41.208315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c7d2e9a41b8'
+down_revision = 'f116eec1e685'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.create_index('ix_appointments_data_hora_id', ['data_hora', 'id'], unique=False)
+        batch_op.create_index('ix_appointments_patient_id_data_hora', ['patient_id', 'data_hora'], unique=False)
+        batch_op.create_index('ix_appointments_user_id_data_hora', ['user_id', 'data_hora'], unique=False)
+
+    with op.batch_alter_table('appointment_procedures', schema=None) as batch_op:
+        batch_op.create_index('ix_appointment_procedures_procedure_id', ['procedure_id'], unique=False)
+
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_logs_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_audit_logs_action_created_at', ['action', 'created_at'], unique=False)
+        batch_op.create_index('ix_audit_logs_table_name_created_at', ['table_name', 'created_at'], unique=False)
+        batch_op.create_index('ix_audit_logs_user_id_created_at', ['user_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('patients', schema=None) as batch_op:
+        batch_op.create_index('ix_patients_created_at_id', ['created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('responsibles', schema=None) as batch_op:
+        batch_op.create_index('ix_responsibles_patient_id', ['patient_id'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_created_at_id')
+
+    with op.batch_alter_table('responsibles', schema=None) as batch_op:
+        batch_op.drop_index('ix_responsibles_patient_id')
+
+    with op.batch_alter_table('patients', schema=None) as batch_op:
+        batch_op.drop_index('ix_patients_created_at_id')
+
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_logs_user_id_created_at')
+        batch_op.drop_index('ix_audit_logs_table_name_created_at')
+        batch_op.drop_index('ix_audit_logs_action_created_at')
+        batch_op.drop_index('ix_audit_logs_created_at_id')
+
+    with op.batch_alter_table('appointment_procedures', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointment_procedures_procedure_id')
+
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointments_user_id_data_hora')
+        batch_op.drop_index('ix_appointments_patient_id_data_hora')
+        batch_op.drop_index('ix_appointments_data_hora_id')
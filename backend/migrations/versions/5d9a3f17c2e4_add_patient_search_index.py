@@ -0,0 +1,63 @@
+"""Add patient search index
+
+Revision ID: 5d9a3f17c2e4
+Revises: 8e41c5b0d27f
+Create Date: 2026-10-17 16:05:18.930214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d9a3f17c2e4'
+down_revision = '8e41c5b0d27f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Own-content FTS5 table keyed by patients.rowid (phone reduced to digits)
+    op.execute("""
+        CREATE VIRTUAL TABLE patients_fts USING fts5(
+            patient_id UNINDEXED, nome, cpf, email, telefone,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3 4'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER patients_fts_insert AFTER INSERT ON patients BEGIN
+            INSERT INTO patients_fts (rowid, patient_id, nome, cpf, email, telefone)
+            VALUES (new.rowid, new.id, new.nome, new.cpf, new.email,
+                    replace(replace(replace(replace(replace(replace(new.telefone, '(', ''), ')', ''), '-', ''), ' ', ''), '+', ''), '.', ''));
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER patients_fts_update
+        AFTER UPDATE OF id, nome, cpf, email, telefone ON patients BEGIN
+            DELETE FROM patients_fts WHERE rowid = old.rowid;
+            INSERT INTO patients_fts (rowid, patient_id, nome, cpf, email, telefone)
+            VALUES (new.rowid, new.id, new.nome, new.cpf, new.email,
+                    replace(replace(replace(replace(replace(replace(new.telefone, '(', ''), ')', ''), '-', ''), ' ', ''), '+', ''), '.', ''));
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER patients_fts_delete AFTER DELETE ON patients BEGIN
+            DELETE FROM patients_fts WHERE rowid = old.rowid;
+        END
+    """)
+
+    # Index existing patients (same result as rebuild_patient_search.py)
+    op.execute("""
+        INSERT INTO patients_fts (rowid, patient_id, nome, cpf, email, telefone)
+        SELECT p.rowid, p.id, p.nome, p.cpf, p.email,
+               replace(replace(replace(replace(replace(replace(p.telefone, '(', ''), ')', ''), '-', ''), ' ', ''), '+', ''), '.', '')
+        FROM patients p
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS patients_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS patients_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS patients_fts_insert")
+    op.execute("DROP TABLE IF EXISTS patients_fts")
@@ -0,0 +1,48 @@
+"""Add daily stats table
+
+Revision ID: 8e41c5b0d27f
+Revises: 3c7d2e9a41b8
+Create Date: 2026-10-17 11:03:52.447190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e41c5b0d27f'
+down_revision = '3c7d2e9a41b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('appointment_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('procedure_count', sa.Integer(), nullable=False),
+    sa.Column('patient_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+
+    # Backfill from existing data (same result as rebuild_daily_stats.py)
+    op.execute("""
+        INSERT INTO daily_stats (day, appointment_count, revenue, procedure_count, patient_count)
+        SELECT day, SUM(appointments), ROUND(SUM(revenue), 2), SUM(procedures), SUM(patients)
+        FROM (
+            SELECT date(data_hora) AS day, 1 AS appointments, valor_total AS revenue, 0 AS procedures, 0 AS patients
+            FROM appointments
+            UNION ALL
+            SELECT date(a.data_hora), 0, 0, 1, 0
+            FROM appointment_procedures ap JOIN appointments a ON a.id = ap.appointment_id
+            UNION ALL
+            SELECT date(created_at), 0, 0, 0, 1
+            FROM patients WHERE created_at IS NOT NULL
+        )
+        GROUP BY day
+    """)
+
+
+def downgrade():
+    op.drop_table('daily_stats')
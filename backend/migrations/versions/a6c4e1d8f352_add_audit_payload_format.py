@@ -0,0 +1,29 @@
+"""Add audit payload format
+
+Revision ID: a6c4e1d8f352
+Revises: d3b9e6f04a21
+Create Date: 2026-10-17 23:41:08.214593
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c4e1d8f352'
+down_revision = 'd3b9e6f04a21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing logs keep their full snapshots in old_values/new_values (format 0)
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('payload', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('payload_format', sa.SmallInteger(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.drop_column('payload_format')
+        batch_op.drop_column('payload')
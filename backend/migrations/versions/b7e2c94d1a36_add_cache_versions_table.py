@@ -0,0 +1,28 @@
+"""Add cache versions table
+
+Revision ID: b7e2c94d1a36
+Revises: 5d9a3f17c2e4
+Create Date: 2026-10-17 17:21:07.514862
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2c94d1a36'
+down_revision = '5d9a3f17c2e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cache_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('cache_versions')
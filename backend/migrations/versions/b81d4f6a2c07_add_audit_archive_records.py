@@ -0,0 +1,38 @@
+"""Add audit archive records
+
+Revision ID: b81d4f6a2c07
+Revises: f7b3d0c6e915
+Create Date: 2026-10-18 02:11:46.204517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81d4f6a2c07'
+down_revision = 'f7b3d0c6e915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Archived months each record has audit rows in; months archived before
+    # this table are listed on the next archive_audit_logs.py run
+    op.create_table('audit_archive_records',
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('record_id', sa.String(length=36), nullable=False),
+    sa.Column('month', sa.String(length=7), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('first_at', sa.DateTime(), nullable=False),
+    sa.Column('last_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name', 'record_id', 'month')
+    )
+    with op.batch_alter_table('audit_archive_segments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('records_indexed', sa.Boolean(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('audit_archive_segments', schema=None) as batch_op:
+        batch_op.drop_column('records_indexed')
+    op.drop_table('audit_archive_records')
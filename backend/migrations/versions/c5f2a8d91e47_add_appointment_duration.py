@@ -0,0 +1,27 @@
+"""Add appointment duration
+
+Revision ID: c5f2a8d91e47
+Revises: e4a81f3b6c92
+Create Date: 2026-10-17 21:05:13.402871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f2a8d91e47'
+down_revision = 'e4a81f3b6c92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing appointments get the default length (30 minutes)
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('duracao_minutos', sa.Integer(), server_default='30', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_column('duracao_minutos')
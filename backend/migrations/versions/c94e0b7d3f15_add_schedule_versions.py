@@ -0,0 +1,57 @@
+"""Add schedule versions
+
+Revision ID: c94e0b7d3f15
+Revises: b81d4f6a2c07
+Create Date: 2026-10-18 03:02:19.550831
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c94e0b7d3f15'
+down_revision = 'b81d4f6a2c07'
+branch_labels = None
+depends_on = None
+
+OPERATIONS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def upgrade():
+    # Per professional and day stamp of the availability index (days changed since a check)
+    op.create_table('schedule_versions',
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    with op.batch_alter_table('schedule_versions', schema=None) as batch_op:
+        batch_op.create_index('ix_schedule_versions_version', ['version'], unique=False)
+
+    stamp = "(SELECT coalesce(max(version), 0) + 1 FROM schedule_versions)"
+    for operation in OPERATIONS:
+        rows = {'INSERT': ('NEW',), 'UPDATE': ('OLD', 'NEW'), 'DELETE': ('OLD',)}[operation]
+        days = ' UNION '.join(
+            f"SELECT {row}.user_id AS user_id, date({row}.data_hora) AS day"
+            f" UNION SELECT {row}.user_id, date({row}.data_hora, '+' || {row}.duracao_minutos || ' minutes', '-0.001 seconds')"
+            for row in rows
+        )
+        event_name = 'UPDATE OF user_id, data_hora, duracao_minutos' if operation == 'UPDATE' else operation
+        op.execute(f"""
+            CREATE TRIGGER appointments_schedule_{operation.lower()}
+            AFTER {event_name} ON appointments BEGIN
+                INSERT INTO schedule_versions (user_id, day, version)
+                SELECT user_id, day, {stamp} FROM ({days}) WHERE true
+                ON CONFLICT (user_id, day) DO UPDATE SET version = {stamp};
+            END
+        """)
+
+
+def downgrade():
+    for operation in OPERATIONS:
+        op.execute(f"DROP TRIGGER IF EXISTS appointments_schedule_{operation.lower()}")
+
+    with op.batch_alter_table('schedule_versions', schema=None) as batch_op:
+        batch_op.drop_index('ix_schedule_versions_version')
+    op.drop_table('schedule_versions')
@@ -0,0 +1,33 @@
+"""Add audit archive segments
+
+Revision ID: d3b9e6f04a21
+Revises: c5f2a8d91e47
+Create Date: 2026-10-17 22:14:37.586120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3b9e6f04a21'
+down_revision = 'c5f2a8d91e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Registry of the monthly audit segments moved out of audit_logs (archive_audit_logs.py)
+    op.create_table('audit_archive_segments',
+    sa.Column('month', sa.String(length=7), nullable=False),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('first_at', sa.DateTime(), nullable=False),
+    sa.Column('last_at', sa.DateTime(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('month')
+    )
+
+
+def downgrade():
+    op.drop_table('audit_archive_segments')
@@ -0,0 +1,45 @@
+"""Add table version triggers
+
+Revision ID: e4a81f3b6c92
+Revises: b7e2c94d1a36
+Create Date: 2026-10-17 18:40:26.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a81f3b6c92'
+down_revision = 'b7e2c94d1a36'
+branch_labels = None
+depends_on = None
+
+TABLES = ('users', 'patients', 'responsibles', 'procedures', 'appointments', 'appointment_procedures')
+OPERATIONS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def upgrade():
+    with op.batch_alter_table('cache_versions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('changed_at', sa.DateTime(), nullable=True))
+
+    # Every write bumps the table's row in cache_versions (ETags, procedure catalog)
+    for table in TABLES:
+        for operation in OPERATIONS:
+            op.execute(f"""
+                CREATE TRIGGER {table}_version_{operation.lower()}
+                AFTER {operation} ON {table} BEGIN
+                    INSERT INTO cache_versions (name, version, changed_at)
+                    VALUES ('{table}', 1, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+                    ON CONFLICT (name) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+                END
+            """)
+
+
+def downgrade():
+    for table in TABLES:
+        for operation in OPERATIONS:
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_version_{operation.lower()}")
+
+    with op.batch_alter_table('cache_versions', schema=None) as batch_op:
+        batch_op.drop_column('changed_at')
@@ -0,0 +1,28 @@
+"""Add audit record history index
+
+Revision ID: f7b3d0c6e915
+Revises: a6c4e1d8f352
+Create Date: 2026-10-18 00:37:52.918264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7b3d0c6e915'
+down_revision = 'a6c4e1d8f352'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Archived segment files get it on the next archive_audit_logs.py run
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_logs_table_name_record_id_created_at',
+                              ['table_name', 'record_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_logs_table_name_record_id_created_at')
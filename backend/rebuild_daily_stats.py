@@ -0,0 +1,22 @@
+"""
+Script para recalcular a tabela daily_stats a partir dos atendimentos e pacientes
+Execute: python rebuild_daily_stats.py
+"""
+from app import create_app
+from app.services.daily_stats_service import DailyStatsService
+from config import Config
+
+def rebuild_daily_stats():
+    app = create_app(Config)
+    
+    with app.app_context():
+        days, error = DailyStatsService.rebuild()
+        
+        if error:
+            print(f"Erro: {error}")
+            return
+        
+        print(f"Estatísticas diárias recalculadas: {days} dia(s)")
+
+if __name__ == '__main__':
+    rebuild_daily_stats()
@@ -0,0 +1,26 @@
+"""
+Script para recriar o índice de busca de pacientes (FTS5) a partir da tabela patients
+Use após importar dados por fora da aplicação ou depois de um VACUUM.
+Execute: python rebuild_patient_search.py
+"""
+from app import create_app, db
+from app.models.patient import Patient
+from app.models.patient_search import create_patient_search, rebuild_patient_search
+from config import Config
+
+def rebuild():
+    app = create_app(Config)
+    
+    with app.app_context():
+        try:
+            with db.engine.begin() as connection:
+                create_patient_search(connection)
+                rebuild_patient_search(connection)
+        except Exception as e:
+            print(f"Erro: {e}")
+            return
+        
+        print(f"Índice de busca recriado: {Patient.query.count()} paciente(s)")
+
+if __name__ == '__main__':
+    rebuild()
@@ -1,7 +1,8 @@
 from app import create_app
-from config import Config
+from config import get_config
 
-app = create_app(Config)
+config = get_config()
+app = create_app(config)
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=Config.DEBUG)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=config.DEBUG)
\ No newline at end of file